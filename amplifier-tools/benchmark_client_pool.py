@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-call overhead of a fresh Claude client vs the pooled one.
+
+Starts a local stand-in for the messages endpoint (no API key or network
+needed) and times the same number of calls three ways:
+
+    fresh   - a new client per call (the old ask_claude behaviour)
+    pooled  - the process-wide client with keep-alive connections
+    async   - the pooled async client, calls issued concurrently
+
+Usage:
+    python amplifier-tools/benchmark_client_pool.py [--calls 200] [--concurrency 8]
+"""
+
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.claude_helpers import (
+    ask_claude,
+    ask_claude_async,
+    close_async_claude_clients,
+    close_claude_clients,
+    get_claude_client,
+)
+
+RESPONSE = json.dumps({
+    "id": "msg_bench",
+    "type": "message",
+    "role": "assistant",
+    "model": "bench",
+    "content": [{"type": "text", "text": "ok"}],
+    "stop_reason": "end_turn",
+    "stop_sequence": None,
+    "usage": {"input_tokens": 1, "output_tokens": 1},
+}).encode("utf-8")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # Otherwise delayed ACKs dominate keep-alive timings
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        StubHandler.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(RESPONSE)))
+        self.end_headers()
+        self.wfile.write(RESPONSE)
+
+    def log_message(self, *args):
+        pass
+
+
+def timed(label: str, calls: int, run) -> float:
+    StubHandler.connections = 0
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    per_call = elapsed / calls * 1000
+    print(f"  {label:<8} {per_call:7.2f} ms/call  {elapsed:6.2f}s total  "
+          f"{StubHandler.connections} connection(s)")
+    return per_call
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs per-call Claude clients")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per mode (default: 200)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent calls in async mode (default: 8)")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ.setdefault("ANTHROPIC_API_KEY", "benchmark")
+    # Measure the client, not the rate limit budgets or the telemetry log
+    os.environ["CLAUDE_RPM"] = os.environ["CLAUDE_TPM"] = "0"
+    os.environ["CLAUDE_TELEMETRY"] = "0"
+    prompts = [f"call {i}" for i in range(args.calls)]
+
+    def fresh():
+        for prompt in prompts:
+            client = get_claude_client(pooled=False)
+            ask_claude(prompt=prompt, max_tokens=10, use_cache=False, client=client)
+            client.close()
+
+    def pooled():
+        for prompt in prompts:
+            ask_claude(prompt=prompt, max_tokens=10, use_cache=False)
+        close_claude_clients()
+
+    def concurrent():
+        async def run():
+            semaphore = asyncio.Semaphore(args.concurrency)
+
+            async def call(prompt):
+                async with semaphore:
+                    await ask_claude_async(prompt=prompt, max_tokens=10, use_cache=False)
+
+            await asyncio.gather(*(call(prompt) for prompt in prompts))
+            await close_async_claude_clients()
+
+        asyncio.run(run())
+
+    print(f"⏱️  {args.calls} calls against a local stub server")
+    before = timed("fresh", args.calls, fresh)
+    after = timed("pooled", args.calls, pooled)
+    timed("async", args.calls, concurrent)
+    print(f"\n📊 Pooled client saves {before - after:.2f} ms/call ({before / after:.1f}x)")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Summarize Claude calls logged by the amplifier tools.
+
+Every call made through utils/claude_helpers.py is appended to
+~/.cache/obs-dailynotes/claude-calls.jsonl (CLAUDE_TELEMETRY sets another
+path, or 0 turns logging off). This prints, per prompt template, the
+number of calls, cache hits, errors, retries, p50/p95 latency and tokens.
+
+Usage:
+    python amplifier-tools/claude_usage.py [--days 7] [--json] [--log PATH]
+"""
+
+import json
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent))
+
+from utils.telemetry import DEFAULT_TELEMETRY_PATH, load_calls, summarize, telemetry_path
+
+
+def format_ms(value) -> str:
+    if value is None:
+        return "-"
+    return f"{value / 1000:.1f}s" if value >= 1000 else f"{value:.0f}ms"
+
+
+def print_summary(summary: dict) -> None:
+    header = f"{'Template':<32} {'Calls':>6} {'Hits':>5} {'Errs':>5} {'Retry':>5} " \
+             f"{'p50':>7} {'p95':>7} {'TTFB':>7} {'In tok':>9} {'Out tok':>9}"
+    print(header)
+    print("-" * len(header))
+    for template, row in summary.items():
+        print(f"{template[:32]:<32} {row['calls']:>6} {row['cache_hits']:>5} {row['errors']:>5} "
+              f"{row['retries']:>5} {format_ms(row['p50_ms']):>7} {format_ms(row['p95_ms']):>7} "
+              f"{format_ms(row['ttfb_p50_ms']):>7} {row['input_tokens']:>9,} {row['output_tokens']:>9,}")
+
+    totals = {key: sum(row[key] for row in summary.values())
+              for key in ("calls", "cache_hits", "errors", "input_tokens", "output_tokens")}
+    print(f"\n📊 {totals['calls']} calls ({totals['cache_hits']} cached, {totals['errors']} failed), "
+          f"{totals['input_tokens']:,} input + {totals['output_tokens']:,} output tokens")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Summarize logged Claude calls per prompt template')
+    parser.add_argument('--days', type=float, help='Only calls from the last N days')
+    parser.add_argument('--log', help=f'Telemetry log (default: {DEFAULT_TELEMETRY_PATH})')
+    parser.add_argument('--json', action='store_true', help='Print the summary as JSON')
+    args = parser.parse_args()
+
+    path = Path(args.log) if args.log else telemetry_path() or DEFAULT_TELEMETRY_PATH
+    since = datetime.now(timezone.utc) - timedelta(days=args.days) if args.days else None
+    summary = summarize(load_calls(path, since))
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    if not summary:
+        print(f"ℹ️  No calls logged in {path}")
+        return
+    print(f"📈 Claude usage from {path}\n")
+    print_summary(summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,22 +5,61 @@ Generate enriched person pages for obs-dailynotes using AI.
 Usage:
     python amplifier-tools/generate_person_page.py <email>
     python amplifier-tools/generate_person_page.py --name "Person Name" --email "person@example.com"
+    python amplifier-tools/generate_person_page.py --batch people.csv [--concurrency 4]
+    python amplifier-tools/generate_person_page.py --batch config/people.json --message-batch
 
 Examples:
     python amplifier-tools/generate_person_page.py joi@ito.com
     python amplifier-tools/generate_person_page.py --name "Joichi Ito" --email "joi@ito.com" --company "Digital Garage"
+    python amplifier-tools/generate_person_page.py --batch attendees.jsonl --concurrency 8
+
+Batch files are CSV (with a header row) or JSONL, with the fields email,
+name, company and context; only email is required. config/people.json and
+people.index.json (name → emails) are read too. People who already have a
+page are skipped, so an interrupted batch can simply be re-run.
+
+Existing pages are found through a people index merged from the vault's
+people.index.json, config/people.json and person page frontmatter, so a
+person is matched by any email, alias or qualified name ("Chris Anderson
+(TED)"). Pass --update to regenerate a matched page in place.
+
+Pages are streamed to <page>.md.partial as Claude writes them and renamed
+into place when complete. If the connection drops, the partial file is
+kept and the next run asks Claude to continue from it.
+
+--message-batch submits every prompt as one Message Batch (half price,
+results within hours) instead of calling Claude per person. If polling is
+interrupted, re-run with --batch-id to collect the submitted batch.
 """
 
 import sys
 import os
 from pathlib import Path
+import asyncio
+import csv
+import hashlib
 import json
 import re
+import time
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent))
 
-from utils.claude_helpers import ask_claude, write_file
+from utils.mention_index import (DEFAULT_MENTION_BUDGET, MentionIndex, default_vault_root, format_mentions,
+                                 load_mention_index)
+from utils.people_index import PeopleIndex, load_people_index
+from utils.claude_helpers import (
+    BATCH_POLL_SECONDS,
+    ask_claude_batch,
+    close_async_claude_clients,
+    get_async_claude_client,
+    load_prompt_template,
+    stream_claude,
+    stream_claude_async,
+)
+
+PERSON_FIELDS = ("email", "name", "company", "context")
+DEFAULT_CONCURRENCY = 4
 
 
 def extract_name_from_email(email: str) -> str:
@@ -59,6 +98,428 @@ def sanitize_filename(name: str) -> str:
     return safe.strip('-')
 
 
+def person_keys(person: dict) -> list[str]:
+    """Emails, name and aliases a person is mentioned by in notes"""
+    keys = [person['email'], person['name']]
+    keys += person.get('emails') or []
+    keys += person.get('aliases') or []
+    return [key for key in dict.fromkeys(keys) if key]
+
+
+def build_person_data(person: dict, mentions: MentionIndex = None) -> str:
+    """Format a person record for the prompt, with recent note mentions if an index is given"""
+    person_data = f"""
+Email: {person['email']}
+Name: {person['name']}
+"""
+
+    if person.get('company'):
+        person_data += f"Company: {person['company']}\n"
+
+    if person.get('context'):
+        person_data += f"Additional Context: {person['context']}\n"
+
+    if mentions is not None:
+        recent = mentions.recent_mentions(person_keys(person))
+        if recent:
+            person_data += f"\nRecent mentions in daily and meeting notes (newest first):\n{format_mentions(recent)}\n"
+
+    return person_data
+
+
+def clean_page_content(page_content: str) -> str:
+    """Remove markdown code blocks around Claude's response if present"""
+    if page_content.startswith("```"):
+        lines = page_content.split("\n")
+        if lines[0].startswith("```"):
+            lines = lines[1:]
+        if lines and lines[-1].strip() == "```":
+            lines = lines[:-1]
+        page_content = "\n".join(lines)
+    return page_content
+
+
+class FenceStripper:
+    """
+    Streaming equivalent of clean_page_content.
+
+    ``feed`` returns the text that is safe to write so far: the opening
+    fence line is dropped once it is seen, and the last line is held back
+    until ``finish`` shows whether it is the closing fence. ``fenced=True``
+    starts inside a fence (when continuing a partial page). The dropped
+    opening fence line is kept in ``header``.
+    """
+
+    def __init__(self, fenced: bool = None):
+        self.fenced = fenced
+        self.in_header = False
+        self.held = ""
+        self.header = ""
+
+    def feed(self, text: str) -> str:
+        self.held += text
+        if self.fenced is None:
+            if "```".startswith(self.held):
+                return ""  # Too short to tell yet
+            self.fenced = self.held.startswith("```")
+            self.in_header = self.fenced
+        if not self.fenced:
+            out, self.held = self.held, ""
+            return out
+        if self.in_header:
+            newline = self.held.find("\n")
+            if newline < 0:
+                return ""
+            self.header, self.held = self.held[:newline + 1], self.held[newline + 1:]
+            self.in_header = False
+        last = self.held.rfind("\n")
+        if last <= 0:
+            return ""
+        out, self.held = self.held[:last], self.held[last:]
+        return out
+
+    def finish(self) -> str:
+        held, self.held = self.held, ""
+        if self.fenced is None:
+            return "" if held == "```" else held
+        if not self.fenced:
+            return held
+        if self.in_header:
+            return ""
+        last_line = held[1:] if held.startswith("\n") else held
+        return "" if last_line.strip() == "```" else held
+
+
+class PageWriter:
+    """
+    Write a streamed page to ``<page>.partial`` and move it into place.
+
+    Used as a context manager: a clean exit commits the page atomically,
+    an exception leaves the partial file for resuming. With ``resume`` an
+    existing partial file is continued; ``prefill`` is then the text
+    Claude should continue from. A fenced reply keeps its opening fence
+    line at the top of the partial file, so a resumed page strips the
+    closing fence only if the reply had an opening one.
+    """
+
+    def __init__(self, path: Path, resume: bool = True):
+        self.path = Path(path)
+        self.partial = partial_page_path(self.path)
+        self.start = time.perf_counter()
+        self.ttfb = None
+        self.prefill = None
+        fenced = None
+        if resume and self.partial.exists():
+            self.prefill = self.partial.read_text(encoding="utf-8").rstrip() or None
+            if self.prefill:
+                fenced = self.prefill.startswith("```")
+        self.stripper = FenceStripper(fenced=fenced)
+        self.has_header = bool(fenced)
+        self.partial.parent.mkdir(parents=True, exist_ok=True)
+        self.file = open(self.partial, "w", encoding="utf-8")
+        if self.prefill:
+            self.file.write(self.prefill)
+
+    def write(self, text: str) -> None:
+        if self.ttfb is None and text:
+            self.ttfb = time.perf_counter() - self.start
+        out = self.stripper.feed(text)
+        if self.stripper.header and not self.has_header:
+            self.file.write(self.stripper.header)
+            self.has_header = True
+        self.file.write(out)
+        self.file.flush()
+
+    def commit(self) -> None:
+        self.file.write(self.stripper.finish())
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
+        if self.has_header:
+            # Drop the opening fence line kept for resuming
+            text = self.partial.read_text(encoding="utf-8")
+            tmp = self.partial.with_name(self.partial.name + ".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text.partition("\n")[2])
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self.partial.unlink()
+        else:
+            os.replace(self.partial, self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            # Keep everything received, including the held-back last line
+            self.file.write(self.stripper.finish())
+            self.file.close()
+        return False
+
+
+def person_page_path(people_dir: Path, name: str) -> Path:
+    return people_dir / (sanitize_filename(name) + ".md")
+
+
+def partial_page_path(path: Path) -> Path:
+    return path.with_name(path.name + ".partial")
+
+
+def resolve_person(person: dict, people_dir: Path, people_index: PeopleIndex = None) -> tuple[dict, Path]:
+    """
+    The person merged with what the people index knows about them, and
+    their page: the existing one if they have one (under any name, alias
+    or qualifier), else a new page named after them.
+    """
+    known = people_index.match([person['email']], person['name']) if people_index else None
+    if known is None:
+        return person, person_page_path(people_dir, person['name'])
+    person = {**person, "name": known["name"], "emails": known["emails"], "aliases": known["aliases"]}
+    return person, known["path"] or person_page_path(people_dir, known["name"])
+
+
+def people_json_rows(data: dict) -> list[dict]:
+    """Rows from config/people.json or people.index.json (name → emails or details)"""
+    rows = []
+    for name, entry in data.items():
+        if isinstance(entry, list):
+            entry = {"emails": entry}
+        elif not isinstance(entry, dict):
+            continue
+        emails = entry.get("emails") or entry.get("email") or []
+        if isinstance(emails, str):
+            emails = [emails]
+        rows.append({
+            "name": entry.get("name") or name,
+            "email": emails[0] if emails else "",
+            "company": entry.get("company") or entry.get("qualifier") or "",
+            "context": entry.get("context") or "",
+        })
+    return rows
+
+
+def load_people(path: Path | str) -> list[dict]:
+    """Read people from a CSV, JSONL or people JSON batch file"""
+    path = Path(path)
+    rows = []
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        if path.suffix.lower() in ('.jsonl', '.ndjson'):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif path.suffix.lower() == '.json':
+            rows = people_json_rows(json.load(f))
+        else:
+            rows = list(csv.DictReader(f))
+
+    people = []
+    for row in rows:
+        row = {str(k).strip().lower(): (v or '').strip() for k, v in row.items() if k}
+        if not row.get('email'):
+            continue
+        person = {field: row.get(field, '') for field in PERSON_FIELDS}
+        person['name'] = person['name'] or extract_name_from_email(person['email'])
+        people.append(person)
+    return people
+
+
+def batch_custom_id(path: Path) -> str:
+    """Stable Message Batch id for a page, so a resumed batch maps back to it"""
+    return "person-" + hashlib.sha1(path.name.encode("utf-8")).hexdigest()[:20]
+
+
+def generate_message_batch(people: list[dict], people_dir: Path, batch_id: str = None,
+                           poll_seconds: float = BATCH_POLL_SECONDS, use_cache: bool = True,
+                           client=None, mentions: MentionIndex = None,
+                           people_index: PeopleIndex = None, update: bool = False) -> list[dict]:
+    """
+    Generate pages for many people with a single Message Batch.
+
+    Pages are written as results stream in. Returns one result per person,
+    like generate_batch; ``latency`` is the time until the page was written.
+    """
+    start = time.perf_counter()
+    results = []
+    items = {}
+    people_index = people_index if people_index is not None else PeopleIndex()
+    for person in people:
+        person, path = resolve_person(person, people_dir, people_index)
+        result = {"email": person['email'], "name": person['name'], "path": path,
+                  "status": "skipped", "latency": 0.0, "error": None}
+        results.append(result)
+        custom_id = batch_custom_id(path)
+        if custom_id in items:
+            print(f"  ⏭️  {person['name']}: duplicate of an earlier row → {path}")
+            continue
+        if path.exists() and not update:
+            print(f"  ⏭️  {person['name']}: page exists → {path}")
+            continue
+        people_index.add(person['name'], [person['email']], path=path)
+        items[custom_id] = (person, result)
+
+    if not items:
+        return results
+
+    prompts = {
+        custom_id: load_prompt_template("person_page_generation.md",
+                                        {"person_data": build_person_data(person, mentions)})
+        for custom_id, (person, _) in items.items()
+    }
+
+    def on_submit(new_id):
+        print(f"📦 Submitted message batch {new_id} ({len(items)} requests)")
+        print(f"   If interrupted, collect it with --batch-id {new_id}")
+
+    def on_poll(batch):
+        counts = batch.request_counts
+        print(f"  ⏳ {batch.processing_status}: {counts.succeeded} succeeded, "
+              f"{counts.errored} errored, {counts.processing} processing")
+
+    for custom_id, text, error in ask_claude_batch(prompts, max_tokens=2000, use_cache=use_cache,
+                                                   batch_id=batch_id, poll_seconds=poll_seconds,
+                                                   client=client, on_submit=on_submit, on_poll=on_poll,
+                                                   template="person_page_generation.md"):
+        person, result = items[custom_id]
+        if error is None:
+            # Same atomic partial-then-rename write as streamed pages
+            with PageWriter(result["path"], resume=False) as page:
+                page.write(text)
+            result["status"] = "generated"
+            print(f"  ✅ {person['name']} → {result['path']}")
+        else:
+            result["status"] = "failed"
+            result["error"] = error
+            print(f"  ❌ {person['name']}: {error}")
+        result["latency"] = time.perf_counter() - start
+
+    for person, result in items.values():
+        if result["status"] == "skipped":
+            result["status"] = "failed"
+            result["error"] = "missing from batch results"
+    return results
+
+
+async def generate_batch(people: list[dict], people_dir: Path, concurrency: int = DEFAULT_CONCURRENCY,
+                         base_url: str = None, use_cache: bool = True,
+                         mentions: MentionIndex = None, people_index: PeopleIndex = None,
+                         update: bool = False) -> list[dict]:
+    """
+    Generate pages for many people with a bounded pool of async workers.
+
+    Returns one result per person, in input order, with ``status``
+    (generated, skipped or failed), ``path``, ``latency`` and ``ttfb``
+    (time to first streamed text) in seconds, and ``error``. People the
+    people index already has a page for are skipped, or regenerated in
+    place with ``update``.
+    """
+    results = []
+    queue = asyncio.Queue()
+    claimed = set()
+    people_index = people_index if people_index is not None else PeopleIndex()
+    for person in people:
+        person, path = resolve_person(person, people_dir, people_index)
+        result = {"email": person['email'], "name": person['name'], "path": path,
+                  "status": "skipped", "latency": 0.0, "ttfb": None, "error": None}
+        results.append(result)
+        # Resume: people with a page (or a duplicate in this batch) are skipped
+        if path in claimed:
+            print(f"  ⏭️  {person['name']}: duplicate of an earlier row → {path}")
+            continue
+        if path.exists() and not update:
+            print(f"  ⏭️  {person['name']}: page exists → {path}")
+            continue
+        # Later rows with the same email or name resolve to this page
+        people_index.add(person['name'], [person['email']], path=path)
+        claimed.add(path)
+        queue.put_nowait((person, result))
+
+    if queue.empty():
+        return results
+
+    client = get_async_claude_client(base_url)
+
+    async def worker():
+        while True:
+            try:
+                person, result = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            start = time.perf_counter()
+            page = None
+            try:
+                with PageWriter(result["path"]) as page:
+                    async for text in stream_claude_async(
+                        prompt_template="person_page_generation.md",
+                        context={"person_data": build_person_data(person, mentions)},
+                        max_tokens=2000,
+                        client=client,
+                        use_cache=use_cache,
+                        prefill=page.prefill,
+                    ):
+                        page.write(text)
+                result["status"] = "generated"
+            except Exception as e:
+                result["status"] = "failed"
+                result["error"] = str(e)
+            result["latency"] = time.perf_counter() - start
+            result["ttfb"] = page.ttfb if page else None
+            if result["error"]:
+                print(f"  ❌ {person['name']} ({result['latency']:.1f}s): {result['error']}")
+            else:
+                print(f"  ✅ {person['name']} ({result['latency']:.1f}s) → {result['path']}")
+
+    workers = min(max(1, concurrency), queue.qsize())
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return results
+
+
+def print_batch_summary(results: list[dict], elapsed: float) -> None:
+    done = [r for r in results if r["status"] != "skipped"]
+    latencies = sorted(r["latency"] for r in done)
+    ttfbs = sorted(r["ttfb"] for r in done if r.get("ttfb") is not None)
+    counts = {status: sum(1 for r in results if r["status"] == status)
+              for status in ("generated", "skipped", "failed")}
+
+    print(f"\n📊 {counts['generated']} generated, {counts['skipped']} skipped, "
+          f"{counts['failed']} failed in {elapsed:.1f}s")
+    if latencies:
+        print(f"   Latency: median {latencies[len(latencies) // 2]:.1f}s, "
+              f"max {latencies[-1]:.1f}s")
+    if ttfbs:
+        print(f"   Time to first byte: median {ttfbs[len(ttfbs) // 2]:.2f}s, "
+              f"max {ttfbs[-1]:.2f}s")
+
+
+def run_batch(batch_file: str, concurrency: int, use_cache: bool = True, message_batch: bool = False,
+              batch_id: str = None, poll_seconds: float = BATCH_POLL_SECONDS,
+              mentions: MentionIndex = None, people_index: PeopleIndex = None,
+              update: bool = False) -> None:
+    people = load_people(batch_file)
+    people_dir = get_people_directory()
+    mode = "as one message batch" if message_batch else f"({concurrency} at a time)"
+    print(f"📧 Generating person pages for {len(people)} people {mode} into {people_dir}")
+
+    async def run():
+        try:
+            return await generate_batch(people, people_dir, concurrency, use_cache=use_cache,
+                                        mentions=mentions, people_index=people_index, update=update)
+        finally:
+            await close_async_claude_clients()
+
+    start = time.perf_counter()
+    if message_batch:
+        results = generate_message_batch(people, people_dir, batch_id, poll_seconds, use_cache,
+                                         mentions=mentions, people_index=people_index, update=update)
+    else:
+        results = asyncio.run(run())
+    print_batch_summary(results, time.perf_counter() - start)
+
+    if any(r["status"] == "failed" for r in results):
+        sys.exit(1)
+
+
 def main():
     import argparse
 
@@ -68,62 +529,100 @@ def main():
     parser.add_argument('--email', dest='email_flag', help='Email address via flag')
     parser.add_argument('--company', help='Company name (optional)')
     parser.add_argument('--context', help='Additional context (optional)')
+    parser.add_argument('--batch', help='CSV or JSONL file of people to generate pages for')
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f'Pages generated at once in batch mode (default: {DEFAULT_CONCURRENCY})')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Always call Claude, ignoring cached responses to identical requests')
+    parser.add_argument('--message-batch', action='store_true',
+                        help='Submit the whole batch as one Message Batch job (cheaper, slower)')
+    parser.add_argument('--batch-id', help='Collect results of an already submitted message batch')
+    parser.add_argument('--poll-seconds', type=float, default=BATCH_POLL_SECONDS,
+                        help=f'Message batch polling interval (default: {BATCH_POLL_SECONDS:g})')
+    parser.add_argument('--vault', help='Vault whose daily and meeting notes are searched for mentions '
+                                        f'(default: {default_vault_root()})')
+    parser.add_argument('--no-mentions', action='store_true',
+                        help='Do not add recent note mentions to the prompt')
+    parser.add_argument('--mention-budget', type=int, default=DEFAULT_MENTION_BUDGET,
+                        help=f'Tokens of note mentions per person (default: {DEFAULT_MENTION_BUDGET})')
+    parser.add_argument('--update', action='store_true',
+                        help='Regenerate existing pages in place instead of skipping them')
 
     args = parser.parse_args()
 
     # Get email from positional or flag
     email = args.email or args.email_flag
 
-    if not email:
+    if args.batch and not Path(args.batch).is_file():
+        print(f"❌ Error: Batch file not found: {args.batch}")
+        sys.exit(1)
+    if not args.batch and not email:
         print("❌ Error: Email address required")
         print("Usage: python amplifier-tools/generate_person_page.py <email>")
         print("   or: python amplifier-tools/generate_person_page.py --email <email> --name \"Name\"")
+        print("   or: python amplifier-tools/generate_person_page.py --batch people.csv")
         sys.exit(1)
 
-    # Get or infer name
-    name = args.name or extract_name_from_email(email)
+    people_dir = get_people_directory()
+    vault = Path(args.vault) if args.vault else default_vault_root()
+
+    start = time.perf_counter()
+    people_index = load_people_index(vault, people_dir)
+    print(f"👥 People index: {len(people_index)} people, {len(people_index.keys)} emails and names "
+          f"({(time.perf_counter() - start) * 1000:.0f}ms)")
+
+    mentions = None
+    if not args.no_mentions:
+        start = time.perf_counter()
+        mentions = load_mention_index(vault, args.mention_budget, people_index.names())
+        print(f"📇 Mention index: {len(mentions.files)} notes "
+              f"({(time.perf_counter() - start) * 1000:.0f}ms)")
+
+    if args.batch:
+        run_batch(args.batch, args.concurrency, use_cache=not args.no_cache,
+                  message_batch=args.message_batch or bool(args.batch_id),
+                  batch_id=args.batch_id, poll_seconds=args.poll_seconds, mentions=mentions,
+                  people_index=people_index, update=args.update)
+        return
+
+    # Get or infer name, and find any page they already have
+    person, output_path = resolve_person({
+        "email": email,
+        "name": args.name or extract_name_from_email(email),
+        "company": args.company,
+        "context": args.context,
+    }, people_dir, people_index)
+    name = person['name']
+
+    if output_path.exists() and not args.update:
+        print(f"⏭️  {name} already has a page: {output_path}")
+        print(f"   Pass --update to regenerate it")
+        return
 
     print(f"📧 Generating person page for: {name} ({email})")
 
     # Build context for Claude
-    person_data = f"""
-Email: {email}
-Name: {name}
-"""
-
-    if args.company:
-        person_data += f"Company: {args.company}\n"
-
-    if args.context:
-        person_data += f"Additional Context: {args.context}\n"
+    person_data = build_person_data(person, mentions)
 
     print(f"🤖 Asking Claude to generate enriched person page...")
 
     try:
-        # Generate page using Claude
-        page_content = ask_claude(
-            prompt_template="person_page_generation.md",
-            context={"person_data": person_data},
-            max_tokens=2000,
-        )
-
-        # Clean up response (remove markdown code blocks if present)
-        if page_content.startswith("```"):
-            lines = page_content.split("\n")
-            if lines[0].startswith("```"):
-                lines = lines[1:]
-            if lines and lines[-1].strip() == "```":
-                lines = lines[:-1]
-            page_content = "\n".join(lines)
-
-        # Determine output path
-        people_dir = get_people_directory()
-        filename = sanitize_filename(name) + ".md"
-        output_path = people_dir / filename
-
-        # Write the file
-        write_file(output_path, page_content)
-
+        # Stream the page into <page>.partial, stripping code fences as it
+        # arrives, and rename it into place once complete
+        with PageWriter(output_path) as page:
+            if page.prefill:
+                print(f"↪️  Continuing from {page.partial}")
+            for text in stream_claude(
+                prompt_template="person_page_generation.md",
+                context={"person_data": person_data},
+                max_tokens=2000,
+                use_cache=not args.no_cache,
+                prefill=page.prefill,
+            ):
+                page.write(text)
+
+        if page.ttfb is not None:
+            print(f"⚡ First text after {page.ttfb:.2f}s, done after {time.perf_counter() - page.start:.1f}s")
         print(f"✅ Generated person page: {output_path}")
         print(f"\n💡 Next steps:")
         print(f"   1. Review the page: {output_path}")
@@ -133,6 +632,8 @@ Name: {name}
 
     except Exception as e:
         print(f"❌ Error generating person page: {e}")
+        if partial_page_path(output_path).exists():
+            print(f"   Partial output kept in {partial_page_path(output_path)}; re-run to continue")
         sys.exit(1)
 
 
@@ -1,5 +1,5 @@
 """Shared utilities for chanoyu-db amplifier tools"""
 
-from .claude_helpers import ask_claude, read_file, write_file
+from .claude_helpers import ask_claude, ask_claude_async, read_file, stream_claude, stream_claude_async, write_file
 
-__all__ = ["ask_claude", "read_file", "write_file"]
+__all__ = ["ask_claude", "ask_claude_async", "read_file", "stream_claude", "stream_claude_async", "write_file"]
@@ -1,24 +1,142 @@
 """Helper functions for interacting with Claude via the Anthropic API"""
 
+import asyncio
+import inspect
 import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Dict, Any
-from anthropic import Anthropic
+from typing import AsyncIterator, Callable, Dict, Any, Iterator, Optional, Tuple
+from anthropic import (
+    DEFAULT_CONNECTION_LIMITS,
+    Anthropic,
+    AsyncAnthropic,
+    DefaultAsyncHttpxClient,
+    DefaultHttpxClient,
+)
+from anthropic.resources.messages import Messages
 from dotenv import load_dotenv
 
+from .response_cache import cache_key, get_response_cache
+from .rate_limit import estimate_tokens, get_scheduler
+from .telemetry import CallRecord
+
 # Load environment variables
 load_dotenv()
 
 
-def get_claude_client() -> Anthropic:
-    """Get configured Claude client"""
+def _get_api_key() -> str:
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ValueError(
             "ANTHROPIC_API_KEY not found in environment. "
             "Add it to .env.local or set as environment variable."
         )
-    return Anthropic(api_key=api_key)
+    return api_key
+
+
+# Connection pool limits, overridable with CLAUDE_MAX_CONNECTIONS,
+# CLAUDE_MAX_KEEPALIVE and CLAUDE_KEEPALIVE_SECONDS
+DEFAULT_MAX_CONNECTIONS = 20
+DEFAULT_MAX_KEEPALIVE = 10
+DEFAULT_KEEPALIVE_SECONDS = 30.0
+
+# Process-wide clients, keyed by base URL and limits. Async clients are
+# bound to the event loop they first ran on, so they are pooled per loop.
+_clients: Dict[tuple, Anthropic] = {}
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, AsyncAnthropic]]" = (
+    weakref.WeakKeyDictionary()
+)
+_clients_lock = threading.Lock()
+
+
+def connection_limits(max_connections: int = None, max_keepalive: int = None,
+                      keepalive_seconds: float = None):
+    """HTTP connection pool limits for Claude clients"""
+    max_connections = max_connections or int(os.getenv("CLAUDE_MAX_CONNECTIONS", DEFAULT_MAX_CONNECTIONS))
+    max_keepalive = max_keepalive or int(os.getenv("CLAUDE_MAX_KEEPALIVE", DEFAULT_MAX_KEEPALIVE))
+    if keepalive_seconds is None:
+        keepalive_seconds = float(os.getenv("CLAUDE_KEEPALIVE_SECONDS", DEFAULT_KEEPALIVE_SECONDS))
+    # Same Limits class the SDK's own HTTP client uses
+    return type(DEFAULT_CONNECTION_LIMITS)(
+        max_connections=max_connections,
+        max_keepalive_connections=min(max_keepalive, max_connections),
+        keepalive_expiry=keepalive_seconds,
+    )
+
+
+def _client_key(base_url: str, limits) -> tuple:
+    return (base_url or os.getenv("ANTHROPIC_BASE_URL"), limits.max_connections,
+            limits.max_keepalive_connections, limits.keepalive_expiry)
+
+
+def get_claude_client(base_url: str = None, pooled: bool = True, limits=None) -> Anthropic:
+    """
+    Get configured Claude client.
+
+    By default this is a process-wide client whose keep-alive connections
+    are reused by every call; ``pooled=False`` builds a new one.
+    """
+    limits = limits or connection_limits()
+    key = _client_key(base_url, limits)
+    if not pooled:
+        return Anthropic(api_key=_get_api_key(), base_url=key[0],
+                         http_client=DefaultHttpxClient(limits=limits))
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None or client.is_closed():
+            client = _clients[key] = get_claude_client(base_url, pooled=False, limits=limits)
+        return client
+
+
+def get_async_claude_client(base_url: str = None, pooled: bool = True, limits=None) -> AsyncAnthropic:
+    """
+    Get configured async Claude client, for running many requests concurrently.
+
+    Inside a running event loop this is shared by every caller on that
+    loop; outside one (or with ``pooled=False``) a new client is built.
+    """
+    limits = limits or connection_limits()
+    key = _client_key(base_url, limits)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        pooled = False
+    if not pooled:
+        return AsyncAnthropic(api_key=_get_api_key(), base_url=key[0],
+                              http_client=DefaultAsyncHttpxClient(limits=limits))
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(key)
+    if client is None or client.is_closed():
+        client = clients[key] = get_async_claude_client(base_url, pooled=False, limits=limits)
+    return client
+
+
+def close_claude_clients() -> None:
+    """Close the pooled sync clients (their connections are reopened on next use)"""
+    with _clients_lock:
+        clients = list(_clients.values())
+        _clients.clear()
+    for client in clients:
+        client.close()
+
+
+def scheduled(client):
+    """
+    ``client`` with the SDK's own retries off, for calls the shared
+    scheduler (utils/rate_limit.py) already retries. The copy shares the
+    client's connection pool.
+    """
+    return client.with_options(max_retries=0)
+
+
+async def close_async_claude_clients() -> None:
+    """Close the pooled async clients of the running event loop"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        await client.close()
 
 
 def read_file(file_path: Path | str) -> str:
@@ -49,6 +167,103 @@ def load_prompt_template(template_name: str, context: Dict[str, Any] = None) ->
     return template
 
 
+def build_message_params(prompt: str, model: str, max_tokens: int, temperature: float = 1.0,
+                         prefill: str = None) -> Dict[str, Any]:
+    """
+    Request parameters for a single-turn messages call.
+
+    ``prefill`` starts Claude's reply with the given text, which it then
+    continues (the API rejects a prefill ending in whitespace).
+    """
+    params = {
+        "model": model,
+        "max_tokens": max_tokens,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt,
+            }
+        ],
+        "temperature": temperature,
+    }
+    if prefill:
+        params["messages"].append({"role": "assistant", "content": prefill.rstrip()})
+    return params
+
+
+# Request fields the installed SDK takes as keyword arguments
+_SDK_PARAMS = frozenset(inspect.signature(Messages.create).parameters)
+
+
+def sdk_kwargs(params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keyword arguments for ``messages.create`` and ``messages.stream``.
+
+    Fields the installed SDK has no argument for (such as ``temperature``
+    in some releases) go through ``extra_body``, so the request body is the
+    same whichever SDK is installed.
+    """
+    kwargs = {key: value for key, value in params.items() if key in _SDK_PARAMS}
+    extra = {key: value for key, value in params.items() if key not in _SDK_PARAMS}
+    if extra:
+        kwargs["extra_body"] = extra
+    return kwargs
+
+
+def _request_key(prompt: str, model: str, max_tokens: int, temperature: float) -> str:
+    return cache_key({"prompt": prompt, "model": model, "max_tokens": max_tokens,
+                      "temperature": temperature})
+
+
+class _Request:
+    """
+    The bookkeeping every entry point shares: the prompt, the response
+    cache, the telemetry record and the scheduler's token estimate
+    """
+
+    def __init__(self, prompt, prompt_template, context, model, max_tokens, temperature,
+                 mode: str, use_cache: bool, prefill: str = None):
+        if prompt is None and prompt_template is None:
+            raise ValueError("Must provide either prompt or prompt_template")
+        if prompt_template:
+            prompt = load_prompt_template(prompt_template, context)
+
+        self.model = model
+        self.cache = get_response_cache() if use_cache and not prefill else None
+        self.key = _request_key(prompt, model, max_tokens, temperature)
+        self.call = CallRecord(prompt_template, model, mode, "miss" if self.cache is not None else "off")
+        self.kwargs = sdk_kwargs(build_message_params(prompt, model, max_tokens, temperature, prefill))
+        self.estimated = estimate_tokens(prompt, max_tokens)
+        self.scheduler = get_scheduler()
+        self.text = None
+
+    def cached(self) -> Optional[str]:
+        """The cached response, recorded as a hit, or None"""
+        if self.cache is None:
+            return None
+        text = self.cache.get(self.key)
+        if text is not None:
+            self.call.entry["cache"] = "hit"
+            self.call.finish()
+        return text
+
+    @contextmanager
+    def record(self) -> Iterator[CallRecord]:
+        """
+        Wrap the API call: finish the telemetry record, settle the token
+        estimate and cache ``self.text`` once the call succeeds
+        """
+        try:
+            yield self.call
+        except BaseException as e:
+            self.call.finish(e)
+            raise
+        self.call.finish()
+        self.scheduler.settle(self.estimated, self.call.tokens_used())
+        if self.cache is not None and self.text is not None:
+            self.cache.put(self.key, self.text, {"model": self.model})
+
+
 def ask_claude(
     prompt: str = None,
     prompt_template: str = None,
@@ -56,6 +271,8 @@ def ask_claude(
     model: str = "claude-sonnet-4-5-20250929",
     max_tokens: int = 4000,
     temperature: float = 1.0,
+    use_cache: bool = True,
+    client: Anthropic = None,
 ) -> str:
     """
     Ask Claude a question and get a response.
@@ -67,6 +284,9 @@ def ask_claude(
         model: Claude model to use
         max_tokens: Maximum tokens in response
         temperature: Sampling temperature (0-1)
+        use_cache: Reuse the response to an identical earlier request
+            (see utils/response_cache.py); False always calls the API
+        client: Client to use instead of the pooled one
 
     Returns:
         Claude's text response
@@ -81,24 +301,262 @@ def ask_claude(
             context={"component_code": code}
         )
     """
-    if prompt is None and prompt_template is None:
-        raise ValueError("Must provide either prompt or prompt_template")
+    request = _Request(prompt, prompt_template, context, model, max_tokens, temperature, "sync", use_cache)
+    cached = request.cached()
+    if cached is not None:
+        return cached
 
-    if prompt_template:
-        prompt = load_prompt_template(prompt_template, context)
+    client = scheduled(client or get_claude_client())
+    with request.record() as call:
+        raw = request.scheduler.call(lambda: client.messages.with_raw_response.create(**request.kwargs),
+                                     request.estimated, call.retried)
+        call.response(raw)
+        message = raw.parse()
+        call.usage(message.usage)
+        request.text = message.content[0].text
+    return request.text
 
-    client = get_claude_client()
 
-    message = client.messages.create(
-        model=model,
-        max_tokens=max_tokens,
-        temperature=temperature,
-        messages=[
-            {
-                "role": "user",
-                "content": prompt,
-            }
-        ],
-    )
+async def ask_claude_async(
+    prompt: str = None,
+    prompt_template: str = None,
+    context: Dict[str, Any] = None,
+    model: str = "claude-sonnet-4-5-20250929",
+    max_tokens: int = 4000,
+    temperature: float = 1.0,
+    client: AsyncAnthropic = None,
+    use_cache: bool = True,
+) -> str:
+    """
+    Async version of ask_claude.
+
+    Calls on the same event loop share a pooled client and its
+    connections unless a ``client`` is passed.
+    """
+    request = _Request(prompt, prompt_template, context, model, max_tokens, temperature, "async", use_cache)
+    cached = request.cached()
+    if cached is not None:
+        return cached
+
+    client = scheduled(client or get_async_claude_client())
+    with request.record() as call:
+        raw = await request.scheduler.call_async(lambda: client.messages.with_raw_response.create(**request.kwargs),
+                                                 request.estimated, call.retried)
+        call.response(raw)
+        message = await raw.parse()
+        call.usage(message.usage)
+        request.text = message.content[0].text
+    return request.text
+
+
+def _check_stream_complete(stream) -> None:
+    # A connection that closes cleanly mid-response just ends the event
+    # stream, so a missing stop reason is the only sign of truncation
+    if stream.current_message_snapshot.stop_reason is None:
+        raise ConnectionError("Stream ended before the response was complete")
+
+
+def stream_claude(
+    prompt: str = None,
+    prompt_template: str = None,
+    context: Dict[str, Any] = None,
+    model: str = "claude-sonnet-4-5-20250929",
+    max_tokens: int = 4000,
+    temperature: float = 1.0,
+    use_cache: bool = True,
+    client: Anthropic = None,
+    prefill: str = None,
+) -> Iterator[str]:
+    """
+    Streaming version of ask_claude: yields the response text as it arrives.
+
+    With ``prefill`` (e.g. the output kept from an interrupted stream)
+    Claude continues from that text and only the continuation is yielded.
+    A cache hit is yielded as a single chunk; only complete, un-prefilled
+    responses are cached.
+    """
+    request = _Request(prompt, prompt_template, context, model, max_tokens, temperature, "stream", use_cache, prefill)
+    cached = request.cached()
+    if cached is not None:
+        yield cached
+        return
+
+    client = scheduled(client or get_claude_client())
+    chunks = []
+    with request.record() as call:
+        # Only opening the stream is retried; once text has been yielded a
+        # retry would repeat it
+        with request.scheduler.stream(lambda: client.messages.stream(**request.kwargs),
+                                      request.estimated, call.retried) as stream:
+            call.response(stream.response)
+            for text in stream.text_stream:
+                call.first_text()
+                chunks.append(text)
+                yield text
+            _check_stream_complete(stream)
+            call.usage(stream.current_message_snapshot.usage)
+        request.text = "".join(chunks)
+
+
+async def stream_claude_async(
+    prompt: str = None,
+    prompt_template: str = None,
+    context: Dict[str, Any] = None,
+    model: str = "claude-sonnet-4-5-20250929",
+    max_tokens: int = 4000,
+    temperature: float = 1.0,
+    use_cache: bool = True,
+    client: AsyncAnthropic = None,
+    prefill: str = None,
+) -> AsyncIterator[str]:
+    """Async version of stream_claude"""
+    request = _Request(prompt, prompt_template, context, model, max_tokens, temperature, "stream", use_cache, prefill)
+    cached = request.cached()
+    if cached is not None:
+        yield cached
+        return
+
+    client = scheduled(client or get_async_claude_client())
+    chunks = []
+    with request.record() as call:
+        async with request.scheduler.stream_async(lambda: client.messages.stream(**request.kwargs),
+                                                  request.estimated, call.retried) as stream:
+            call.response(stream.response)
+            async for text in stream.text_stream:
+                call.first_text()
+                chunks.append(text)
+                yield text
+            _check_stream_complete(stream)
+            call.usage(stream.current_message_snapshot.usage)
+        request.text = "".join(chunks)
+
+
+# Message Batches: many requests in one job, processed asynchronously at
+# half the per-token price. Results usually arrive within the hour.
+BATCH_POLL_SECONDS = 30.0
+
+
+def submit_message_batch(
+    prompts: Dict[str, str],
+    model: str = "claude-sonnet-4-5-20250929",
+    max_tokens: int = 4000,
+    temperature: float = 1.0,
+    client: Anthropic = None,
+) -> str:
+    """
+    Submit prompts as one Message Batch and return its id.
+
+    ``prompts`` maps a custom id (1-64 letters, digits, ``-`` or ``_``)
+    to a prompt; results come back under the same ids.
+    """
+    client = scheduled(client or get_claude_client())
+    requests = [
+        {"custom_id": custom_id, "params": build_message_params(prompt, model, max_tokens, temperature)}
+        for custom_id, prompt in prompts.items()
+    ]
+    batch = get_scheduler().call(lambda: client.messages.batches.create(requests=requests))
+    return batch.id
+
+
+def wait_for_message_batch(
+    batch_id: str,
+    poll_seconds: float = BATCH_POLL_SECONDS,
+    timeout: float = None,
+    client: Anthropic = None,
+    on_poll: Callable[[Any], None] = None,
+):
+    """Poll a Message Batch until it has ended; returns the final batch"""
+    client = scheduled(client or get_claude_client())
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        batch = get_scheduler().call(lambda: client.messages.batches.retrieve(batch_id))
+        if on_poll:
+            on_poll(batch)
+        if batch.processing_status == "ended":
+            return batch
+        if deadline is not None and time.monotonic() >= deadline:
+            raise TimeoutError(f"Message batch {batch_id} still {batch.processing_status} after {timeout}s")
+        time.sleep(poll_seconds)
+
+
+def iter_message_batch_results(batch_id: str, client: Anthropic = None) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Stream an ended batch's results as ``(custom_id, text, error)``.
+
+    Results arrive in completion order, not submission order; exactly one
+    of ``text`` and ``error`` is set.
+    """
+    for custom_id, text, error, _ in _batch_results(batch_id, client):
+        yield custom_id, text, error
+
+
+def _batch_results(batch_id: str, client: Anthropic = None):
+    # (custom_id, text, error, usage) for each result of an ended batch
+    client = scheduled(client or get_claude_client())
+    for entry in get_scheduler().call(lambda: client.messages.batches.results(batch_id)):
+        result = entry.result
+        if result.type == "succeeded":
+            yield entry.custom_id, result.message.content[0].text, None, result.message.usage
+        elif result.type == "errored":
+            yield entry.custom_id, None, getattr(result.error.error, "message", None) or str(result.error), None
+        else:
+            yield entry.custom_id, None, result.type, None  # canceled or expired
+
+
+def ask_claude_batch(
+    prompts: Dict[str, str],
+    model: str = "claude-sonnet-4-5-20250929",
+    max_tokens: int = 4000,
+    temperature: float = 1.0,
+    use_cache: bool = True,
+    batch_id: str = None,
+    poll_seconds: float = BATCH_POLL_SECONDS,
+    timeout: float = None,
+    client: Anthropic = None,
+    on_submit: Callable[[str], None] = None,
+    on_poll: Callable[[Any], None] = None,
+    template: str = None,
+) -> Iterator[Tuple[str, Optional[str], Optional[str]]]:
+    """
+    Answer many prompts with one Message Batch, yielding ``(custom_id, text, error)``.
+
+    Cached responses are yielded first and only the misses are submitted;
+    successful results are cached as they stream in. Pass ``batch_id`` to
+    collect an already submitted batch (e.g. after an interrupted poll)
+    instead of submitting a new one; ``on_submit`` receives the new id.
+    ``template`` labels the calls in telemetry.
+    """
+    start = time.perf_counter()
+    cache = get_response_cache() if use_cache else None
+    keys = {custom_id: _request_key(prompt, model, max_tokens, temperature)
+            for custom_id, prompt in prompts.items()}
+
+    pending = {}
+    for custom_id, prompt in prompts.items():
+        cached = cache.get(keys[custom_id]) if cache is not None else None
+        if cached is not None:
+            CallRecord(template, model, "batch", "hit").finish()
+            yield custom_id, cached, None
+        else:
+            pending[custom_id] = prompt
+    if not pending:
+        return
+
+    client = client or get_claude_client()
+    if batch_id is None:
+        batch_id = submit_message_batch(pending, model, max_tokens, temperature, client=client)
+        if on_submit:
+            on_submit(batch_id)
+    wait_for_message_batch(batch_id, poll_seconds, timeout, client=client, on_poll=on_poll)
 
-    return message.content[0].text
+    for custom_id, text, error, usage in _batch_results(batch_id, client=client):
+        if custom_id not in pending:
+            continue
+        # Wall time of a batch call runs from submission to its result
+        call = CallRecord(template, model, "batch", "miss" if cache is not None else "off")
+        call.start = start
+        call.usage(usage)
+        call.finish(error)
+        if text is not None and cache is not None:
+            cache.put(keys[custom_id], text, {"model": model})
+        yield custom_id, text, error
@@ -0,0 +1,340 @@
+"""
+Inverted index of people mentioned in daily and meeting notes
+
+Maps every email address, wikilink target and known person name or alias
+(from the people index) in dailynote/ and Meetings/ to the notes and
+lines mentioning it, with byte offsets so a mention is read back with one
+seek. The index lives in <vault>/.vault-tools/mention-index.json and is
+updated incrementally: only notes whose size or mtime changed are
+re-read, and names added since the last run are looked for only in the
+notes that contain them.
+
+    python amplifier-tools/utils/mention_index.py [vault] [--query joi@ito.com]
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+STATE_DIR = ".vault-tools"  # Shared with tools/vault_scan.py
+INDEX_NAME = "mention-index.json"
+INDEX_VERSION = 3
+INDEX_FOLDERS = ("dailynote", "Meetings")
+DEFAULT_MENTION_BUDGET = 1500  # Tokens of context per person
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+WIKILINK_RE = re.compile(r"\[\[([^\]|#]+)(?:#[^\]|]*)?(?:\|([^\]]+))?\]\]")
+WORD_RE = re.compile(r"\w[\w'’.-]*")
+MIN_NAME_LENGTH = 3  # Shorter aliases match too much ordinary text
+DATE_RE = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+def default_vault_root() -> Path:
+    daily = os.getenv("DAILY_NOTE_PATH")
+    if daily:
+        return Path(os.path.expanduser(daily)).parent
+    return Path.home() / "switchboard"
+
+
+def normalize_key(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def name_words(text: str) -> List[str]:
+    """Casefolded words of a name or line, without trailing punctuation"""
+    return [word.rstrip(".'’-") for word in WORD_RE.findall(text.casefold())]
+
+
+def name_key(name: str) -> str:
+    return " ".join(name_words(name))
+
+
+def known_names(names: Iterable[str]) -> set:
+    """Keys of the names worth matching ("joichi ito")"""
+    keys = set()
+    for name in names:
+        name = str(name)
+        if "@" not in name:
+            key = name_key(name)
+            if len(key) >= MIN_NAME_LENGTH:
+                keys.add(key)
+    return keys
+
+
+class NameMatcher:
+    """
+    Finds known names in a line by looking up each run of up to
+    ``longest`` words in a set, so the cost doesn't grow with the number
+    of names.
+    """
+
+    def __init__(self, keys: Iterable[str]):
+        self.keys = set(keys)
+        self.longest = max((key.count(" ") + 1 for key in self.keys), default=0)
+        # First words, for skipping whole notes that can't mention a name
+        self.first_words = {key.partition(" ")[0] for key in self.keys}
+
+    def find(self, line: str) -> set:
+        words = name_words(line)
+        found = set()
+        for i in range(len(words)):
+            for n in range(1, min(self.longest, len(words) - i) + 1):
+                key = " ".join(words[i:i + n])
+                if key in self.keys:
+                    found.add(key)
+        return found
+
+
+def line_keys(line: str, names: NameMatcher = None, links: bool = True) -> set:
+    """Index keys for one line of a note"""
+    keys = set()
+    if links:
+        keys.update(match.casefold() for match in EMAIL_RE.findall(line))
+        for target, alias in WIKILINK_RE.findall(line):
+            keys.add(normalize_key(target))
+            if alias:
+                keys.add(normalize_key(alias))
+    if names is not None and names.keys:
+        keys.update(names.find(line))
+    return keys
+
+
+def scan_note(path: Path, names: NameMatcher = None, links: bool = True) -> Dict[str, List[List[int]]]:
+    """Map each key in a note to ``[line number, byte offset]`` pairs"""
+    mentions: Dict[str, List[List[int]]] = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for number, raw in enumerate(f, 1):
+            line = raw.decode("utf-8", errors="replace")
+            for key in line_keys(line, names, links):
+                mentions.setdefault(key, []).append([number, offset])
+            offset += len(raw)
+    return mentions
+
+
+def note_date(rel: str, mtime_ns: int) -> str:
+    """Date a note is about: from its name (2025-03-01.md) or else its mtime"""
+    match = DATE_RE.search(rel.rpartition("/")[2])
+    if match:
+        return match.group(1)
+    return time.strftime("%Y-%m-%d", time.localtime(mtime_ns / 1e9))
+
+
+class MentionIndex:
+    """
+    ``files`` maps each indexed note to its mtime, size, date and keys;
+    ``postings`` maps each key to ``{note: [[line, offset], ...]}``.
+    ``budget`` is the default token budget of ``recent_mentions``;
+    ``names`` are the person names and aliases looked for besides emails
+    and wikilinks. Names are only ever added: the ones new since the last
+    save are looked for in unchanged notes on the next ``refresh``.
+    """
+
+    def __init__(self, root: Path | str = None, folders: Iterable[str] = INDEX_FOLDERS,
+                 budget: int = DEFAULT_MENTION_BUDGET, names: Iterable[str] = ()):
+        self.root = Path(root) if root else default_vault_root()
+        self.folders = tuple(folders)
+        self.budget = budget
+        self.names = known_names(names)
+        self.new_names = set(self.names)
+        self.path = self.root / STATE_DIR / INDEX_NAME
+        self.files: Dict[str, dict] = {}
+        self.postings: Dict[str, Dict[str, List[List[int]]]] = {}
+        self.dirty = False
+
+    def load(self) -> "MentionIndex":
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == INDEX_VERSION and data.get("folders") == list(self.folders):
+            self.files = data["files"]
+            self.postings = data["postings"]
+            indexed = set(data["names"])
+            self.new_names = self.names - indexed
+            self.names |= indexed
+        return self
+
+    def save(self) -> None:
+        if not self.dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.{os.getpid()}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "folders": list(self.folders), "names": sorted(self.names),
+                       "files": self.files, "postings": self.postings},
+                      f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+    def _walk(self):
+        for folder in self.folders:
+            stack = [self.root / folder]
+            while stack:
+                try:
+                    entries = list(os.scandir(stack.pop()))
+                except OSError:
+                    continue
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if not entry.name.startswith("."):
+                            stack.append(Path(entry.path))
+                    elif entry.name.endswith(".md"):
+                        yield Path(entry.path).relative_to(self.root).as_posix(), entry.stat()
+
+    def _remove(self, rel: str) -> None:
+        record = self.files.pop(rel, None)
+        if record is None:
+            return
+        for key in record["keys"]:
+            notes = self.postings.get(key)
+            if notes is not None:
+                notes.pop(rel, None)
+                if not notes:
+                    del self.postings[key]
+        self.dirty = True
+
+    def _add(self, rel: str, st) -> None:
+        try:
+            mentions = scan_note(self.root / rel, NameMatcher(self.names))
+        except OSError:
+            return
+        self.files[rel] = {"mtime_ns": st.st_mtime_ns, "size": st.st_size,
+                           "date": note_date(rel, st.st_mtime_ns), "keys": sorted(mentions)}
+        for key, lines in mentions.items():
+            self.postings.setdefault(key, {})[rel] = lines
+        self.dirty = True
+
+    def update(self, rel: str) -> None:
+        """Re-index one note (or drop it if it no longer exists)"""
+        self._remove(rel)
+        try:
+            st = os.stat(self.root / rel)
+        except OSError:
+            return
+        self._add(rel, st)
+
+    def _add_names(self, rel: str, names: NameMatcher) -> None:
+        """Index only ``names`` in an already indexed note"""
+        path = self.root / rel
+        try:
+            text = path.read_bytes().decode("utf-8", errors="replace").casefold()
+            if not any(word in text for word in names.first_words):
+                return
+            mentions = scan_note(path, names, False)
+        except OSError:
+            return
+        record = self.files[rel]
+        record["keys"] = sorted(set(record["keys"]).union(mentions))
+        for key, lines in mentions.items():
+            notes = self.postings.setdefault(key, {})
+            # A name can also be a wikilink target already indexed here
+            merged = {tuple(line) for line in notes.get(rel, [])}.union(map(tuple, lines))
+            notes[rel] = [list(line) for line in sorted(merged)]
+        self.dirty = True
+
+    def refresh(self) -> "MentionIndex":
+        """Bring the index up to date, re-reading only notes that changed"""
+        seen = set()
+        unchanged = []
+        for rel, st in self._walk():
+            seen.add(rel)
+            record = self.files.get(rel)
+            if record and record["mtime_ns"] == st.st_mtime_ns and record["size"] == st.st_size:
+                unchanged.append(rel)
+                continue
+            self._remove(rel)
+            self._add(rel, st)
+        for rel in [rel for rel in self.files if rel not in seen]:
+            self._remove(rel)
+        if self.new_names:
+            names = NameMatcher(self.new_names)
+            for rel in unchanged:
+                self._add_names(rel, names)
+            self.new_names = set()
+            self.dirty = True
+        return self
+
+    def lookup(self, keys: Iterable[str]) -> Dict[str, List[int]]:
+        """Notes mentioning any of ``keys``, as ``{note: [byte offsets]}``"""
+        found: Dict[str, set] = {}
+        for key in {variant for key in keys for variant in (normalize_key(key), name_key(key))}:
+            for rel, lines in self.postings.get(key, {}).items():
+                found.setdefault(rel, set()).update(offset for _, offset in lines)
+        return {rel: sorted(offsets) for rel, offsets in found.items()}
+
+    def recent_mentions(self, keys: Iterable[str], budget_tokens: int = None,
+                        max_line_chars: int = 400) -> List[dict]:
+        """
+        Most recent mention lines first, until ``budget_tokens`` (~4
+        characters each) is spent. Returns dicts with date, note, line.
+        """
+        found = self.lookup(keys)
+        budget = (self.budget if budget_tokens is None else budget_tokens) * 4
+        mentions = []
+        for rel in sorted(found, key=lambda rel: (self.files[rel]["date"], rel), reverse=True):
+            try:
+                f = open(self.root / rel, "rb")
+            except OSError:
+                continue
+            with f:
+                for offset in found[rel]:
+                    f.seek(offset)
+                    line = f.readline().decode("utf-8", errors="replace").strip()
+                    line = line[:max_line_chars]
+                    cost = len(line) + len(rel) + 16
+                    if cost > budget:
+                        return mentions
+                    budget -= cost
+                    mentions.append({"date": self.files[rel]["date"], "note": rel, "line": line})
+        return mentions
+
+
+def format_mentions(mentions: List[dict]) -> str:
+    return "\n".join(f"- {m['date']} ({m['note']}): {m['line']}" for m in mentions)
+
+
+def load_mention_index(root: Path | str = None, budget: int = DEFAULT_MENTION_BUDGET,
+                       names: Iterable[str] = ()) -> MentionIndex:
+    """Load, refresh and save the index for a vault"""
+    index = MentionIndex(root, budget=budget, names=names).load().refresh()
+    index.save()
+    return index
+
+
+def main():
+    import argparse
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    from utils.people_index import load_people_index
+
+    parser = argparse.ArgumentParser(description="Build or query the people mention index")
+    parser.add_argument("vault", nargs="?", help=f"Vault root (default: {default_vault_root()})")
+    parser.add_argument("--people-dir", help="Person pages whose names are indexed (default: <vault>/people)")
+    parser.add_argument("--query", action="append", help="Email or name to look up (repeatable)")
+    parser.add_argument("--budget", type=int, default=DEFAULT_MENTION_BUDGET,
+                        help=f"Token budget for --query output (default: {DEFAULT_MENTION_BUDGET})")
+    args = parser.parse_args()
+
+    vault = Path(args.vault) if args.vault else default_vault_root()
+    people = load_people_index(vault, args.people_dir or vault / "people")
+
+    start = time.perf_counter()
+    index = load_mention_index(vault, names=people.names())
+    print(f"📇 {len(index.files)} notes, {len(index.postings)} keys "
+          f"({(time.perf_counter() - start) * 1000:.0f}ms) → {index.path}")
+
+    if args.query:
+        start = time.perf_counter()
+        mentions = index.recent_mentions(args.query, args.budget)
+        print(f"🔍 {len(mentions)} mentions ({(time.perf_counter() - start) * 1000:.1f}ms)")
+        print(format_mentions(mentions))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Merged index of known people, for finding an existing page before generating one
+
+Built once from the vault's people.index.json (written by
+tools/buildPeopleIndex.js), the repo's config/people.json and the
+frontmatter of pages in the people directory. Every normalized email,
+name and alias maps to one person, so a lookup is a dict access however
+large the vault is.
+
+Names shared by different people (e.g. "Chris Anderson" for both
+"Chris Anderson (TED)" and "Chris Anderson (Wired)", or two entries with
+the same name and different emails) are dropped as ambiguous; emails and
+pages always identify a person.
+"""
+
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+PEOPLE_INDEX_NAME = "people.index.json"
+PEOPLE_CONFIG = Path(__file__).parent.parent.parent / "config" / "people.json"
+
+QUALIFIED_NAME_RE = re.compile(r"^(.+?)\s*(?:\(([^)]+)\)|\s-\s(.+))\s*$")
+FRONTMATTER_KEY_RE = re.compile(r"^([A-Za-z0-9_-]+):\s*(.*)$")
+FRONTMATTER_ITEM_RE = re.compile(r"^\s*-\s+(.+)$")
+
+
+def normalize_key(text: str) -> str:
+    return " ".join(str(text).split()).casefold()
+
+
+def name_variants(name: str) -> List[str]:
+    """A name plus its unqualified form: "Chris Anderson (TED)" → "Chris Anderson" """
+    match = QUALIFIED_NAME_RE.match(name)
+    return [name, match.group(1)] if match else [name]
+
+
+def as_list(value) -> List[str]:
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    if isinstance(value, list):
+        return [str(v) for v in value if str(v).strip()]
+    return []
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def read_frontmatter(path: Path) -> dict:
+    """
+    Top-level scalars and lists from a page's YAML frontmatter, reading
+    no further than its closing ``---``. Enough for name, email(s) and
+    aliases; nested mappings are skipped.
+    """
+    fields = {}
+    key = None
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        if f.readline().strip() != "---":
+            return fields
+        for line in f:
+            line = line.rstrip("\r\n")
+            if line.strip() == "---":
+                break
+            item = FRONTMATTER_ITEM_RE.match(line)
+            if item and key:
+                if not isinstance(fields.get(key), list):
+                    fields[key] = []
+                fields[key].append(_unquote(item.group(1)))
+                continue
+            match = FRONTMATTER_KEY_RE.match(line)
+            if not match:
+                continue
+            key, value = match.group(1), match.group(2).strip()
+            if value.startswith("[") and value.endswith("]"):
+                fields[key] = [_unquote(v) for v in value[1:-1].split(",") if v.strip()]
+            elif value:
+                fields[key] = _unquote(value)
+    return fields
+
+
+class PeopleIndex:
+    """
+    ``people`` holds one dict per person (name, emails, aliases, path);
+    ``keys`` maps each normalized email, name and alias to its person.
+    ``path`` is the person's existing page, or None if only known from
+    config; ``paths`` maps each page back to its person.
+    """
+
+    def __init__(self):
+        self.people: List[dict] = []
+        self.keys: Dict[str, dict] = {}
+        self.paths: Dict[Path, dict] = {}
+        self.ambiguous = set()
+
+    def __len__(self):
+        return len(self.people)
+
+    def find(self, emails: Iterable[str] = (), names: Iterable[str] = ()) -> Optional[dict]:
+        """The person with any of ``emails``, else with any of ``names``"""
+        for key in list(emails) + list(names):
+            person = self.keys.get(normalize_key(key)) if key else None
+            if person is not None:
+                return person
+        return None
+
+    def names(self) -> List[str]:
+        """Every name and alias, for finding mentions in notes"""
+        return [name for person in self.people for name in [person["name"]] + person["aliases"]]
+
+    def match(self, emails: Iterable[str], name: str, path: Path = None) -> Optional[dict]:
+        """
+        The person with any of ``emails``, else the one with page ``path``,
+        else the one called ``name`` unless both sides have emails
+        """
+        emails = [email for email in emails if email]
+        person = self.find(emails) if emails else None
+        if person is None and path is not None:
+            person = self.paths.get(Path(path))
+        if person is None:
+            person = self.find(names=[name])
+            if person is not None and emails and person["emails"]:
+                return None
+        return person
+
+    def add(self, name: str, emails: Iterable[str] = (), aliases: Iterable[str] = (),
+            path: Path = None) -> dict:
+        """
+        Add a person, merging into an existing one with the same email or
+        page. A shared name only merges when one side has no emails, since
+        different people can share a display name.
+        """
+        emails = [normalize_key(email) for email in emails if email]
+        names = [name] + [alias for alias in aliases if alias]
+        path = Path(path) if path is not None else None
+        person = self.match(emails, name, path)
+        if person is None:
+            person = {"name": name, "emails": [], "aliases": [], "path": None}
+            self.people.append(person)
+        if person["path"] is None and path is not None:
+            person["path"] = path
+            self.paths.setdefault(path, person)
+        for email in emails:
+            if email not in person["emails"]:
+                person["emails"].append(email)
+            self.keys[email] = person
+        for alias in names:
+            for variant in name_variants(alias):
+                if variant != person["name"] and variant not in person["aliases"]:
+                    person["aliases"].append(variant)
+                self._add_name(normalize_key(variant), person)
+        return person
+
+    def _add_name(self, key: str, person: dict) -> None:
+        if key in self.ambiguous:
+            return
+        other = self.keys.get(key)
+        if other is not None and other is not person:
+            del self.keys[key]
+            self.ambiguous.add(key)
+        else:
+            self.keys[key] = person
+
+    def load_index_json(self, path: Path) -> None:
+        """people.index.json: name → {name, pagePath, aliases, emails}; pagePath is vault-relative"""
+        for name, entry in _read_json(path).items():
+            if isinstance(entry, dict):
+                page = entry.get("pagePath")
+                self.add(entry.get("name") or name, as_list(entry.get("emails")),
+                         as_list(entry.get("aliases")), path.parent / page if page else None)
+
+    def load_config(self, path: Path, vault: Path = None) -> None:
+        """config/people.json: name → {qualifier, emails} or name → [emails]"""
+        for name, entry in _read_json(path).items():
+            if isinstance(entry, list):
+                entry = {"emails": entry}
+            if not isinstance(entry, dict):
+                continue
+            page = vault / f"{name}.md" if vault else None
+            self.add(name, as_list(entry.get("emails")) + as_list(entry.get("email")),
+                     path=page if page and page.exists() else None)
+
+    def load_pages(self, folder: Path) -> None:
+        """Frontmatter of the person pages directly in ``folder``"""
+        try:
+            pages = sorted(folder.glob("*.md"))
+        except OSError:
+            return
+        for page in pages:
+            try:
+                fields = read_frontmatter(page)
+            except OSError:
+                continue
+            emails = as_list(fields.get("emails")) + as_list(fields.get("email"))
+            tags = as_list(fields.get("tags"))
+            if not emails and fields.get("type") != "person" and "person" not in tags and "people" not in tags:
+                continue
+            name = fields.get("name") if isinstance(fields.get("name"), str) else page.stem
+            self.add(name, emails, as_list(fields.get("aliases")) + [page.stem], page)
+
+
+def _read_json(path: Path) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def load_people_index(vault: Path | str, people_dir: Path | str = None,
+                      config: Path | str = PEOPLE_CONFIG) -> PeopleIndex:
+    """Merge people.index.json, config/people.json and person page frontmatter"""
+    vault = Path(vault)
+    index = PeopleIndex()
+    index.load_index_json(vault / PEOPLE_INDEX_NAME)
+    if people_dir is not None:
+        index.load_pages(Path(people_dir))
+    if config:
+        index.load_config(Path(config), vault)
+    return index
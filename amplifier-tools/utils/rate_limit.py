@@ -0,0 +1,394 @@
+"""Shared rate limiting for Claude calls: token buckets, backoff and adaptive concurrency"""
+
+import asyncio
+import collections
+import contextlib
+import email.utils
+import os
+import random
+import threading
+import time
+from typing import Any, AsyncContextManager, AsyncIterator, Awaitable, Callable, ContextManager, Iterator, Optional, TypeVar
+
+from anthropic import APIConnectionError, APIStatusError
+
+T = TypeVar("T")
+
+# Budgets, overridable with CLAUDE_RPM, CLAUDE_TPM, CLAUDE_MAX_CONCURRENCY
+# and CLAUDE_MAX_RETRIES (0 turns a budget off)
+DEFAULT_RPM = 50
+DEFAULT_TPM = 80_000
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_MAX_RETRIES = 5
+BASE_DELAY = 1.0
+MAX_DELAY = 60.0
+
+# Statuses that mean "slow down" rather than "something broke"
+THROTTLE_STATUSES = (429, 503, 529)
+
+
+class TokenBucket:
+    """
+    Token bucket refilled at ``per_minute`` tokens a minute, holding at most
+    a minute's worth.
+
+    ``reserve`` takes tokens immediately, letting the balance go negative,
+    and returns how long the caller must wait before using them. Callers
+    then sleep however suits them (``time.sleep`` or ``asyncio.sleep``), so
+    one bucket serves sync and async code alike.
+    """
+
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float = 1.0) -> float:
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            # A request larger than the bucket waits for a full bucket
+            self.tokens -= min(amount, self.capacity)
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return over-estimated tokens once the real usage is known"""
+        with self.lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class AdaptiveConcurrency:
+    """
+    Concurrency limit that halves when the API throttles and grows by one
+    after a limit's worth of consecutive successes (AIMD).
+
+    Threads and coroutines wait in one FIFO queue and are woken as slots
+    free up. Each async waiter is a future on its own event loop, so one
+    limiter is safe across loops and threads.
+    """
+
+    def __init__(self, maximum: int, minimum: int = 1):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.limit = self.maximum
+        self.in_flight = 0
+        self.successes = 0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+        self.waiters = collections.deque()
+
+    def try_acquire(self) -> bool:
+        with self.lock:
+            if self.in_flight >= self.limit:
+                return False
+            self.in_flight += 1
+            return True
+
+    def acquire_sync(self) -> None:
+        """Block the calling thread until a slot is free"""
+        while True:
+            with self.lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                event = threading.Event()
+                self.waiters.append(event)
+            event.wait()
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            with self.lock:
+                if self.in_flight < self.limit:
+                    self.in_flight += 1
+                    return
+                future = loop.create_future()
+                self.waiters.append((loop, future))
+            try:
+                await future
+            except asyncio.CancelledError:
+                with self.lock:
+                    try:
+                        self.waiters.remove((loop, future))
+                    except ValueError:
+                        self._wake()  # Already woken: pass the wakeup on
+                raise
+
+    def release(self) -> None:
+        with self.lock:
+            self.in_flight -= 1
+            self._wake()
+
+    def _wake(self) -> None:
+        # Called with the lock held: wake one waiter per free slot. A woken
+        # waiter re-checks the limit, so a spurious wakeup only re-queues it
+        free = self.limit - self.in_flight
+        while free > 0 and self.waiters:
+            waiter = self.waiters.popleft()
+            if isinstance(waiter, threading.Event):
+                waiter.set()
+            else:
+                loop, future = waiter
+                try:
+                    loop.call_soon_threadsafe(_set_done, future)
+                except RuntimeError:
+                    continue  # Its loop is closed
+            free -= 1
+
+    def on_success(self) -> None:
+        with self.lock:
+            self.successes += 1
+            if self.successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self.successes = 0
+                self._wake()
+
+    def on_throttle(self) -> None:
+        with self.lock:
+            self.successes = 0
+            now = time.monotonic()
+            # Requests already in flight fail together; count them as one signal
+            if now - self.last_decrease >= BASE_DELAY:
+                self.limit = max(self.minimum, self.limit // 2)
+                self.last_decrease = now
+
+
+def _set_done(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+def retry_after(error: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait (retry-after-ms or retry-after), if any"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    value = headers.get("retry-after")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    parsed = email.utils.parsedate_tz(value) if value else None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time()) if parsed else None
+
+
+def is_retryable(error: BaseException) -> bool:
+    if isinstance(error, APIConnectionError):
+        return True
+    if isinstance(error, APIStatusError):
+        return error.status_code in (408, 409) or error.status_code in THROTTLE_STATUSES \
+            or error.status_code >= 500
+    return False
+
+
+def is_throttle(error: BaseException) -> bool:
+    return isinstance(error, APIStatusError) and error.status_code in THROTTLE_STATUSES
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Tokens a request may use: ~4 characters per input token plus the output cap"""
+    return len(prompt) // 4 + max_tokens
+
+
+class Scheduler:
+    """
+    Shared gate for Claude calls.
+
+    Every attempt first takes a request and an estimated number of tokens
+    from the per-minute buckets. Retryable failures back off with full
+    jitter (or exactly as long as ``retry-after`` says), and a throttled
+    response pauses every caller, not just the one that hit it. A slot of
+    the adaptive concurrency limit is taken only once an attempt is
+    admitted and given back before any backoff; streams hold theirs until
+    they are closed.
+    """
+
+    def __init__(self, rpm: float = DEFAULT_RPM, tpm: float = DEFAULT_TPM,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, max_retries: int = DEFAULT_MAX_RETRIES,
+                 base_delay: float = BASE_DELAY, max_delay: float = MAX_DELAY):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _admission_delay(self, tokens: int) -> float:
+        """Reserve budget for one attempt; returns how long to wait first"""
+        delays = [self.paused_until - time.monotonic()]
+        if self.requests:
+            delays.append(self.requests.reserve(1))
+        if self.tokens and tokens:
+            delays.append(self.tokens.reserve(tokens))
+        return max(0.0, *delays)
+
+    def backoff(self, attempt: int, error: BaseException) -> float:
+        """Delay before retry number ``attempt`` (1-based)"""
+        delay = retry_after(error)
+        if delay is None:
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+        if is_throttle(error):
+            with self.lock:
+                self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self.concurrency.on_throttle()
+        return delay
+
+    def settle(self, estimated: int, used: Optional[int]) -> None:
+        """Refund the part of a token reservation the call did not use"""
+        if self.tokens and used is not None and used < estimated:
+            self.tokens.refund(estimated - used)
+
+    def call(self, fn: Callable[[], T], tokens: int = 0,
+             on_retry: Callable[[int, BaseException], None] = None) -> T:
+        """Run ``fn`` within the budgets, retrying retryable errors"""
+        attempt = 0
+        while True:
+            time.sleep(self._admission_delay(tokens))
+            self.concurrency.acquire_sync()
+            try:
+                result = fn()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e)
+            else:
+                self.concurrency.on_success()
+                return result
+            finally:
+                self.concurrency.release()
+            time.sleep(delay)
+
+    async def call_async(self, fn: Callable[[], Awaitable[T]], tokens: int = 0,
+                         on_retry: Callable[[int, BaseException], None] = None) -> T:
+        """Async version of ``call``"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admission_delay(tokens))
+            await self.concurrency.acquire()
+            try:
+                result = await fn()
+            except Exception as e:
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e)
+            else:
+                self.concurrency.on_success()
+                return result
+            finally:
+                self.concurrency.release()
+            await asyncio.sleep(delay)
+
+    @contextlib.contextmanager
+    def stream(self, open_stream: Callable[[], ContextManager[T]], tokens: int = 0,
+               on_retry: Callable[[int, BaseException], None] = None) -> Iterator[T]:
+        """
+        Enter the context manager ``open_stream()`` returns, retrying like
+        ``call``, and hold the concurrency slot until it is exited. Only
+        opening is retried; errors while streaming propagate.
+        """
+        attempt = 0
+        while True:
+            time.sleep(self._admission_delay(tokens))
+            self.concurrency.acquire_sync()
+            try:
+                manager = open_stream()
+                stream = manager.__enter__()
+            except Exception as e:
+                self.concurrency.release()
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e)
+                time.sleep(delay)
+                continue
+            except BaseException:
+                self.concurrency.release()
+                raise
+            break
+        self.concurrency.on_success()
+        try:
+            with contextlib.ExitStack() as stack:
+                stack.push(manager)
+                yield stream
+        finally:
+            self.concurrency.release()
+
+    @contextlib.asynccontextmanager
+    async def stream_async(self, open_stream: Callable[[], AsyncContextManager[T]], tokens: int = 0,
+                           on_retry: Callable[[int, BaseException], None] = None) -> AsyncIterator[T]:
+        """Async version of ``stream``"""
+        attempt = 0
+        while True:
+            await asyncio.sleep(self._admission_delay(tokens))
+            await self.concurrency.acquire()
+            try:
+                manager = open_stream()
+                stream = await manager.__aenter__()
+            except Exception as e:
+                self.concurrency.release()
+                attempt += 1
+                if attempt > self.max_retries or not is_retryable(e):
+                    raise
+                delay = self.backoff(attempt, e)
+                if on_retry:
+                    on_retry(attempt, e)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                self.concurrency.release()
+                raise
+            break
+        self.concurrency.on_success()
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                stack.push_async_exit(manager)
+                yield stream
+        finally:
+            self.concurrency.release()
+
+
+_default_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> Scheduler:
+    """The process-wide scheduler, configured from the environment on first use"""
+    global _default_scheduler
+    with _scheduler_lock:
+        if _default_scheduler is None:
+            _default_scheduler = Scheduler(
+                rpm=float(os.getenv("CLAUDE_RPM", DEFAULT_RPM)),
+                tpm=float(os.getenv("CLAUDE_TPM", DEFAULT_TPM)),
+                max_concurrency=int(os.getenv("CLAUDE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY)),
+                max_retries=int(os.getenv("CLAUDE_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+        return _default_scheduler
+
+
+def set_scheduler(scheduler: Optional[Scheduler]) -> None:
+    """Replace the shared scheduler (None rebuilds it from the environment on next use)"""
+    global _default_scheduler
+    with _scheduler_lock:
+        _default_scheduler = scheduler
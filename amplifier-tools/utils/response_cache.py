@@ -0,0 +1,132 @@
+"""On-disk cache of Claude responses, keyed by the request that produced them"""
+
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "obs-dailynotes" / "claude"
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600
+
+
+def cache_key(params: Dict[str, Any]) -> str:
+    """Content address of a request: a hash of prompt, model and sampling settings"""
+    canonical = json.dumps(params, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    Size-bounded LRU cache of response texts, one JSON file per entry.
+
+    A hit refreshes the entry's mtime, so evicting the oldest mtimes first
+    drops the least recently used entries. Entries older than ``ttl``
+    seconds are treated as misses and removed.
+    """
+
+    def __init__(self, directory: Path | str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES, ttl: float = DEFAULT_TTL_SECONDS):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._size = None  # Total bytes on disk, scanned on first write
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if time.time() - entry.get("created", 0) > self.ttl:
+            self._remove(path)
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry["text"]
+
+    def put(self, key: str, text: str, meta: Dict[str, Any] = None) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps({"created": time.time(), "text": text, **(meta or {})},
+                          ensure_ascii=False).encode("utf-8")
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        tmp.write_bytes(data)
+        old_size = path.stat().st_size if path.exists() else 0
+        os.replace(tmp, path)
+
+        if self._size is None:
+            self._size = self._scan_size()
+        else:
+            self._size += len(data) - old_size
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def _entries(self):
+        for path in self.directory.glob("*/*.json"):
+            try:
+                yield path, path.stat()
+            except OSError:
+                continue
+
+    def _scan_size(self) -> int:
+        return sum(st.st_size for _, st in self._entries())
+
+    def _remove(self, path: Path) -> None:
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except OSError:
+            return
+        if self._size is not None:
+            self._size -= size
+
+    def evict(self) -> int:
+        """Drop least recently used entries until the cache fits; returns how many"""
+        entries = sorted(self._entries(), key=lambda item: item[1].st_mtime)
+        self._size = sum(st.st_size for _, st in entries)
+        removed = 0
+        for path, st in entries:
+            if self._size <= self.max_bytes:
+                break
+            self._remove(path)
+            removed += 1
+        return removed
+
+    def clear(self) -> None:
+        for path, _ in list(self._entries()):
+            self._remove(path)
+        self._size = 0
+
+
+_default_cache = None
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """
+    The shared cache, configured from the environment, or None when disabled.
+
+    CLAUDE_CACHE=0 disables it; CLAUDE_CACHE_DIR, CLAUDE_CACHE_MAX_MB and
+    CLAUDE_CACHE_TTL_DAYS override the defaults.
+    """
+    global _default_cache
+    if os.getenv("CLAUDE_CACHE", "1").lower() in ("0", "false", "no", "off"):
+        return None
+    directory = Path(os.getenv("CLAUDE_CACHE_DIR") or DEFAULT_CACHE_DIR)
+    if _default_cache is None or _default_cache.directory != directory:
+        max_mb = os.getenv("CLAUDE_CACHE_MAX_MB")
+        ttl_days = os.getenv("CLAUDE_CACHE_TTL_DAYS")
+        _default_cache = ResponseCache(
+            directory,
+            max_bytes=int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+            ttl=float(ttl_days) * 24 * 3600 if ttl_days else DEFAULT_TTL_SECONDS,
+        )
+    return _default_cache
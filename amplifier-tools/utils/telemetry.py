@@ -0,0 +1,157 @@
+"""Per-call telemetry for Claude requests, appended to a JSONL log"""
+
+import json
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+DEFAULT_TELEMETRY_PATH = Path.home() / ".cache" / "obs-dailynotes" / "claude-calls.jsonl"
+
+_write_lock = threading.Lock()
+
+
+def telemetry_path() -> Optional[Path]:
+    """
+    Where calls are logged, or None when telemetry is off.
+
+    CLAUDE_TELEMETRY=0 turns it off; any other value is used as the path.
+    """
+    setting = os.getenv("CLAUDE_TELEMETRY", "")
+    if setting.lower() in ("0", "false", "no", "off"):
+        return None
+    return Path(setting) if setting and setting != "1" else DEFAULT_TELEMETRY_PATH
+
+
+def record_call(entry: Dict[str, Any], path: Path = None) -> None:
+    """Append one call to the log (one line per write, so concurrent appends don't interleave)"""
+    path = path or telemetry_path()
+    if path is None:
+        return
+    line = json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n"
+    with _write_lock:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+
+
+def _retries_taken(response) -> int:
+    """Retries the SDK made for a raw API response or an httpx response"""
+    taken = getattr(response, "retries_taken", None)
+    if isinstance(taken, int):
+        return taken
+    # Otherwise the SDK numbers its attempts in a request header
+    request = getattr(response, "http_request", None) or getattr(response, "request", None)
+    try:
+        return int(request.headers.get("x-stainless-retry-count", 0))
+    except (AttributeError, ValueError):
+        return 0
+
+
+class CallRecord:
+    """
+    Timing and usage of one Claude call, logged by ``finish``.
+
+    Fields: ts, template, model, mode (sync, async, stream or batch),
+    cache (hit, miss or off), input_tokens, output_tokens, wall_ms,
+    ttfb_ms (streams only), retries, status (ok or error) and error.
+    """
+
+    def __init__(self, template: str, model: str, mode: str, cache: str = "off"):
+        self.start = time.perf_counter()
+        self.entry = {
+            "ts": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "template": template,
+            "model": model,
+            "mode": mode,
+            "cache": cache,
+            "input_tokens": 0,
+            "output_tokens": 0,
+            "retries": 0,
+        }
+
+    def first_text(self) -> None:
+        if "ttfb_ms" not in self.entry:
+            self.entry["ttfb_ms"] = round((time.perf_counter() - self.start) * 1000, 1)
+
+    def retried(self, attempt: int = None, error: BaseException = None) -> None:
+        self.entry["retries"] += 1
+
+    def response(self, response) -> None:
+        self.entry["retries"] += _retries_taken(response)
+
+    def usage(self, usage) -> None:
+        if usage is not None:
+            self.entry["input_tokens"] = getattr(usage, "input_tokens", 0) or 0
+            self.entry["output_tokens"] = getattr(usage, "output_tokens", 0) or 0
+
+    def tokens_used(self) -> int:
+        return self.entry["input_tokens"] + self.entry["output_tokens"]
+
+    def finish(self, error: BaseException | str = None) -> None:
+        self.entry["wall_ms"] = round((time.perf_counter() - self.start) * 1000, 1)
+        self.entry["status"] = "ok" if error is None else "error"
+        if error is not None:
+            self.entry["error"] = error if isinstance(error, str) else type(error).__name__
+        try:
+            record_call(self.entry)
+        except OSError:
+            pass  # Telemetry must never break a call
+
+
+def load_calls(path: Path = None, since: datetime = None) -> List[Dict[str, Any]]:
+    """Read logged calls, skipping lines that don't parse (e.g. a torn last write)"""
+    path = path or telemetry_path() or DEFAULT_TELEMETRY_PATH
+    calls = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    call = json.loads(line)
+                except ValueError:
+                    continue
+                if since is not None and datetime.fromisoformat(call["ts"]) < since:
+                    continue
+                calls.append(call)
+    except FileNotFoundError:
+        pass
+    return calls
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of ``values`` (None if empty)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(calls: Iterable[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """
+    Per-template totals: calls, errors, cache hits, retries, tokens and
+    p50/p95 wall time of the calls that reached the API.
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for call in calls:
+        groups.setdefault(call.get("template") or "(prompt)", []).append(call)
+
+    summary = {}
+    for template, group in sorted(groups.items()):
+        api_calls = [c for c in group if c.get("cache") != "hit"]
+        latencies = [c["wall_ms"] for c in api_calls if c.get("status") == "ok" and "wall_ms" in c]
+        ttfbs = [c["ttfb_ms"] for c in api_calls if "ttfb_ms" in c]
+        summary[template] = {
+            "calls": len(group),
+            "errors": sum(1 for c in group if c.get("status") == "error"),
+            "cache_hits": len(group) - len(api_calls),
+            "retries": sum(c.get("retries", 0) for c in group),
+            "input_tokens": sum(c.get("input_tokens", 0) for c in group),
+            "output_tokens": sum(c.get("output_tokens", 0) for c in group),
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "ttfb_p50_ms": percentile(ttfbs, 50),
+        }
+    return summary
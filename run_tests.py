@@ -184,6 +184,7 @@ Please run the following commands in order:
 1. First, check what links are broken:
    ```bash
    python run_tests.py links
+   python tools/link_index.py   # lists unresolved links in the vault
    ```
 
 2. Run the automatic fix scripts:
@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Anthropic API, used by the amplifier-tools tests
+
+The ``claude_stub`` fixture serves the messages and message batches
+endpoints over keep-alive HTTP/1.1 on localhost and points the tools at it
+through ANTHROPIC_BASE_URL.
+"""
+
+import asyncio
+import json
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+class ClaudeStub:
+    """Local stand-in for the Anthropic messages and message batches endpoints"""
+    
+    def __init__(self):
+        self.requests = []
+        self.delay = 0.0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.connections = 0
+        self.batches = {}
+        self.batch_polls = 1  # Polls answered "in_progress" before a batch ends
+        self.chunk_size = 8  # Characters per streamed text delta
+        self.disconnect_after = None  # Streamed deltas sent before dropping the connection
+        self.errors = []  # (status, retry_after) answers for the next message requests
+        self.lock = threading.Lock()
+        self.server = None
+    
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+    
+    def run(self, coro):
+        """asyncio.run, closing the loop's pooled async clients before it ends"""
+        async def main():
+            try:
+                return await coro
+            finally:
+                await sys.modules['utils.claude_helpers'].close_async_claude_clients()
+        return asyncio.run(main())
+    
+    def respond(self, body):
+        """Return (status, payload) for a request body; override in tests"""
+        prompt = body['messages'][0]['content']
+        match = re.search(r'^Name: (.+)$', prompt, re.MULTILINE)
+        name = match.group(1) if match else 'Unknown'
+        if 'fail' in prompt:
+            return 400, {"type": "error", "error": {"type": "invalid_request_error", "message": "bad person"}}
+        text = f"```markdown\n---\ntype: person\n---\n# {name}\n```"
+        if body['messages'][-1]['role'] == 'assistant':
+            # Continue a prefilled reply from where it left off
+            prefill = body['messages'][-1]['content']
+            start = text.find(prefill)
+            text = text[start + len(prefill):] if start >= 0 else text
+        return 200, {
+            "id": f"msg_{len(self.requests)}",
+            "type": "message",
+            "role": "assistant",
+            "model": body['model'],
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": 100, "output_tokens": 20},
+        }
+    
+    def create_batch(self, body):
+        batch_id = f"msgbatch_{len(self.batches)}"
+        self.batches[batch_id] = {"requests": body['requests'], "polls": 0}
+        return self.batch_status(batch_id, poll=False)
+    
+    def batch_status(self, batch_id, poll=True):
+        batch = self.batches[batch_id]
+        ended = batch['polls'] >= self.batch_polls
+        if poll:
+            batch['polls'] += 1
+        count = len(batch['requests'])
+        return {
+            "id": batch_id,
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {"processing": 0 if ended else count, "succeeded": count if ended else 0,
+                               "errored": 0, "canceled": 0, "expired": 0},
+            "created_at": "2025-01-01T00:00:00Z",
+            "expires_at": "2025-01-02T00:00:00Z",
+            "ended_at": "2025-01-01T01:00:00Z" if ended else None,
+            "archived_at": None,
+            "cancel_initiated_at": None,
+            "results_url": f"{self.url}/v1/messages/batches/{batch_id}/results" if ended else None,
+        }
+    
+    def batch_results(self, batch_id):
+        """JSONL results, newest first since the API does not keep request order"""
+        lines = []
+        for request in reversed(self.batches[batch_id]['requests']):
+            status, payload = self.respond(request['params'])
+            if status == 200:
+                result = {"type": "succeeded", "message": payload}
+            else:
+                result = {"type": "errored", "error": payload}
+            lines.append(json.dumps({"custom_id": request['custom_id'], "result": result}))
+        return "\n".join(lines) + "\n"
+
+
+@pytest.fixture
+def claude_stub(monkeypatch, tmp_path):
+    """Serve a fake messages API on localhost for the amplifier tools"""
+    stub = ClaudeStub()
+    
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # Keep-alive, like the real API
+        disable_nagle_algorithm = True
+        
+        def setup(self):
+            super().setup()
+            with stub.lock:
+                stub.connections += 1
+        
+        def send(self, status, payload, content_type='application/json', headers=None):
+            data = (payload if isinstance(payload, str) else json.dumps(payload)).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        
+        def do_GET(self):
+            match = re.match(r'^/v1/messages/batches/([\w-]+)(/results)?$', self.path.split('?')[0])
+            if not match or match.group(1) not in stub.batches:
+                return self.send(404, {"type": "error", "error": {"type": "not_found_error", "message": self.path}})
+            with stub.lock:
+                stub.requests.append({"path": self.path, "body": None, "headers": dict(self.headers)})
+                if match.group(2):
+                    return self.send(200, stub.batch_results(match.group(1)), 'application/binary')
+                return self.send(200, stub.batch_status(match.group(1)))
+        
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+            with stub.lock:
+                stub.requests.append({"path": self.path, "body": body, "headers": dict(self.headers)})
+                if self.path.split('?')[0] == '/v1/messages/batches':
+                    return self.send(200, stub.create_batch(body))
+                if stub.errors:
+                    status, retry_after = stub.errors.pop(0)
+                    kind = 'rate_limit_error' if status == 429 else 'overloaded_error'
+                    headers = {} if retry_after is None else {'retry-after': str(retry_after)}
+                    return self.send(status, {"type": "error", "error": {"type": kind, "message": "slow down"}},
+                                     headers=headers)
+                stub.in_flight += 1
+                stub.max_in_flight = max(stub.max_in_flight, stub.in_flight)
+            try:
+                time.sleep(stub.delay)
+                status, payload = stub.respond(body)
+            finally:
+                with stub.lock:
+                    stub.in_flight -= 1
+            if status == 200 and body.get('stream'):
+                return self.send_stream(payload)
+            self.send(status, payload)
+        
+        def send_stream(self, message):
+            """Server-sent events for a message, one text delta per chunk_size characters"""
+            text = message['content'][0]['text']
+            deltas = [text[i:i + stub.chunk_size] for i in range(0, len(text), stub.chunk_size)]
+            events = [("message_start", {"type": "message_start", "message": {
+                **message, "content": [], "stop_reason": None, "usage": {"input_tokens": 100, "output_tokens": 0}}}),
+                ("content_block_start", {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}})]
+            events += [("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                                "delta": {"type": "text_delta", "text": delta}})
+                       for delta in deltas]
+            events += [("content_block_stop", {"type": "content_block_stop", "index": 0}),
+                       ("message_delta", {"type": "message_delta", "usage": {"output_tokens": 20},
+                                          "delta": {"stop_reason": "end_turn", "stop_sequence": None}}),
+                       ("message_stop", {"type": "message_stop"})]
+            
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            sent = 0
+            for event, data in events:
+                if event == 'content_block_delta':
+                    if stub.disconnect_after is not None and sent >= stub.disconnect_after:
+                        self.close_connection = True
+                        return  # Drop mid-stream, without the terminating chunk
+                    sent += 1
+                chunk = f"event: {event}\ndata: {json.dumps(data)}\n\n".encode('utf-8')
+                self.wfile.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+                self.wfile.flush()
+            self.wfile.write(b"0\r\n\r\n")
+        
+        def log_message(self, *args):
+            pass
+    
+    stub.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=stub.server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv('ANTHROPIC_API_KEY', 'test-key')
+    monkeypatch.setenv('ANTHROPIC_BASE_URL', stub.url)
+    monkeypatch.setenv('CLAUDE_CACHE_DIR', str(tmp_path / 'claude-cache'))
+    monkeypatch.setenv('CLAUDE_TELEMETRY', str(tmp_path / 'claude-calls.jsonl'))
+    # Fresh rate limit budgets for every test
+    rate_limit = sys.modules.get('utils.rate_limit')
+    if rate_limit:
+        rate_limit.set_scheduler(None)
+    yield stub
+    stub.server.shutdown()
+    stub.server.server_close()
+    # Pooled clients point at this test's server; drop them with it
+    claude_helpers = sys.modules.get('utils.claude_helpers')
+    if claude_helpers:
+        claude_helpers.close_claude_clients()
+        claude_helpers._async_clients.clear()  # Their event loops are already closed
@@ -0,0 +1,5 @@
+"""
+Fixtures for the unit tests
+"""
+
+from claude_stub import claude_stub  # noqa: F401 (fixture)
@@ -0,0 +1,156 @@
+"""
+Unit tests for the pooled Claude clients
+"""
+
+import asyncio
+from pathlib import Path
+import sys
+
+import pytest
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+from utils.claude_helpers import (
+    ask_claude,
+    ask_claude_async,
+    ask_claude_batch,
+    close_claude_clients,
+    connection_limits,
+    get_async_claude_client,
+    get_claude_client,
+    scheduled,
+    stream_claude,
+    stream_claude_async,
+    submit_message_batch,
+    wait_for_message_batch,
+)
+from utils.rate_limit import Scheduler, set_scheduler
+
+
+class TestClientPool:
+    """Test that calls share clients and their connections"""
+
+    def test_sync_calls_reuse_one_connection(self, claude_stub):
+        assert get_claude_client() is get_claude_client()
+        assert get_claude_client(pooled=False) is not get_claude_client()
+
+        for i in range(5):
+            ask_claude(prompt=f"Name: Person {i}", max_tokens=50, use_cache=False)
+        assert len(claude_stub.requests) == 5
+        assert claude_stub.connections == 1
+
+        close_claude_clients()
+        ask_claude(prompt="Name: Again", max_tokens=50, use_cache=False)
+        assert claude_stub.connections == 2
+        close_claude_clients()
+
+    def test_only_scheduled_calls_skip_sdk_retries(self, claude_stub):
+        client = get_claude_client()
+        assert client.max_retries > 0
+        copy = scheduled(client)
+        assert copy.max_retries == 0
+        assert copy._client is client._client  # Same connection pool
+        close_claude_clients()
+
+    def test_temperature_is_always_sent(self, claude_stub):
+        ask_claude(prompt="Name: Default", max_tokens=50, use_cache=False)
+        ask_claude(prompt="Name: Cold", max_tokens=50, temperature=0.0, use_cache=False)
+        assert [r["body"]["temperature"] for r in claude_stub.requests] == [1.0, 0.0]
+
+    def test_async_clients_are_pooled_per_loop(self, claude_stub):
+        async def run():
+            client = get_async_claude_client()
+            assert get_async_claude_client() is client
+            for i in range(5):
+                await ask_claude_async(prompt=f"Name: Person {i}", max_tokens=50, use_cache=False)
+            await client.close()
+            return client
+
+        first = asyncio.run(run())
+        second = asyncio.run(run())
+        assert first is not second
+        assert claude_stub.connections == 2
+
+    def test_connection_limit_bounds_concurrency(self, claude_stub):
+        claude_stub.delay = 0.1
+        limits = connection_limits(max_connections=2)
+
+        async def run():
+            client = get_async_claude_client(limits=limits)
+            await asyncio.gather(*(
+                ask_claude_async(prompt=f"Name: Person {i}", max_tokens=50, use_cache=False, client=client)
+                for i in range(6)
+            ))
+            await client.close()
+
+        asyncio.run(run())
+        assert claude_stub.max_in_flight == 2
+        assert claude_stub.connections == 2
+
+    def test_limits_from_environment(self, monkeypatch):
+        monkeypatch.setenv("CLAUDE_MAX_CONNECTIONS", "8")
+        monkeypatch.setenv("CLAUDE_MAX_KEEPALIVE", "50")
+        limits = connection_limits()
+        assert limits.max_connections == 8
+        assert limits.max_keepalive_connections == 8
+        assert connection_limits(max_connections=3).max_connections == 3
+
+
+class TestMessageBatches:
+    """Test the Message Batches helpers against the stub"""
+
+    def test_results_by_custom_id(self, claude_stub):
+        prompts = {"a": "Name: Ada", "b": "Name: Bob fail"}
+        results = {cid: (text, error) for cid, text, error in ask_claude_batch(prompts, poll_seconds=0)}
+
+        assert results["a"] == ("```markdown\n---\ntype: person\n---\n# Ada\n```", None)
+        assert results["b"][0] is None and "bad person" in results["b"][1]
+        # The succeeded result was cached; the errored one was not
+        assert len(list(ask_claude_batch({"a": "Name: Ada"}, poll_seconds=0))) == 1
+        assert len([r for r in claude_stub.requests if r["path"] == "/v1/messages/batches"]) == 1
+
+    def test_wait_times_out(self, claude_stub):
+        claude_stub.batch_polls = 100
+        batch_id = submit_message_batch({"a": "Name: Ada"})
+        with pytest.raises(TimeoutError):
+            wait_for_message_batch(batch_id, poll_seconds=0.01, timeout=0.05)
+
+
+class TestStreaming:
+    """Test streamed responses"""
+
+    def test_deltas_then_cached_chunk(self, claude_stub):
+        chunks = list(stream_claude(prompt="Name: Ada", max_tokens=50))
+        assert len(chunks) > 1
+        assert "".join(chunks) == "```markdown\n---\ntype: person\n---\n# Ada\n```"
+        assert list(stream_claude(prompt="Name: Ada", max_tokens=50)) == ["".join(chunks)]
+        assert claude_stub.requests[0]["body"]["stream"] is True
+
+    def test_truncated_stream_raises(self, claude_stub):
+        claude_stub.disconnect_after = 2
+        received = []
+        with pytest.raises(Exception):
+            for text in stream_claude(prompt="Name: Ada", max_tokens=50):
+                received.append(text)
+        assert "".join(received) == "```markdown\n---\n"
+
+    def test_stream_holds_its_slot_until_closed(self, claude_stub):
+        scheduler = Scheduler(max_concurrency=1)
+        set_scheduler(scheduler)
+        in_flight = []
+
+        async def consume(name):
+            async for _ in stream_claude_async(prompt=f"Name: {name}", max_tokens=50, use_cache=False):
+                in_flight.append((name, scheduler.concurrency.in_flight))
+            return name
+
+        async def run():
+            return await asyncio.gather(consume("Ada"), consume("Bob"))
+
+        assert claude_stub.run(run()) == ["Ada", "Bob"]
+        assert all(count == 1 for _, count in in_flight)
+        # The second stream only opened once the first had finished
+        names = [name for name, _ in in_flight]
+        assert names == sorted(names)
+        assert scheduler.concurrency.in_flight == 0
@@ -0,0 +1,115 @@
+"""
+Unit tests for duplicate attachment removal
+"""
+
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+import json
+
+from dedupe_attachments import canonical_key, dedupe_attachments, find_duplicate_groups
+from link_index import build_backlinks, canvas_references
+from vault_scan import VaultManifest
+
+
+def make_vault(vault):
+    images = vault / "Resources" / "Images"
+    (images / "Screenshot 2023-06-06 at 14.02.18.png").write_bytes(b'same')
+    (images / "Screenshot 2023-06-06 at 14.02.18 1.png").write_bytes(b'same')
+    (vault / "Attachments" / "copy.png").write_bytes(b'same')
+    (images / "other.png").write_bytes(b'diff')  # Same size, different content
+    (vault / "dailynote" / "2023-06-06.md").write_text(
+        "![[Screenshot 2023-06-06 at 14.02.18 1.png|400]]\n"
+        "![[Screenshot 2023-06-06 at 14.02.18.png]]\n"
+        "[copy](Attachments/copy.png)\n"
+    )
+    (vault / "dailynote" / "2023-06-07.md").write_text("![[Screenshot 2023-06-06 at 14.02.18.png]]\n")
+    return VaultManifest(vault).load().refresh()
+
+
+class TestDedupe:
+    """Test grouping duplicates and redirecting links"""
+
+    def test_groups_and_canonical_copy(self, temp_vault):
+        manifest = make_vault(temp_vault)
+        refs = {rel: len(notes) for rel, notes in build_backlinks(manifest).items()}
+        assert find_duplicate_groups(manifest, refs=refs) == [[
+            'Resources/Images/Screenshot 2023-06-06 at 14.02.18.png',
+            'Attachments/copy.png',
+            'Resources/Images/Screenshot 2023-06-06 at 14.02.18 1.png',
+        ]]
+        assert canonical_key('a/x.png') < canonical_key('x (1).png')
+        assert canonical_key('b/x copy 2.png') > canonical_key('Pasted image 20230905025353.png')
+        assert find_duplicate_groups(manifest)[0][0] == 'Attachments/copy.png'
+
+    def test_dry_run_changes_nothing(self, temp_vault):
+        manifest = make_vault(temp_vault)
+        assert dedupe_attachments(manifest, dry_run=True) == (2, 0, 0)
+        assert (temp_vault / "Attachments" / "copy.png").exists()
+
+    def test_rewrites_links_and_trashes_copies(self, temp_vault):
+        manifest = make_vault(temp_vault)
+        removed, reclaimed, notes = dedupe_attachments(manifest)
+
+        assert (removed, reclaimed, notes) == (2, 8, 1)
+        assert (temp_vault / "dailynote" / "2023-06-06.md").read_text() == (
+            "![[Screenshot 2023-06-06 at 14.02.18.png|400]]\n"
+            "![[Screenshot 2023-06-06 at 14.02.18.png]]\n"
+            "[copy](Resources/Images/Screenshot 2023-06-06 at 14.02.18.png)\n"
+        )
+        assert not (temp_vault / "Attachments" / "copy.png").exists()
+        assert (temp_vault / ".trash" / "Attachments" / "copy.png").exists()
+        assert 'Attachments/copy.png' not in manifest.entries
+
+    def test_delete(self, temp_vault):
+        manifest = make_vault(temp_vault)
+        dedupe_attachments(manifest, delete=True)
+        assert not (temp_vault / ".trash").exists()
+        assert not (temp_vault / "Resources" / "Images" / "Screenshot 2023-06-06 at 14.02.18 1.png").exists()
+
+    def test_only_attachments_are_deduped(self, temp_vault):
+        for folder in ("Scripts", "Projects", "Config"):
+            (temp_vault / folder).mkdir(exist_ok=True)
+        (temp_vault / "Scripts" / "a.js").write_text("same")
+        (temp_vault / "Scripts" / "b.js").write_text("same")
+        (temp_vault / "Projects" / "Board.canvas").write_text("{}")
+        (temp_vault / "Plan.canvas").write_text("{}")
+        (temp_vault / "Attachments" / "x.json").write_text("same")
+        (temp_vault / "Attachments" / "y.json").write_text("same")
+        (temp_vault / "photo.png").write_bytes(b'same')
+        (temp_vault / "Attachments" / "photo.png").write_bytes(b'same')
+        manifest = VaultManifest(temp_vault).load().refresh()
+
+        assert find_duplicate_groups(manifest) == []
+        assert dedupe_attachments(manifest) == (0, 0, 0)
+
+    def test_canvas_references_count_and_are_rewritten(self, temp_vault):
+        (temp_vault / "Resources" / "Images" / "a.png").write_bytes(b'same')
+        (temp_vault / "Attachments" / "b.png").write_bytes(b'same')
+        canvas = temp_vault / "Board.canvas"
+
+        def show(target):
+            canvas.write_text(json.dumps({"nodes": [
+                {"id": "1", "type": "file", "file": target},
+                {"id": "2", "type": "text", "text": "hi"},
+            ], "edges": []}))
+
+        # A canvas reference alone keeps the deeper copy
+        show("Resources/Images/a.png")
+        manifest = VaultManifest(temp_vault).load().refresh()
+        assert canvas_references(manifest) == {"Board.canvas": {"Resources/Images/a.png"}}
+        assert dedupe_attachments(manifest) == (1, 4, 0)
+        assert (temp_vault / ".trash" / "Attachments" / "b.png").exists()
+        (temp_vault / "Attachments" / "b.png").write_bytes(b'same')
+
+        # Notes outvote the canvas, which is then pointed at the kept copy
+        show("Attachments/b.png")
+        for day in ("01", "02"):
+            (temp_vault / "dailynote" / f"2024-01-{day}.md").write_text("![[Resources/Images/a.png]]\n")
+        manifest = VaultManifest(temp_vault).load().refresh()
+        assert dedupe_attachments(manifest) == (1, 4, 1)
+        assert json.loads(canvas.read_text())["nodes"][0]["file"] == "Resources/Images/a.png"
+        assert not (temp_vault / "Attachments" / "b.png").exists()
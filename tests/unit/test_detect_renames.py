@@ -0,0 +1,72 @@
+"""
+Unit tests for snapshot-based rename detection
+"""
+
+import os
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+import detect_renames
+from detect_renames import detect_moves, move_plan, take_snapshot
+from fix_broken_links import load_move_plan
+
+
+class TestRenameDetection:
+    """Test pairing vanished and appeared files by content"""
+
+    def test_detects_moves_and_renames(self, temp_vault):
+        (temp_vault / "Screenshot 1.png").write_bytes(b'one')
+        (temp_vault / "Attachments" / "scan.pdf").write_bytes(b'two')
+        (temp_vault / "Note.md").write_text("same bytes")
+        (temp_vault / "Kept.png").write_bytes(b'kept')
+        before = take_snapshot(temp_vault, jobs=2)
+
+        os.rename(temp_vault / "Screenshot 1.png", temp_vault / "Resources" / "Images" / "Screenshot 1.png")
+        os.rename(temp_vault / "Attachments" / "scan.pdf", temp_vault / "Resources" / "PDFs" / "Scan 2024.pdf")
+        os.remove(temp_vault / "Note.md")
+        (temp_vault / "Other.md").write_text("different bytes")
+        after = take_snapshot(temp_vault, jobs=2)
+
+        moves, ambiguous = detect_moves(before['files'], after['files'])
+        assert moves == {
+            'Attachments/scan.pdf': 'Resources/PDFs/Scan 2024.pdf',
+            'Screenshot 1.png': 'Resources/Images/Screenshot 1.png',
+        }
+        assert ambiguous == []
+
+        plan = move_plan(moves, before['files'])
+        assert plan['scan.pdf'] == 'Resources/PDFs/Scan 2024.pdf'
+        assert 'Screenshot 1.png' in plan
+
+    def test_identical_files_pair_by_name(self):
+        old = {'a/x.png': [3, 1, 10, 'h'], 'a/y.png': [3, 1, 11, 'h'], 'a/z.png': [3, 1, 12, 'h']}
+        new = {'b/x.png': [3, 1, 10, 'h'], 'b/p.png': [3, 1, 20, 'h'], 'b/q.png': [3, 1, 21, 'h']}
+        moves, ambiguous = detect_moves(old, new)
+        assert moves == {'a/x.png': 'b/x.png'}
+        assert ambiguous == [(['a/y.png', 'a/z.png'], ['b/p.png', 'b/q.png'])]
+
+    def test_hashes_are_cached(self, temp_vault, monkeypatch):
+        (temp_vault / "Attachments" / "big.pdf").write_bytes(b'x' * 100)
+        take_snapshot(temp_vault)
+
+        hashed = []
+        real_hash = detect_renames.hash_file
+        monkeypatch.setattr(detect_renames, 'hash_file', lambda path: hashed.append(path) or real_hash(path))
+        (temp_vault / "Attachments" / "new.pdf").write_bytes(b'y')
+        snapshot = take_snapshot(temp_vault)
+
+        assert [Path(p).name for p in hashed] == ['new.pdf']
+        assert snapshot['files']['Attachments/big.pdf'][3] is not None
+
+    def test_cli_saves_plan(self, temp_vault, capsys):
+        (temp_vault / "a.pdf").write_bytes(b'pdf')
+        detect_renames.main(['--vault', str(temp_vault), 'snapshot', '-o', str(temp_vault / 'snap.json')])
+        os.rename(temp_vault / "a.pdf", temp_vault / "Resources" / "PDFs" / "a.pdf")
+        detect_renames.main(['--vault', str(temp_vault), 'diff', str(temp_vault / 'snap.json')])
+
+        plans = list((temp_vault / ".vault-tools").glob("move-plan-*.json"))
+        assert len(plans) == 1
+        assert load_move_plan(plans[0]) == {'a.pdf': 'Resources/PDFs/a.pdf'}
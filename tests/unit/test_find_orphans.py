@@ -0,0 +1,58 @@
+"""
+Unit tests for orphaned attachment detection
+"""
+
+import json
+import os
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+import find_orphans
+from link_index import build_backlinks
+from vault_scan import VaultManifest
+
+
+class TestOrphans:
+    """Test finding files no note links to"""
+
+    def test_reverse_index_and_orphans(self, temp_vault):
+        (temp_vault / "Resources" / "PDFs" / "linked.pdf").write_bytes(b'pdf')
+        (temp_vault / "Resources" / "PDFs" / "by path.pdf").write_bytes(b'pdf')
+        (temp_vault / "Resources" / "Images" / "orphan.png").write_bytes(b'x' * 10)
+        (temp_vault / "Attachments" / "old.jpg").write_bytes(b'jpg')
+        (temp_vault / "stray.png").write_bytes(b'png')  # Outside the checked folders
+        (temp_vault / "dailynote" / "2025-01-01.md").write_text(
+            "![[linked.pdf#page=3]] [doc](Resources/PDFs/by%20path.pdf) [[Missing]]")
+        (temp_vault / "People" / "Jane.md").write_text("![[linked.pdf|Deck]]")
+
+        week_ago = 1_700_000_000 - 7 * 86400
+        os.utime(temp_vault / "Attachments" / "old.jpg", (week_ago, week_ago))
+
+        manifest = VaultManifest(temp_vault).load().refresh()
+        backlinks = build_backlinks(manifest)
+        assert backlinks['Resources/PDFs/linked.pdf'] == {'dailynote/2025-01-01.md', 'People/Jane.md'}
+        assert backlinks['Resources/PDFs/by path.pdf'] == {'dailynote/2025-01-01.md'}
+
+        orphans = find_orphans.find_orphans(manifest, backlinks=backlinks, now=1_700_000_000)
+        assert [o['path'] for o in orphans] == ['Resources/Images/orphan.png', 'Attachments/old.jpg']
+        assert orphans[0]['size'] == 10
+        assert orphans[1]['age_days'] == 7.0
+
+    def test_canvas_references_count(self, temp_vault):
+        (temp_vault / "Resources" / "Images" / "board.png").write_bytes(b'png')
+        (temp_vault / "Attachments" / "loose.png").write_bytes(b'png')
+        (temp_vault / "Board.canvas").write_text(json.dumps({"nodes": [
+            {"id": "1", "type": "file", "file": "Resources/Images/board.png"},
+            {"id": "2", "type": "text", "text": "Attachments/loose.png"},
+        ]}))
+
+        manifest = VaultManifest(temp_vault).load().refresh()
+        assert [o['path'] for o in find_orphans.find_orphans(manifest)] == ['Attachments/loose.png']
+
+    def test_cli_json(self, temp_vault, capsys):
+        (temp_vault / "Attachments" / "a.png").write_bytes(b'png')
+        find_orphans.main([str(temp_vault), '--json'])
+        assert [o['path'] for o in json.loads(capsys.readouterr().out)] == ['Attachments/a.png']
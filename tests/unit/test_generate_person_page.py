@@ -0,0 +1,203 @@
+"""
+Unit tests for person page generation against a local messages endpoint
+"""
+
+import json
+from pathlib import Path
+import sys
+
+import pytest
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+import generate_person_page as gpp
+
+
+class TestLoadPeople:
+    """Test reading batch files"""
+
+    def test_csv_and_jsonl(self, tmp_path):
+        csv_file = tmp_path / "people.csv"
+        csv_file.write_text("Email,Name,Company\njoi@ito.com,Joichi Ito,DG\njane.doe@example.com,,\n,No Email,\n")
+        jsonl_file = tmp_path / "people.jsonl"
+        jsonl_file.write_text(json.dumps({"email": "a@b.com", "context": "met at TED"}) + "\n\n")
+
+        assert gpp.load_people(csv_file) == [
+            {"email": "joi@ito.com", "name": "Joichi Ito", "company": "DG", "context": ""},
+            {"email": "jane.doe@example.com", "name": "Jane Doe", "company": "", "context": ""},
+        ]
+        assert gpp.load_people(jsonl_file) == [
+            {"email": "a@b.com", "name": "A", "company": "", "context": "met at TED"},
+        ]
+
+    def test_people_json(self, tmp_path):
+        people_file = tmp_path / "people.json"
+        people_file.write_text(json.dumps({
+            "Chris Anderson (TED)": {"qualifier": "TED", "emails": ["chris@ted.com"]},
+            "Danah Boyd": ["danah@danah.org", "zephoria@gmail.com"],
+            "No Email": {"name": "No Email", "aliases": [], "emails": []},
+        }))
+
+        assert gpp.load_people(people_file) == [
+            {"email": "chris@ted.com", "name": "Chris Anderson (TED)", "company": "TED", "context": ""},
+            {"email": "danah@danah.org", "name": "Danah Boyd", "company": "", "context": ""},
+        ]
+
+
+class TestArguments:
+    """Test that bad arguments fail before any index is built"""
+
+    @pytest.mark.parametrize("argv", [[], ["--batch", "missing.csv"]])
+    def test_validated_first(self, monkeypatch, argv):
+        def no_index(*args, **kwargs):
+            raise AssertionError("index built before validation")
+
+        monkeypatch.setattr(gpp, "get_people_directory", no_index)
+        monkeypatch.setattr(gpp, "load_people_index", no_index)
+        monkeypatch.setattr(sys, "argv", ["generate_person_page.py"] + argv)
+        with pytest.raises(SystemExit) as exit_info:
+            gpp.main()
+        assert exit_info.value.code == 1
+
+
+class TestStreaming:
+    """Test fence stripping and partial page writes while streaming"""
+
+    PAGES = [
+        "```markdown\n---\ntype: person\n---\n# Ada\n```",
+        "```\n# Ada\n\n```\n",
+        "```md\n# Ada\n```python\nx = 1\n```",
+        "# Ada\n```\ncode\n```",
+        "```",
+        "``",
+        "```markdown",
+        "```markdown\n```",
+        "```markdown\n\n```",
+        "",
+    ]
+
+    def test_fence_stripper_matches_clean_page_content(self):
+        for page in self.PAGES:
+            for size in range(1, len(page) + 2):
+                stripper = gpp.FenceStripper()
+                out = "".join(stripper.feed(page[i:i + size]) for i in range(0, len(page), size))
+                assert out + stripper.finish() == gpp.clean_page_content(page), (page, size)
+
+    def test_disconnect_keeps_partial_and_resumes(self, tmp_path, claude_stub):
+        person = [{"email": "ada@example.com", "name": "Ada", "company": "", "context": ""}]
+        claude_stub.chunk_size = 5
+        claude_stub.disconnect_after = 4
+        results = claude_stub.run(gpp.generate_batch(person, tmp_path))
+
+        assert results[0]["status"] == "failed"
+        assert results[0]["ttfb"] is not None
+        assert not (tmp_path / "Ada.md").exists()
+        # The opening fence is kept so a resumed page knows it was fenced
+        assert (tmp_path / "Ada.md.partial").read_text() == "```markdown\n---\ntype"
+
+        claude_stub.disconnect_after = None
+        results = claude_stub.run(gpp.generate_batch(person, tmp_path))
+
+        assert results[0]["status"] == "generated"
+        assert (tmp_path / "Ada.md").read_text() == "---\ntype: person\n---\n# Ada"
+        assert not (tmp_path / "Ada.md.partial").exists()
+        assert claude_stub.requests[-1]["body"]["messages"][-1] == {"role": "assistant",
+                                                                   "content": "```markdown\n---\ntype"}
+
+    def test_resumed_unfenced_page_keeps_fence_like_last_line(self, tmp_path):
+        page = tmp_path / "Ada.md"
+        gpp.partial_page_path(page).write_text("# Ada\nExample:\n")
+        with gpp.PageWriter(page) as writer:
+            assert writer.prefill == "# Ada\nExample:"
+            writer.write("\n```")
+        assert page.read_text() == "# Ada\nExample:\n```"
+        assert not gpp.partial_page_path(page).exists()
+
+
+class TestBatchGeneration:
+    """Test the bounded async worker pool"""
+
+    def people(self, count):
+        return [{"email": f"p{i}@example.com", "name": f"Person {i}", "company": "", "context": ""}
+                for i in range(count)]
+
+    def test_generates_concurrently_with_bound(self, tmp_path, claude_stub):
+        claude_stub.delay = 0.2
+        results = claude_stub.run(gpp.generate_batch(self.people(6), tmp_path, concurrency=3))
+
+        assert [r["status"] for r in results] == ["generated"] * 6
+        assert claude_stub.max_in_flight == 3
+        assert all(r["latency"] >= 0.2 for r in results)
+        assert (tmp_path / "Person-0.md").read_text() == "---\ntype: person\n---\n# Person 0"
+        assert claude_stub.requests[0]["path"] == "/v1/messages"
+
+    def test_resume_skips_existing_pages(self, tmp_path, claude_stub):
+        (tmp_path / "Person-1.md").write_text("hand edited")
+        people = self.people(3) + [{"email": "dup@example.com", "name": "Person 2", "company": "", "context": ""}]
+        results = claude_stub.run(gpp.generate_batch(people, tmp_path, concurrency=2))
+
+        assert [r["status"] for r in results] == ["generated", "skipped", "generated", "skipped"]
+        assert (tmp_path / "Person-1.md").read_text() == "hand edited"
+        assert len(claude_stub.requests) == 2
+
+    def test_failures_are_reported_per_item(self, tmp_path, claude_stub):
+        people = self.people(1) + [{"email": "x@example.com", "name": "Will Fail", "company": "",
+                                    "context": "fail"}]
+        results = claude_stub.run(gpp.generate_batch(people, tmp_path, concurrency=2))
+
+        assert [r["status"] for r in results] == ["generated", "failed"]
+        assert "bad person" in results[1]["error"]
+        assert not (tmp_path / "Will-Fail.md").exists()
+
+
+class TestMessageBatch:
+    """Test generation through one Message Batch job"""
+
+    def people(self, count):
+        return [{"email": f"p{i}@example.com", "name": f"Person {i}", "company": "", "context": ""}
+                for i in range(count)]
+
+    def batch_creates(self, stub):
+        return [r for r in stub.requests if r["path"] == "/v1/messages/batches"]
+
+    def test_one_job_for_all_pages(self, tmp_path, claude_stub):
+        claude_stub.batch_polls = 2
+        (tmp_path / "Person-1.md").write_text("hand edited")
+        people = self.people(3) + [{"email": "x@example.com", "name": "Will Fail", "company": "",
+                                    "context": "fail"}] + self.people(1)
+        results = gpp.generate_message_batch(people, tmp_path, poll_seconds=0)
+
+        assert [r["status"] for r in results] == ["generated", "skipped", "generated", "failed", "skipped"]
+        assert "bad person" in results[3]["error"]
+        assert (tmp_path / "Person-2.md").read_text() == "---\ntype: person\n---\n# Person 2"
+        assert (tmp_path / "Person-1.md").read_text() == "hand edited"
+        assert not list(tmp_path.glob("*.partial"))
+
+        creates = self.batch_creates(claude_stub)
+        assert len(creates) == 1
+        assert len(creates[0]["body"]["requests"]) == 3
+        assert all(r["params"]["temperature"] == 1.0 for r in creates[0]["body"]["requests"])
+        assert not any(r["path"] == "/v1/messages" for r in claude_stub.requests)
+        polls = [r for r in claude_stub.requests if r["path"] == "/v1/messages/batches/msgbatch_0"]
+        assert len(polls) >= 3
+
+    def test_collect_existing_batch_and_cache(self, tmp_path, claude_stub):
+        gpp.generate_message_batch(self.people(2), tmp_path, poll_seconds=0)
+        for page in tmp_path.glob("*.md"):
+            page.unlink()
+
+        # Resuming collects the submitted batch instead of creating another
+        results = gpp.generate_message_batch(self.people(2), tmp_path, batch_id="msgbatch_0",
+                                              poll_seconds=0, use_cache=False)
+        assert [r["status"] for r in results] == ["generated", "generated"]
+        assert len(self.batch_creates(claude_stub)) == 1
+
+        # Cached responses are not submitted at all
+        for page in tmp_path.glob("*.md"):
+            page.unlink()
+        requests_before = len(claude_stub.requests)
+        results = gpp.generate_message_batch(self.people(2), tmp_path, poll_seconds=0)
+        assert [r["status"] for r in results] == ["generated", "generated"]
+        assert len(claude_stub.requests) == requests_before
+
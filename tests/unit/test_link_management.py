@@ -127,6 +127,182 @@ class TestLinkUpdating:
         assert updated == '![[Resources/Images/Screen Shot 2025-08-09.png]]'
 
 
+class TestLinkRewriter:
+    """Test the single-pass rewriter used by fix_broken_links"""
+    
+    def test_rewrites_embeds_and_markdown_links(self):
+        from fix_broken_links import build_link_rewriter
+        
+        rewrite = build_link_rewriter({
+            'test.pdf': 'Resources/PDFs/test.pdf',
+            'Screen Shot 2025-08-09.png': 'Resources/Images/Screen Shot 2025-08-09.png',
+        })
+        content = """
+        ![[test.pdf]] and again ![[test.pdf]]
+        ![shot](Screen Shot 2025-08-09.png)
+        """
+        
+        updated, changes = rewrite(content)
+        
+        assert updated.count('![[Resources/PDFs/test.pdf]]') == 2
+        assert '![shot](Resources/Images/Screen Shot 2025-08-09.png)' in updated
+        assert len(changes) == 2
+    
+    def test_exact_match_only(self):
+        from fix_broken_links import build_link_rewriter
+        
+        rewrite = build_link_rewriter({'test.pdf': 'Resources/PDFs/test.pdf'})
+        content = """
+        ![[test.pdf]]
+        ![[test.pdf.backup]]
+        ![[another-test.pdf]]
+        [doc](my-test.pdf)
+        """
+        
+        updated, changes = rewrite(content)
+        
+        assert '![[Resources/PDFs/test.pdf]]' in updated
+        assert '![[test.pdf.backup]]' in updated
+        assert '![[another-test.pdf]]' in updated
+        assert '[doc](my-test.pdf)' in updated
+        assert changes == ['  test.pdf → Resources/PDFs/test.pdf']
+    
+    def test_parenthesised_copy_names(self):
+        from fix_broken_links import build_link_rewriter, find_remaining_references
+        
+        moved = {'scan (1).pdf': 'Resources/PDFs/scan (1).pdf'}
+        content = "![x](scan (1).pdf) and ![[scan (1).pdf]]"
+        
+        updated, changes = build_link_rewriter(moved)(content)
+        
+        assert updated == "![x](Resources/PDFs/scan (1).pdf) and ![[Resources/PDFs/scan (1).pdf]]"
+        assert changes == ['  scan (1).pdf → Resources/PDFs/scan (1).pdf']
+        assert find_remaining_references("[x](scan (1).pdf)", moved) == ['scan (1).pdf']
+    
+    def test_link_targets_stay_on_one_line(self):
+        from fix_broken_links import build_link_rewriter
+        from vault_scan import parse_links
+        
+        content = "see [draft](unclosed\n![x](test.pdf) later)"
+        updated, changes = build_link_rewriter({'test.pdf': 'Resources/PDFs/test.pdf'})(content)
+        
+        assert updated == "see [draft](unclosed\n![x](Resources/PDFs/test.pdf) later)"
+        assert parse_links(content)['mdlinks'] == ['test.pdf']
+    
+    def test_percent_encoded_links(self, tmp_path):
+        from fix_broken_links import build_link_rewriter, rewrite_note
+        
+        moved = {f'file{i}.pdf': f'Resources/PDFs/file{i}.pdf' for i in range(10)}
+        moved['scan file.pdf'] = 'Resources/PDFs/scan file.pdf'
+        note = tmp_path / 'note.md'
+        note.write_text("[scan](scan%20file.pdf) and [[scan%20file.pdf]]")
+        rewrite = build_link_rewriter(moved)
+        
+        assert b'scan%20file.pdf' in rewrite.markers[1]
+        new_content, changes, remaining = rewrite_note(note, rewrite, moved)
+        
+        assert new_content == "[scan](Resources/PDFs/scan%20file.pdf) and [[scan%20file.pdf]]"
+        assert changes == ['  scan file.pdf → Resources/PDFs/scan file.pdf']
+        assert remaining == ['scan file.pdf']
+    
+    def test_no_changes(self):
+        from fix_broken_links import build_link_rewriter
+        
+        rewrite = build_link_rewriter({'test.pdf': 'Resources/PDFs/test.pdf'})
+        content = "[[Person Page]] and ![[other.pdf]]"
+        
+        assert rewrite(content) == (content, [])
+
+
+class TestRemainingReferences:
+    """Test verification of links the rewrite could not fix"""
+    
+    def test_reports_forms_the_rewriter_skips(self):
+        from fix_broken_links import build_link_rewriter, find_remaining_references
+        
+        moved = {'test.pdf': 'Resources/PDFs/test.pdf', 'shot.png': 'Resources/Images/shot.png'}
+        content = """
+        ![[test.pdf]]
+        [[test.pdf]]
+        ![[shot.png|300]]
+        """
+        
+        updated, _ = build_link_rewriter(moved)(content)
+        
+        assert find_remaining_references(updated, moved) == ['shot.png', 'test.pdf']
+    
+    def test_mentions_outside_links_are_not_reported(self):
+        from fix_broken_links import find_remaining_references
+        
+        moved = {'test.pdf': 'Resources/PDFs/test.pdf'}
+        content = "We discussed test.pdf but ![[Resources/PDFs/test.pdf]] is embedded"
+        
+        assert find_remaining_references(content, moved) == []
+
+
+class TestParallelRewrite:
+    """Test the process-pool mode of fix_broken_links"""
+    
+    def test_pool_matches_serial(self, temp_vault):
+        from fix_broken_links import rewrite_notes
+        
+        moved = {'test.pdf': 'Resources/PDFs/test.pdf'}
+        paths = []
+        for i in range(6):
+            note = temp_vault / f"note{i}.md"
+            note.write_text("![[test.pdf]]" if i % 2 else "[[Nothing]]")
+            paths.append(str(note))
+        
+        serial = list(rewrite_notes(paths, moved, jobs=1))
+        pooled = list(rewrite_notes(paths, moved, jobs=3))
+        
+        assert pooled == serial
+        assert [p for p, new, _, _, _ in pooled if new] == paths[1::2]
+
+
+class TestAttachmentLinks:
+    """Test discovery-driven fixing of bare attachment embeds"""
+    
+    def test_fixes_all_bare_attachment_embeds(self, temp_vault, monkeypatch):
+        import fix_attachment_links
+        from vault_scan import VaultManifest
+        
+        (temp_vault / "Attachments" / "Screen Shot 2022-01-01 at 9.00.00.png").touch()
+        (temp_vault / "Attachments" / "diagram.png").touch()
+        (temp_vault / "root.png").touch()
+        (temp_vault / "Attachments" / "chart.png").touch()
+        (temp_vault / "Resources" / "Images").mkdir(parents=True, exist_ok=True)
+        (temp_vault / "Resources" / "Images" / "chart.png").touch()
+        (temp_vault / "Attachments" / "Photo.JPG").touch()
+        note = temp_vault / "dailynote" / "2022-01-01.md"
+        note.write_text(
+            "![[Screen Shot 2022-01-01 at 9.00.00.png]]\n"
+            "![[diagram.png|300]]\n"
+            "![[root.png]]\n"
+            "![[chart.png]]\n"
+            "![[missing.png]]\n"
+            "![[photo.jpg]]\n"
+        )
+        (temp_vault / "other.md").write_text("No embeds here")
+        monkeypatch.setattr(fix_attachment_links, 'SWITCHBOARD', str(temp_vault))
+        
+        fix_attachment_links.main()
+        
+        assert note.read_text() == (
+            "![[Attachments/Screen Shot 2022-01-01 at 9.00.00.png]]\n"
+            "![[Attachments/diagram.png|300]]\n"
+            "![[root.png]]\n"
+            "![[chart.png]]\n"
+            "![[missing.png]]\n"
+            "![[Attachments/Photo.JPG]]\n"
+        )
+        
+        # The manifest already records the rewritten note
+        manifest = VaultManifest(temp_vault).load()
+        assert 'attachments/photo.jpg' in [link.casefold() for link in manifest.links('dailynote/2022-01-01.md')]
+        assert 'dailynote/2022-01-01.md' not in manifest.refresh().changed
+
+
 class TestBrokenLinkDetection:
     """Test detection of broken links"""
     
@@ -168,6 +344,28 @@ class TestBrokenLinkDetection:
         assert 'exists.pdf' not in broken_links
         assert 'Existing Person' not in broken_links
     
+    def test_find_broken_links_with_index(self, temp_vault):
+        """Test the same detection through the resolution index"""
+        from link_index import LinkIndex
+        
+        md_file = temp_vault / "test.md"
+        md_file.write_text("""
+        ![[exists.pdf]]
+        ![[does-not-exist.pdf]]
+        [[Existing Person]]
+        [[Missing Person]]
+        ![[shot.png]]
+        """)
+        (temp_vault / "exists.pdf").touch()
+        (temp_vault / "Existing Person.md").write_text("# Existing Person")
+        (temp_vault / "Resources" / "Images" / "shot.png").touch()
+        
+        index = LinkIndex.build(temp_vault)
+        links = re.findall(r'!?\[\[([^\]]+)\]\]', md_file.read_text())
+        broken_links = [link for link in links if not index.exists(link, 'test.md')]
+        
+        assert broken_links == ['does-not-exist.pdf', 'Missing Person']
+    
     def test_validate_relative_paths(self):
         """Test validation of relative path links"""
         content = """
@@ -190,6 +388,50 @@ class TestBrokenLinkDetection:
         assert 'Resources/PDFs/document.pdf' not in problematic
 
 
+class TestLinkResolutionIndex:
+    """Test Obsidian-style link resolution"""
+    
+    @pytest.fixture
+    def index(self):
+        from link_index import LinkIndex
+        
+        return LinkIndex([
+            'John Smith.md',
+            'People/Jane Doe.md',
+            'Resources/Images/shot.png',
+            'Attachments/shot.png',
+            'Meetings/2025/Kickoff.md',
+            'Projects/Kickoff.md',
+            'Projects/Plan.md',
+        ])
+    
+    def test_basename_resolution(self, index):
+        assert index.resolve('Jane Doe') == 'People/Jane Doe.md'
+        assert index.resolve('jane doe.md') == 'People/Jane Doe.md'
+        assert index.resolve('John Smith|John') == 'John Smith.md'
+        assert index.resolve('John Smith#Contact') == 'John Smith.md'
+    
+    def test_attachments_need_extension(self, index):
+        assert index.resolve('shot') is None
+        assert index.resolve('Images/shot.png') == 'Resources/Images/shot.png'
+        assert index.resolve('Resources/Images/shot.png') == 'Resources/Images/shot.png'
+    
+    def test_ambiguous_names(self, index):
+        # Shallowest path wins, unless the source note shares a folder
+        assert index.resolve('shot.png') == 'Attachments/shot.png'
+        assert index.resolve('Kickoff') == 'Projects/Kickoff.md'
+        assert index.resolve('Kickoff', 'Meetings/2025/Notes.md') == 'Meetings/2025/Kickoff.md'
+    
+    def test_relative_links(self, index):
+        assert index.resolve('./Plan.md', 'Projects/Kickoff.md') == 'Projects/Plan.md'
+        assert index.resolve('../John Smith.md', 'People/Jane Doe.md') == 'John Smith.md'
+        assert index.resolve('../../outside.pdf', 'People/Jane Doe.md') is None
+    
+    def test_missing(self, index):
+        assert index.resolve('Missing Person') is None
+        assert index.resolve('Other/Plan') is None
+
+
 class TestLinkHelpers:
     """Test helper functions for link management"""
     
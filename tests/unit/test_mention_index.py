@@ -0,0 +1,164 @@
+"""
+Unit tests for the people mention index
+"""
+
+import os
+import time
+from pathlib import Path
+import sys
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+from utils import mention_index
+from utils.mention_index import MentionIndex, NameMatcher, known_names, line_keys, load_mention_index
+
+NAMES = ["Joichi Ito", "Joi", "Taro Chiba", "Émile Zola", "Al"]
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+def make_vault(root):
+    write(root / 'dailynote' / '2025-01-01.md', "# Jan 1\n\n- Met Joichi Ito (joi@ito.com) about DG\n")
+    write(root / 'dailynote' / '2025-02-01.md', "# Feb 1\n### Meeting with [[Joichi Ito|Joi]]\n- 日本語 notes\n")
+    write(root / 'Meetings' / '2024' / '2024-12-01 Standup.md', "Attendees: Joi <JOI@ito.com>\n")
+    write(root / 'people' / 'Joichi Ito.md', "email: joi@ito.com\n")  # Not indexed
+    return root
+
+
+class TestKeys:
+    """Test what a line is indexed under"""
+
+    def test_line_keys(self):
+        names = NameMatcher(known_names(NAMES))
+        keys = line_keys("Met Joichi Ito and [[Taro Chiba|Taro]] <A.B@Example.com>", names)
+        assert keys == {"joichi ito", "taro chiba", "taro", "a.b@example.com"}
+        assert line_keys("nothing here", names) == set()
+        assert line_keys("Met Joichi Ito") == set()  # Capitalisation alone is not a name
+
+    def test_known_names_only(self):
+        names = NameMatcher(known_names(NAMES))
+        assert line_keys("Lunch with ÉMILE  zola and joi", names) == {"émile zola", "joi"}
+        # Whole words only, and aliases too short to be useful are skipped
+        assert line_keys("Joining Albert at Joichi's", names) == set()
+        assert line_keys("Met A.B. today.", NameMatcher(known_names(["A.B."]))) == {"a.b"}
+        assert known_names(["Al", "a@b.com"]) == set()
+
+    def test_matching_cost_does_not_grow_with_names(self):
+        lines = ["- Met Person 7 Smith and [[Someone Else]] about the plan"] * 5000
+        timings = []
+        for count in (10, 10000):
+            names = NameMatcher(known_names(f"Person {i} Smith" for i in range(count)))
+            start = time.perf_counter()
+            assert all(line_keys(line, names) == {"person 7 smith", "someone else"} for line in lines)
+            timings.append(time.perf_counter() - start)
+        assert timings[1] < timings[0] * 3
+
+
+class TestMentionIndex:
+    """Test lookups, the token budget and incremental updates"""
+
+    def test_recent_mentions(self, tmp_path):
+        index = load_mention_index(make_vault(tmp_path), names=NAMES)
+        assert sorted(index.files) == ['Meetings/2024/2024-12-01 Standup.md',
+                                       'dailynote/2025-01-01.md', 'dailynote/2025-02-01.md']
+
+        mentions = index.recent_mentions(["joi@ito.com", "Joichi Ito"])
+        assert [(m["date"], m["line"]) for m in mentions] == [
+            ("2025-02-01", "### Meeting with [[Joichi Ito|Joi]]"),
+            ("2025-01-01", "- Met Joichi Ito (joi@ito.com) about DG"),
+            ("2024-12-01", "Attendees: Joi <JOI@ito.com>"),
+        ]
+        assert len(index.recent_mentions(["joi@ito.com"], budget_tokens=20)) == 1
+        assert index.recent_mentions(["nobody@example.com"]) == []
+
+    def test_incremental_refresh(self, tmp_path, monkeypatch):
+        make_vault(tmp_path)
+        load_mention_index(tmp_path, names=NAMES)
+        scanned = []
+        scan_note = mention_index.scan_note
+        monkeypatch.setattr(mention_index, 'scan_note',
+                            lambda path, *args: scanned.append(path.name) or scan_note(path, *args))
+
+        index = load_mention_index(tmp_path, names=NAMES)
+        assert scanned == []
+
+        note = tmp_path / 'dailynote' / '2025-01-01.md'
+        note.write_text("- Lunch with Taro Chiba\n")
+        os.utime(note, ns=(time.time_ns(), time.time_ns() + 10**9))
+        (tmp_path / 'dailynote' / '2025-02-01.md').unlink()
+        write(tmp_path / 'dailynote' / '2025-03-01.md', "- call joi@ito.com\n")
+
+        index = load_mention_index(tmp_path, names=NAMES)
+        assert sorted(scanned) == ['2025-01-01.md', '2025-03-01.md']
+        assert sorted(index.lookup(["joi@ito.com"])) == ['Meetings/2024/2024-12-01 Standup.md',
+                                                         'dailynote/2025-03-01.md']
+        assert list(index.lookup(["Taro Chiba"])) == ['dailynote/2025-01-01.md']
+        assert "joichi ito" not in index.postings
+
+        note.write_text("- nothing\n")
+        index.update('dailynote/2025-01-01.md')
+        assert index.lookup(["Taro Chiba"]) == {}
+
+    def test_new_names_scan_only_notes_that_contain_them(self, tmp_path, monkeypatch):
+        make_vault(tmp_path)
+        # Without names only the wikilink is found
+        assert list(load_mention_index(tmp_path).lookup(["Joichi Ito"])) == ['dailynote/2025-02-01.md']
+        scanned = []
+        scan_note = mention_index.scan_note
+        monkeypatch.setattr(mention_index, 'scan_note',
+                            lambda path, *args: scanned.append(path.name) or scan_note(path, *args))
+
+        index = load_mention_index(tmp_path, names=["Joichi Ito"])
+        assert sorted(scanned) == ['2025-01-01.md', '2025-02-01.md']  # Not the standup
+        found = index.lookup(["Joichi Ito"])
+        assert sorted(found) == ['dailynote/2025-01-01.md', 'dailynote/2025-02-01.md']
+        assert len(found['dailynote/2025-02-01.md']) == 1  # Wikilink and name on one line
+
+        scanned.clear()
+        index = load_mention_index(tmp_path, names=NAMES)
+        assert sorted(scanned) == ['2024-12-01 Standup.md', '2025-01-01.md', '2025-02-01.md']
+        assert 'dailynote/2025-01-01.md' in index.lookup(["Joichi Ito"])
+        assert 'Meetings/2024/2024-12-01 Standup.md' in index.lookup(["Joi"])
+
+        scanned.clear()
+        assert "joichi ito" in load_mention_index(tmp_path).names  # Names are kept
+        assert scanned == []
+
+    def test_lookup_is_fast_on_years_of_notes(self, tmp_path):
+        for day in range(1500):
+            write(tmp_path / 'dailynote' / f"{2020 + day // 365}-01-{day % 28 + 1:02d}-{day}.md",
+                  f"# Day {day}\n- Met Person {day % 50} Smith (p{day % 50}@example.com)\n"
+                  + "- plain text line\n" * 40)
+        names = [f"Person {i} Smith" for i in range(50)]
+        load_mention_index(tmp_path, names=names)
+
+        start = time.perf_counter()
+        index = MentionIndex(tmp_path, names=names).load()
+        loaded = time.perf_counter()
+        mentions = index.recent_mentions(["p7@example.com", "Person 7 Smith"])
+        done = time.perf_counter()
+
+        assert len(mentions) == 30
+        assert done - loaded < 0.02
+        assert loaded - start < 1.0
+
+
+class TestPersonPageContext:
+    """Test that person pages get recent mentions in their prompt"""
+
+    def test_build_person_data_adds_mentions(self, tmp_path):
+        import generate_person_page as gpp
+
+        index = load_mention_index(make_vault(tmp_path), names=NAMES)
+        person = {"email": "joi@ito.com", "name": "Joichi Ito"}
+        data = gpp.build_person_data(person, index)
+
+        assert "Recent mentions in daily and meeting notes (newest first):" in data
+        assert data.index("2025-02-01 (dailynote/2025-02-01.md)") < data.index("2025-01-01")
+        assert "Recent mentions" not in gpp.build_person_data(person)
+        assert "Recent mentions" not in gpp.build_person_data(
+            {"email": "x@example.com", "name": "Nobody"}, index)
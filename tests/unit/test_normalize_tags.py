@@ -0,0 +1,90 @@
+"""
+Unit tests for tag normalization
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+from normalize_tags import (build_tag_normalizer, normalize_frontmatter_tags,
+                            normalize_notes, normalize_vault_tags)
+from vault_scan import VaultManifest
+
+RULES = {'org[-_ ]?p': 'org_p', 'lit[-_ ]?note': 'litnote', 'todo': ''}
+
+
+class TestTagNormalizer:
+    """Test the compiled rule matcher"""
+
+    def test_renames_and_dedupes(self):
+        normalize = build_tag_normalizer(RULES)
+        assert normalize(['#Org-P', 'org_p', 'stub', 'TODO', 'lit note']) == ['org_p', 'stub', 'litnote']
+
+    def test_no_rules(self):
+        normalize = build_tag_normalizer()
+        assert normalize(['"people"', '#stub']) == ['people', 'stub']
+
+
+class TestFrontmatterTags:
+    """Test rewriting the tags field inside the frontmatter only"""
+
+    @pytest.mark.parametrize('line,expected', [
+        ('tags: people', 'tags: [people]'),
+        ('tags: org_p, stub', 'tags: [org_p, stub]'),
+        ('tags: #a, #b', 'tags: [a, b]'),
+        ('tags: "project alpha"', 'tags: [project alpha]'),
+        ('tags: [org-p, litnote]', 'tags: [org_p, litnote]'),
+    ])
+    def test_inline_forms(self, line, expected):
+        content = f"---\n{line}\nname: X\n---\ntags: people\n"
+        new_content, _, _ = normalize_frontmatter_tags(content, build_tag_normalizer(RULES))
+        assert new_content == f"---\n{expected}\nname: X\n---\ntags: people\n"
+
+    def test_block_list(self):
+        content = "---\ntags:\n  - org-p\n  - stub\nname: X\n---\nBody\n"
+        new_content, old, new = normalize_frontmatter_tags(content, build_tag_normalizer(RULES))
+        assert new_content == "---\ntags:\n  - org_p\n  - stub\nname: X\n---\nBody\n"
+        assert (old, new) == (['org-p', 'stub'], ['org_p', 'stub'])
+
+    def test_unchanged(self):
+        normalize = build_tag_normalizer(RULES)
+        assert normalize_frontmatter_tags("---\ntags: [a, b]\n---\n", normalize)[0] is None
+        assert normalize_frontmatter_tags("No frontmatter\ntags: a\n", normalize)[0] is None
+
+
+class TestNormalizeVault:
+    """Test the vault-wide pass"""
+
+    def test_subfolders_and_skips_clean_notes(self, temp_vault, monkeypatch):
+        import normalize_tags
+
+        (temp_vault / "Root.md").write_text("---\ntags: people\n---\n")
+        (temp_vault / "People" / "Jane.md").write_text("---\ntags: org-p, stub\n---\n")
+        (temp_vault / "Clean.md").write_text("---\ntags: [stub]\n---\n")
+        manifest = VaultManifest(temp_vault).load().refresh()
+
+        opened = []
+        real_worker = normalize_tags._normalize_worker
+        monkeypatch.setattr(normalize_tags, '_normalize_worker',
+                            lambda path, normalize=None: opened.append(path) or real_worker(path, normalize))
+
+        assert normalize_vault_tags(manifest, RULES) == 2
+        assert (temp_vault / "Root.md").read_text() == "---\ntags: [people]\n---\n"
+        assert (temp_vault / "People" / "Jane.md").read_text() == "---\ntags: [org_p, stub]\n---\n"
+        assert str(temp_vault / "Clean.md") not in map(str, opened)
+        assert manifest.frontmatter("People/Jane.md")['tags'] == ['org_p', 'stub']
+
+    def test_parallel_matches_serial(self, temp_vault):
+        paths = []
+        for i in range(6):
+            note = temp_vault / f"n{i}.md"
+            note.write_text(f"---\ntags: lit-note, t{i}\n---\n")
+            paths.append(str(note))
+
+        serial = list(normalize_notes(paths, RULES, jobs=1))
+        parallel = list(normalize_notes(paths, RULES, jobs=2))
+        assert parallel == serial
+        assert serial[3][1] == "---\ntags: [litnote, t3]\n---\n"
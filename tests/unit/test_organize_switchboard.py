@@ -0,0 +1,149 @@
+"""
+Unit tests for switchboard organization
+"""
+
+import json
+import pytest
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+import organize_switchboard
+from fix_broken_links import load_move_plan
+
+
+@pytest.fixture
+def vault(temp_vault, monkeypatch):
+    monkeypatch.setattr(organize_switchboard, 'SWITCHBOARD', str(temp_vault))
+    return temp_vault
+
+
+class TestMovePlan:
+    """Test that organizing produces a plan that drives link repair"""
+
+    def test_organize_and_repair_links(self, vault):
+        (vault / "Screenshot 2023-06-06 at 14.02.18.png").write_bytes(b'png')
+        (vault / "report.pdf").write_bytes(b'pdf')
+        (vault / "2023-06-06 Kickoff.md").write_text("Meeting notes")
+        note = vault / "dailynote" / "2023-06-06.md"
+        note.write_text("![[Screenshot 2023-06-06 at 14.02.18.png]]\n[doc](report.pdf)\n")
+
+        manifest = organize_switchboard.load_manifest()
+        organize_switchboard.create_directories()
+        plan = organize_switchboard.organize_files()
+
+        assert plan == {
+            'Screenshot 2023-06-06 at 14.02.18.png': 'Resources/Images/Screenshot 2023-06-06 at 14.02.18.png',
+            'report.pdf': 'Resources/PDFs/report.pdf',
+            '2023-06-06 Kickoff.md': 'Meetings/2023/2023-06-06 Kickoff.md',
+        }
+
+        plan_path = organize_switchboard.save_move_plan(plan)
+        assert load_move_plan(plan_path) == plan
+
+        organize_switchboard.repair_moved_links(manifest, plan)
+
+        assert note.read_text() == (
+            "![[Resources/Images/Screenshot 2023-06-06 at 14.02.18.png]]\n"
+            "[doc](Resources/PDFs/report.pdf)\n"
+        )
+        assert 'Meetings/2023/2023-06-06 Kickoff.md' in manifest.entries
+        assert 'report.pdf' not in manifest.entries
+
+
+class TestReport:
+    """Test the report built from the scan manifest"""
+
+    def test_collect_report(self, vault):
+        (vault / "Jane Doe.md").write_text("---\ntags: [people]\n---\n# Jane\n")
+        (vault / "John Smith.md").write_text("---\ntags: person\n---\n# John\n")
+        (vault / "Topic.md").write_text("---\ntags: [topic]\n---\nMet people here\n")
+        (vault / "tool.py").write_text("print()")
+        (vault / "Resources" / "PDFs" / "a.pdf").write_bytes(b'pdf')
+        (vault / "Resources" / "Images" / "a.png").write_bytes(b'png')
+        (vault / "Attachments" / "b.jpg").write_bytes(b'jpg')
+        (vault / "Scripts").mkdir()
+        (vault / "Scripts" / "x.js").write_text("")
+
+        report = organize_switchboard.collect_report(organize_switchboard.load_manifest())
+
+        assert report['root_files'] == 4
+        assert report['markdown_files'] == 3
+        assert report['person_pages'] == 2
+        assert report['pdfs'] == 1
+        assert report['images'] == 2
+        assert report['scripts'] == 2
+        assert report['total_files'] == 8
+
+    def test_unreadable_folder_is_skipped(self, vault, monkeypatch):
+        (vault / "Resources" / "PDFs" / "a.pdf").write_bytes(b'pdf')
+        (vault / "Topic.md").write_text("# Topic\n")
+        scandir = organize_switchboard.os.scandir
+
+        def flaky_scandir(path):
+            if Path(path).name == 'PDFs':
+                raise PermissionError(path)
+            return scandir(path)
+
+        monkeypatch.setattr(organize_switchboard.os, 'scandir', flaky_scandir)
+        report = organize_switchboard.collect_report(organize_switchboard.load_manifest())
+        assert report['pdfs'] == 0
+        assert report['markdown_files'] == 1
+
+    def test_full_run_walks_the_vault_once(self, vault, monkeypatch):
+        from vault_scan import VaultManifest
+
+        (vault / "report.pdf").write_bytes(b'pdf')
+        (vault / "Jane Doe.md").write_text("---\ntags: [people]\n---\n# Jane\n")
+        walks = []
+        walk = VaultManifest.walk
+        monkeypatch.setattr(VaultManifest, 'walk', lambda self: walks.append(1) or walk(self))
+        monkeypatch.setattr(sys, 'argv', ['organize_switchboard.py'])
+
+        organize_switchboard.main()
+
+        assert len(walks) == 1
+        history = vault / ".vault-tools" / "report-history.jsonl"
+        report = json.loads(history.read_text().splitlines()[-1])
+        assert report['pdfs'] == 1
+        assert report['root_files'] == 2  # Jane Doe.md and Reading-Queue.md
+        assert report['person_pages'] == 1
+
+    def test_report_history(self, vault):
+        organize_switchboard.generate_report(json_output=True)
+        history = vault / ".vault-tools" / "report-history.jsonl"
+        assert not history.exists()
+
+        for i in range(4):
+            organize_switchboard.record_report({'markdown_files': i}, vault, limit=3)
+
+        records = [json.loads(line) for line in history.read_text().splitlines()]
+        assert [r['markdown_files'] for r in records] == [1, 2, 3]
+
+
+class TestClassification:
+    """Test the rule table that drives organize_files"""
+
+    def test_plan_moves_from_one_listing(self, vault):
+        for name in ["Screen Shot 1.png", "photo.jpeg", "tool.js", "2024-01-02 Standup.md", "Notes.md"]:
+            (vault / name).write_text("x")
+        (vault / "Scripts").mkdir()
+        (vault / "Scripts" / "tool.js").write_text("already there")
+
+        assert organize_switchboard.plan_moves(vault) == [
+            ('2024-01-02 Standup.md', 'Meetings/2024/2024-01-02 Standup.md', 'meetings'),
+            ('Screen Shot 1.png', 'Resources/Images/Screen Shot 1.png', 'images'),
+            ('photo.jpeg', 'Resources/Images/photo.jpeg', 'images'),
+        ]
+
+    def test_custom_rules(self, vault):
+        (vault / "Q3 Review.pptx").write_text("x")
+        rules = organize_switchboard.CLASSIFICATION_RULES + [
+            (r'^Q(?P<quarter>\d) .*\.pptx$', 'Resources/Decks/Q{quarter}', 'decks'),
+        ]
+
+        assert organize_switchboard.plan_moves(vault, rules) == [
+            ('Q3 Review.pptx', 'Resources/Decks/Q3/Q3 Review.pptx', 'decks'),
+        ]
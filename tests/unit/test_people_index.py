@@ -0,0 +1,101 @@
+"""
+Unit tests for the merged people index
+"""
+
+import json
+from pathlib import Path
+import sys
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+import generate_person_page as gpp
+from utils.people_index import PeopleIndex, load_people_index, read_frontmatter
+
+
+def make_vault(root):
+    people_dir = root / "people"
+    people_dir.mkdir()
+    (root / "people.index.json").write_text(json.dumps({
+        "Joichi Ito": {"name": "Joichi Ito", "pagePath": "Joichi Ito.md",
+                       "aliases": ["Joi", "Joi Ito"], "emails": ["joi@ito.com"]},
+    }))
+    (root / "Joichi Ito.md").write_text("---\nemails: [joi@ito.com]\n---\n# Joi\n")
+    (root / "Chris Anderson (TED).md").write_text("# Chris\n")
+    (people_dir / "Taro-Chiba.md").write_text(
+        "---\ntype: person\nemail: taro@example.jp\naliases:\n  - 'Chiba-san'\ntags:\n  - people\n---\n# Taro\n")
+    (people_dir / "Meeting-notes.md").write_text("---\ntags: [meeting]\n---\n")
+    config = root / "people.json"
+    config.write_text(json.dumps({
+        "Chris Anderson (TED)": {"qualifier": "TED", "emails": ["chris@ted.com"]},
+        "Chris Anderson (Wired)": {"qualifier": "Wired", "emails": ["chris@wired.com"]},
+        "Joichi Ito": ["JOI@mit.edu"],
+    }))
+    return people_dir, config
+
+
+class TestPeopleIndex:
+    """Test merging sources and looking people up"""
+
+    def test_read_frontmatter(self, tmp_path):
+        page = tmp_path / "p.md"
+        page.write_text("---\nname: \"A B\"\nemails:\n  - a@b.c\naliases: [Ab, 'A.B.']\nreminders:\n"
+                        "  listName: A\n---\nemail: not@frontmatter.com\n")
+        assert read_frontmatter(page) == {"name": "A B", "emails": ["a@b.c"], "aliases": ["Ab", "A.B."]}
+
+    def test_merged_lookup(self, tmp_path):
+        people_dir, config = make_vault(tmp_path)
+        index = load_people_index(tmp_path, people_dir, config)
+
+        joi = index.find(["joi@mit.edu"])
+        assert joi is index.find(names=["joi ito"])
+        assert joi["path"] == tmp_path / "Joichi Ito.md"
+        assert joi["emails"] == ["joi@ito.com", "joi@mit.edu"]
+
+        assert index.find(["taro@example.jp"])["path"] == people_dir / "Taro-Chiba.md"
+        assert index.find(names=["chiba-san"])["path"] == people_dir / "Taro-Chiba.md"
+        assert index.find(["chris@ted.com"])["path"] == tmp_path / "Chris Anderson (TED).md"
+        assert index.find(["chris@wired.com"])["path"] is None
+        # Shared by two people, so it identifies neither
+        assert index.find(names=["Chris Anderson"]) is None
+        assert index.find(["nobody@example.com"], ["Meeting-notes"]) is None
+        assert len(index) == 4
+
+    def test_same_name_different_emails(self, tmp_path):
+        index = PeopleIndex()
+        first = index.add("Alex Kim", ["alex@one.com"])
+        second = index.add("Alex Kim", ["alex@two.com"])
+        assert first is not second
+        assert index.find(["alex@two.com"]) is second
+        assert index.find(names=["Alex Kim"]) is None
+        # Without emails on one side the name still merges
+        assert index.add("Sam Lee", path=tmp_path / "Sam Lee.md") is index.add("Sam Lee", ["sam@lee.com"])
+        assert index.match(["alex@three.com"], "Alex Kim") is None
+        assert index.match([], "Sam Lee")["emails"] == ["sam@lee.com"]
+
+
+class TestSkipKnownPeople:
+    """Test that generation reuses pages found through the index"""
+
+    def test_batch_skips_or_updates_known_pages(self, tmp_path, claude_stub):
+        people_dir, config = make_vault(tmp_path)
+        index = load_people_index(tmp_path, people_dir, config)
+        people = [
+            {"email": "joi@mit.edu", "name": "Joi Ito", "company": "", "context": ""},
+            {"email": "chris@wired.com", "name": "Chris Anderson", "company": "", "context": ""},
+            {"email": "CHRIS@wired.com", "name": "C. Anderson", "company": "", "context": ""},
+            {"email": "joichi@example.com", "name": "Joichi Ito", "company": "", "context": ""},
+        ]
+        results = claude_stub.run(gpp.generate_batch(people, people_dir, people_index=index))
+
+        # A namesake with another email gets a page of their own
+        assert [r["status"] for r in results] == ["skipped", "generated", "skipped", "generated"]
+        assert results[0]["path"] == tmp_path / "Joichi Ito.md"
+        assert results[1]["path"] == people_dir / "Chris-Anderson-Wired.md"
+        assert results[3]["path"] == people_dir / "Joichi-Ito.md"
+        assert len(claude_stub.requests) == 2
+
+        results = claude_stub.run(gpp.generate_batch(people[:1], people_dir, people_index=index, update=True))
+        assert results[0]["status"] == "generated"
+        assert (tmp_path / "Joichi Ito.md").read_text().startswith("---\ntype: person")
+        assert not (people_dir / "Joi-Ito.md").exists()
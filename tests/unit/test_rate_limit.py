@@ -0,0 +1,193 @@
+"""
+Unit tests for the shared Claude rate limit scheduler
+"""
+
+import asyncio
+import email.utils
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+import sys
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+import pytest
+from anthropic import APIConnectionError, RateLimitError
+
+from utils.claude_helpers import ask_claude, ask_claude_async
+from utils.rate_limit import AdaptiveConcurrency, Scheduler, TokenBucket, retry_after, set_scheduler
+from utils.telemetry import load_calls
+
+
+class FakeError(Exception):
+    def __init__(self, headers):
+        self.response = type("Response", (), {"headers": headers})()
+
+
+class TestBudgets:
+    """Test the token bucket and retry-after parsing"""
+
+    def test_token_bucket(self):
+        bucket = TokenBucket(per_minute=600)  # 10 a second, 600 burst
+        assert all(bucket.reserve() == 0 for _ in range(600))
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+        assert bucket.reserve(5) == pytest.approx(0.6, abs=0.01)
+        bucket.refund(6)
+        assert bucket.reserve() == pytest.approx(0.1, abs=0.01)
+
+    def test_retry_after(self):
+        assert retry_after(FakeError({"retry-after-ms": "1500", "retry-after": "9"})) == 1.5
+        assert retry_after(FakeError({"retry-after": "3"})) == 3.0
+        in_a_minute = email.utils.formatdate(time.time() + 60, usegmt=True)
+        assert 55 < retry_after(FakeError({"retry-after": in_a_minute})) <= 60
+        assert retry_after(FakeError({})) is None
+        assert retry_after(ValueError()) is None
+
+    def test_jittered_backoff_is_bounded(self):
+        scheduler = Scheduler(base_delay=0.5, max_delay=3)
+        for attempt in range(1, 8):
+            delays = [scheduler.backoff(attempt, ValueError()) for _ in range(50)]
+            assert all(0 <= d <= min(3, 0.5 * 2 ** (attempt - 1)) for d in delays)
+
+    def test_aimd(self):
+        limiter = AdaptiveConcurrency(8)
+        limiter.on_throttle()
+        limiter.on_throttle()  # Same burst: counted once
+        assert limiter.limit == 4
+        for _ in range(4):
+            limiter.on_success()
+        assert limiter.limit == 5
+        limiter.last_decrease = 0
+        limiter.on_throttle()
+        assert limiter.limit == 2
+
+    def test_waiters_are_woken_across_threads_and_loops(self):
+        limiter = AdaptiveConcurrency(1)
+        assert limiter.try_acquire()
+        acquired = []
+
+        def blocked_thread():
+            limiter.acquire_sync()
+            acquired.append("thread")
+            limiter.release()
+
+        async def blocked_coroutine():
+            await limiter.acquire()
+            acquired.append("loop")
+            limiter.release()
+
+        thread = threading.Thread(target=blocked_thread)
+        thread.start()
+        loop_thread = threading.Thread(target=asyncio.run, args=(blocked_coroutine(),))
+        loop_thread.start()
+        time.sleep(0.05)
+        assert acquired == []
+        limiter.release()
+        thread.join(1)
+        loop_thread.join(1)
+        assert sorted(acquired) == ["loop", "thread"]
+        assert limiter.in_flight == 0 and not limiter.waiters
+
+    def test_slots_are_free_while_waiting_or_backing_off(self):
+        scheduler = Scheduler(rpm=600, max_concurrency=1)
+        scheduler.requests.tokens = 0  # Each attempt waits 0.1s for budget
+        scheduler.backoff = lambda attempt, error: 0.3
+        attempts = []
+
+        def fn():
+            attempts.append(time.perf_counter())
+            if len(attempts) == 1:
+                raise APIConnectionError(request=None)
+            return "ok"
+
+        start = time.perf_counter()
+        thread = threading.Thread(target=scheduler.call, args=(fn,))
+        thread.start()
+        free = []
+        for at in (0.05, 0.25):  # Waiting for budget, then backing off
+            time.sleep(max(0, start + at - time.perf_counter()))
+            free.append(scheduler.concurrency.try_acquire())
+            if free[-1]:
+                scheduler.concurrency.release()
+        thread.join(2)
+        assert free == [True, True]
+        assert len(attempts) == 2
+
+    def test_cancelled_waiter_passes_its_wakeup_on(self):
+        limiter = AdaptiveConcurrency(1)
+
+        async def run():
+            await limiter.acquire()
+            first = asyncio.ensure_future(limiter.acquire())
+            second = asyncio.ensure_future(limiter.acquire())
+            await asyncio.sleep(0)
+            limiter.release()  # Wakes ``first``...
+            first.cancel()     # ...which gives the slot up before taking it
+            await asyncio.wait_for(second, 1)
+            assert first.cancelled()
+
+        asyncio.run(run())
+        assert limiter.in_flight == 1 and not limiter.waiters
+
+
+class TestScheduledCalls:
+    """Test retries and throttling against the stub's scheduled 429s"""
+
+    def test_honours_retry_after(self, claude_stub):
+        claude_stub.errors = [(429, 0.3)]
+        start = time.perf_counter()
+        assert "# Ada" in ask_claude(prompt="Name: Ada", use_cache=False)
+        assert time.perf_counter() - start >= 0.3
+        assert len(claude_stub.requests) == 2
+        assert load_calls()[0]["retries"] == 1
+
+    def test_gives_up_after_max_retries(self, claude_stub):
+        set_scheduler(Scheduler(max_retries=2, base_delay=0.01))
+        claude_stub.errors = [(429, 0)] * 5
+        with pytest.raises(RateLimitError):
+            ask_claude(prompt="Name: Ada", use_cache=False)
+        assert len(claude_stub.requests) == 3
+        assert load_calls()[0]["status"] == "error"
+
+    def test_requests_per_minute(self, claude_stub):
+        scheduler = Scheduler(rpm=600)
+        scheduler.requests.tokens = 0
+        set_scheduler(scheduler)
+        start = time.perf_counter()
+        ask_claude(prompt="Name: Ada", use_cache=False)
+        ask_claude(prompt="Name: Bob", use_cache=False)
+        assert time.perf_counter() - start >= 0.18
+
+    def test_unused_tokens_are_refunded(self, claude_stub):
+        scheduler = Scheduler(tpm=10_000)
+        set_scheduler(scheduler)
+        ask_claude(prompt="Name: Ada", max_tokens=4000, use_cache=False)
+        # 4000 reserved, 120 used (100 in + 20 out)
+        assert scheduler.tokens.tokens == pytest.approx(10_000 - 120, abs=5)
+
+    def test_throttling_shrinks_concurrency(self, claude_stub):
+        scheduler = Scheduler(max_concurrency=8, base_delay=0.05)
+        set_scheduler(scheduler)
+        claude_stub.delay = 0.05
+        claude_stub.errors = [(529, None)] * 4
+
+        async def run():
+            return await asyncio.gather(*(
+                ask_claude_async(prompt=f"Name: Person {i}", use_cache=False) for i in range(16)
+            ))
+
+        texts = claude_stub.run(run())
+        assert all("# Person" in text for text in texts)
+        assert claude_stub.max_in_flight <= 8
+        assert scheduler.concurrency.limit < 8
+        assert sum(call["retries"] for call in load_calls()) == 4
+
+    def test_sync_calls_share_the_concurrency_limit(self, claude_stub):
+        set_scheduler(Scheduler(max_concurrency=2))
+        claude_stub.delay = 0.05
+        with ThreadPoolExecutor(6) as pool:
+            texts = list(pool.map(lambda i: ask_claude(prompt=f"Name: Person {i}", use_cache=False), range(6)))
+        assert all("# Person" in text for text in texts)
+        assert claude_stub.max_in_flight == 2
@@ -0,0 +1,75 @@
+"""
+Unit tests for the on-disk Claude response cache
+"""
+
+import os
+import time
+from pathlib import Path
+import sys
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+from utils.claude_helpers import ask_claude, ask_claude_async
+from utils.response_cache import ResponseCache, cache_key
+
+
+class TestResponseCache:
+    """Test storage, expiry and eviction"""
+
+    def test_roundtrip_and_ttl(self, tmp_path):
+        cache = ResponseCache(tmp_path, ttl=60)
+        key = cache_key({"prompt": "hi", "model": "m"})
+        assert cache.get(key) is None
+        cache.put(key, "hello")
+        assert cache.get(key) == "hello"
+
+        cache.ttl = 0
+        time.sleep(0.01)
+        assert cache.get(key) is None
+        assert not list(tmp_path.glob("*/*.json"))
+
+    def test_keys_depend_on_every_input(self):
+        base = {"prompt": "p", "model": "m", "max_tokens": 10, "temperature": 1.0}
+        keys = {cache_key(base)} | {cache_key({**base, field: "other"}) for field in base}
+        assert len(keys) == 5
+        assert cache_key(dict(reversed(list(base.items())))) == cache_key(base)
+
+    def test_lru_eviction(self, tmp_path):
+        cache = ResponseCache(tmp_path, max_bytes=300)
+        for i in range(3):
+            cache.put(f"{i:064x}", "x" * 50)
+            os.utime(cache._path(f"{i:064x}"), (1000 + i, 1000 + i))
+        cache.get(f"{0:064x}")  # Touch the oldest entry
+        cache.put(f"{3:064x}", "x" * 50)
+
+        remaining = sorted(p.stem[-1] for p in tmp_path.glob("*/*.json"))
+        assert remaining == ['0', '2', '3']
+
+
+class TestCachedAskClaude:
+    """Test that identical requests skip the API"""
+
+    def test_hit_skips_api_and_bypass(self, claude_stub):
+        first = ask_claude(prompt="Name: Ada", max_tokens=50)
+        start = time.perf_counter()
+        second = ask_claude(prompt="Name: Ada", max_tokens=50)
+        assert time.perf_counter() - start < 0.05
+        assert first == second
+        assert len(claude_stub.requests) == 1
+
+        ask_claude(prompt="Name: Ada", max_tokens=51)
+        ask_claude(prompt="Name: Ada", max_tokens=50, use_cache=False)
+        assert len(claude_stub.requests) == 3
+
+    def test_async_shares_cache(self, claude_stub):
+        ask_claude(prompt="Name: Grace", max_tokens=50)
+        text = claude_stub.run(ask_claude_async(prompt="Name: Grace", max_tokens=50))
+        assert "# Grace" in text
+        assert len(claude_stub.requests) == 1
+
+    def test_disabled_by_environment(self, claude_stub, monkeypatch):
+        monkeypatch.setenv("CLAUDE_CACHE", "0")
+        ask_claude(prompt="Name: Alan", max_tokens=50)
+        ask_claude(prompt="Name: Alan", max_tokens=50)
+        assert len(claude_stub.requests) == 2
@@ -0,0 +1,124 @@
+"""
+Unit tests for crash-safe batched writes
+"""
+
+import pytest
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+from safe_write import WriteBatch, resume, rollback, write_atomic
+from vault_scan import STATE_DIR
+
+
+@pytest.fixture
+def notes(temp_vault):
+    paths = []
+    for i in range(5):
+        note = temp_vault / f"note{i}.md"
+        note.write_text(f"original {i}")
+        paths.append(note)
+    return paths
+
+
+class Interrupted(Exception):
+    pass
+
+
+class TestWriteBatch:
+    """Test staging, committing and recovery"""
+
+    def test_commits_all_files(self, temp_vault, notes):
+        with WriteBatch(temp_vault, batch_size=2) as batch:
+            for i, note in enumerate(notes):
+                batch.write(note, f"new {i}")
+
+        assert [n.read_text() for n in notes] == [f"new {i}" for i in range(5)]
+        assert batch.committed == [f"note{i}.md" for i in range(5)]
+        assert not (temp_vault / STATE_DIR / "write-journal.json").exists()
+        assert not (temp_vault / STATE_DIR / "staging").exists()
+
+    def test_syncs_batch_before_renames(self, temp_vault, notes, monkeypatch):
+        import safe_write
+        events = []
+        fsync_path, replace = safe_write._fsync_path, safe_write.os.replace
+        monkeypatch.setattr(safe_write, '_fsync_path',
+                            lambda path, data_only=False: events.append(('sync', Path(path).name))
+                            or fsync_path(path, data_only))
+        monkeypatch.setattr(safe_write.os, 'replace',
+                            lambda src, dst: events.append(('replace', Path(dst).name)) or replace(src, dst))
+        (temp_vault / "sub").mkdir()
+        nested = temp_vault / "sub" / "nested.md"
+
+        with WriteBatch(temp_vault, batch_size=10) as batch:
+            for note in notes[:3] + [nested]:
+                batch.write(note, "new")
+
+        names = [name for _, name in events]
+        renames = [names.index(n.name) for n in notes[:3] + [nested] if ('replace', n.name) in events]
+        temp_syncs = [i for i, (kind, name) in enumerate(events) if kind == 'sync' and name.endswith('.tmp')]
+        assert len(temp_syncs) == 4 and max(temp_syncs) < min(renames)
+        after = events[max(renames):]
+        assert after.count(('sync', temp_vault.name)) == 1
+        assert after.count(('sync', 'sub')) == 1
+
+    def test_uncommitted_writes_are_discarded(self, temp_vault, notes):
+        with pytest.raises(Interrupted):
+            with WriteBatch(temp_vault, batch_size=10) as batch:
+                batch.write(notes[0], "new 0")
+                raise Interrupted()
+
+        assert notes[0].read_text() == "original 0"
+        assert not (temp_vault / STATE_DIR / "write-journal.json").exists()
+
+    def test_rollback_interrupted_run(self, temp_vault, notes):
+        with pytest.raises(Interrupted):
+            with WriteBatch(temp_vault, batch_size=2) as batch:
+                batch.write(notes[0], "new 0")
+                batch.write(temp_vault / "created.md", "created")
+                batch.write(notes[1], "new 1")
+                raise Interrupted()
+
+        # The first batch of two was committed before the interruption
+        assert notes[0].read_text() == "new 0"
+        assert (temp_vault / "created.md").exists()
+        assert notes[1].read_text() == "original 1"
+
+        assert rollback(temp_vault) == 2
+        assert [n.read_text() for n in notes[:2]] == ["original 0", "original 1"]
+        assert not (temp_vault / "created.md").exists()
+
+    def test_resume_finishes_pending_renames(self, temp_vault, notes, monkeypatch):
+        import safe_write
+
+        replaced = []
+        real_replace = safe_write.os.replace
+
+        def crash_after_first(src, dst):
+            if str(dst).endswith('.md'):
+                if replaced:
+                    raise Interrupted()
+                replaced.append(dst)
+            real_replace(src, dst)
+
+        monkeypatch.setattr(safe_write.os, 'replace', crash_after_first)
+        with pytest.raises(Interrupted):
+            with WriteBatch(temp_vault) as batch:
+                batch.write(notes[0], "new 0")
+                batch.write(notes[1], "new 1")
+                batch.commit()
+        monkeypatch.setattr(safe_write.os, 'replace', real_replace)
+
+        assert notes[1].read_text() == "original 1"
+        assert resume(temp_vault) == 1
+        assert [n.read_text() for n in notes[:2]] == ["new 0", "new 1"]
+
+    def test_write_atomic(self, temp_vault):
+        note = temp_vault / "note.md"
+        note.write_text("old")
+        write_atomic(note, "new")
+
+        assert note.read_text() == "new"
+        assert [p.name for p in temp_vault.iterdir() if p.name.startswith('.note')] == []
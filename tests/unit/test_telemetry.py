@@ -0,0 +1,85 @@
+"""
+Unit tests for per-call Claude telemetry
+"""
+
+import json
+from pathlib import Path
+import sys
+
+# Add amplifier-tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'amplifier-tools'))
+
+import pytest
+
+from utils.claude_helpers import ask_claude, ask_claude_async, ask_claude_batch, stream_claude
+from utils.telemetry import load_calls, percentile, summarize, telemetry_path
+
+
+class TestRecording:
+    """Test what each kind of call logs"""
+
+    def test_sync_async_stream_and_batch_calls(self, claude_stub):
+        ask_claude(prompt_template="person_page_generation.md", context={"person_data": "Name: Ada"})
+        ask_claude(prompt_template="person_page_generation.md", context={"person_data": "Name: Ada"})
+        claude_stub.run(ask_claude_async(prompt="Name: Bob", use_cache=False))
+        list(stream_claude(prompt="Name: Cy", max_tokens=50))
+        list(ask_claude_batch({"a": "Name: Di", "b": "Name: fail"}, poll_seconds=0, template="batch.md"))
+
+        calls = load_calls()
+        assert [(c["mode"], c["cache"], c["status"]) for c in calls] == [
+            ("sync", "miss", "ok"), ("sync", "hit", "ok"), ("async", "off", "ok"),
+            ("stream", "miss", "ok"), ("batch", "miss", "error"), ("batch", "miss", "ok"),
+        ]
+        first = calls[0]
+        assert first["template"] == "person_page_generation.md"
+        assert (first["input_tokens"], first["output_tokens"], first["retries"]) == (100, 20, 0)
+        assert first["wall_ms"] >= 0
+        assert calls[1]["input_tokens"] == 0
+        assert calls[3]["ttfb_ms"] <= calls[3]["wall_ms"]
+        assert calls[4]["error"] == "bad person"
+
+    def test_retries_and_errors(self, claude_stub):
+        failures = iter([529])
+        respond = claude_stub.respond
+
+        def flaky(body):
+            status = next(failures, None)
+            if status:
+                return status, {"type": "error", "error": {"type": "overloaded_error", "message": "busy"}}
+            return respond(body)
+
+        claude_stub.respond = flaky
+        ask_claude(prompt="Name: Ada", use_cache=False)
+        with pytest.raises(Exception):
+            ask_claude(prompt="Name: fail", use_cache=False)
+
+        calls = load_calls()
+        assert calls[0]["retries"] == 1 and calls[0]["status"] == "ok"
+        assert calls[1]["status"] == "error" and calls[1]["error"] == "BadRequestError"
+
+    def test_disabled(self, claude_stub, monkeypatch):
+        monkeypatch.setenv("CLAUDE_TELEMETRY", "0")
+        assert telemetry_path() is None
+        ask_claude(prompt="Name: Ada")
+
+
+class TestSummary:
+    """Test the per-template summary"""
+
+    def test_percentiles_and_totals(self, tmp_path):
+        log = tmp_path / "calls.jsonl"
+        rows = [{"ts": "2026-01-01T00:00:00+00:00", "template": "a.md", "cache": "miss", "status": "ok",
+                 "wall_ms": float(ms), "input_tokens": 10, "output_tokens": 5, "retries": 0}
+                for ms in range(1, 21)]
+        rows.append({**rows[0], "cache": "hit", "wall_ms": 0.1})
+        rows.append({**rows[0], "template": None, "status": "error", "retries": 2})
+        log.write_text("".join(json.dumps(r) + "\n" for r in rows) + '{"torn')
+
+        summary = summarize(load_calls(log))
+        assert summary["a.md"]["calls"] == 21
+        assert summary["a.md"]["cache_hits"] == 1
+        assert (summary["a.md"]["p50_ms"], summary["a.md"]["p95_ms"]) == (10.0, 19.0)
+        assert summary["a.md"]["input_tokens"] == 210
+        assert summary["(prompt)"]["errors"] == 1
+        assert summary["(prompt)"]["p50_ms"] is None
+        assert percentile([5.0], 95) == 5.0
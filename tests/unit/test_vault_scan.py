@@ -0,0 +1,142 @@
+"""
+Unit tests for the vault scan manifest
+"""
+
+import os
+import pytest
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+import fix_broken_links
+from vault_scan import (VaultManifest, file_contains_any, normalize_link,
+                        parse_frontmatter, parse_links)
+
+
+class TestParsing:
+    """Test link and frontmatter parsing used by the manifest"""
+
+    def test_parse_links_by_kind(self):
+        content = """
+        ![[image.png]] and [[Person Name]] and [[Person Name|alias]]
+        ![shot](Resources/Images/shot%201.png) [site](https://example.com)
+        """
+        links = parse_links(content)
+
+        assert links['embeds'] == ['image.png']
+        assert links['wikilinks'] == ['Person Name', 'Person Name|alias']
+        assert links['mdlinks'] == ['Resources/Images/shot%201.png']
+
+    def test_normalize_link(self):
+        assert normalize_link('Person Name|alias') == 'Person Name'
+        assert normalize_link('Note#Heading') == 'Note'
+        assert normalize_link('shot%201.png') == 'shot 1.png'
+        assert normalize_link('<my file.pdf>') == 'my file.pdf'
+
+    def test_parse_frontmatter(self):
+        content = """---
+tags: people
+emails: [john@example.com, jsmith@company.org]
+aliases:
+  - John
+  - J. Smith
+reminders:
+  listName: "John Smith"
+---
+
+# John Smith
+"""
+        fm = parse_frontmatter(content)
+
+        assert fm['tags'] == 'people'
+        assert fm['emails'] == ['john@example.com', 'jsmith@company.org']
+        assert fm['aliases'] == ['John', 'J. Smith']
+        assert 'listName' in fm['reminders']
+        assert parse_frontmatter('# No frontmatter') is None
+
+
+class TestPrefilter:
+    """Test the byte-level prefilter"""
+
+    def test_marker_groups(self, tmp_path):
+        note = tmp_path / "note.md"
+        note.write_text("See ![[スクリーンショット 2024-11-21 16.56.03.png]]")
+
+        assert file_contains_any(note, [b'[[', b']('])
+        assert file_contains_any(note, [b'[['], ['スクリーンショット'.encode('utf-8')])
+        assert not file_contains_any(note, [b'[['], [b'other.pdf'])
+        assert not file_contains_any(note, [b'tags:'])
+
+    def test_empty_and_missing_files(self, tmp_path):
+        empty = tmp_path / "empty.md"
+        empty.write_bytes(b'')
+
+        assert not file_contains_any(empty, [b'[['])
+        assert file_contains_any(tmp_path / "missing.md", [b'[['])
+
+    def test_rewrite_skips_notes_without_links(self, tmp_path, monkeypatch):
+        note = tmp_path / "note.md"
+        note.write_text("Plain text mentioning old.pdf")
+        monkeypatch.setattr('builtins.open', _fail_text_open(open))
+
+        assert fix_broken_links.rewrite_note(note, moved_files={'old.pdf': 'Resources/PDFs/old.pdf'}) == (None, [], [])
+
+
+def _fail_text_open(real_open):
+    def fake_open(file, mode='r', *args, **kwargs):
+        if 'b' not in mode:
+            raise AssertionError(f"decoded {file}")
+        return real_open(file, mode, *args, **kwargs)
+    return fake_open
+
+
+class TestVaultManifest:
+    """Test incremental rescans"""
+
+    def test_rescan_only_reads_changed_files(self, temp_vault):
+        (temp_vault / "a.md").write_text("![[one.png]]")
+        (temp_vault / "b.md").write_text("[[Someone]]")
+        (temp_vault / "Resources" / "Images" / "one.png").write_bytes(b'png')
+
+        manifest = VaultManifest(temp_vault).load().refresh()
+        manifest.save()
+        assert set(manifest.changed) == {'a.md', 'b.md', 'Resources/Images/one.png'}
+
+        manifest = VaultManifest(temp_vault).load().refresh()
+        assert manifest.changed == []
+
+        b = temp_vault / "b.md"
+        b.write_text("![[two.png]]")
+        os.utime(b, ns=(0, 1))
+        (temp_vault / "a.md").unlink()
+        manifest.refresh()
+
+        assert manifest.changed == ['b.md']
+        assert manifest.removed == ['a.md']
+        assert manifest.links('b.md', kinds=('embeds',)) == ['two.png']
+
+    def test_files_linking_to(self, temp_vault):
+        (temp_vault / "a.md").write_text("![[old.pdf]]")
+        (temp_vault / "b.md").write_text("![[other.pdf]]")
+        manifest = VaultManifest(temp_vault).refresh()
+
+        assert manifest.files_linking_to({'old.pdf'}) == ['a.md']
+
+    def test_fix_broken_links_rerun_skips_unchanged(self, temp_vault, monkeypatch):
+        note = temp_vault / "note.md"
+        note.write_text("![[old.pdf]]")
+        (temp_vault / "other.md").write_text("Nothing to fix")
+        monkeypatch.setattr(fix_broken_links, 'SWITCHBOARD', str(temp_vault))
+        monkeypatch.setattr(fix_broken_links, 'MOVED_FILES',
+                            {'old.pdf': 'Resources/PDFs/old.pdf'})
+
+        fix_broken_links.main([])
+        assert note.read_text() == "![[Resources/PDFs/old.pdf]]"
+
+        opened = []
+        monkeypatch.setattr(fix_broken_links, 'rewrite_note',
+                            lambda *args: opened.append(args))
+        fix_broken_links.main([])
+        assert opened == []
@@ -0,0 +1,131 @@
+"""
+Unit tests for the link repair watcher
+"""
+
+import os
+import pytest
+from pathlib import Path
+import sys
+
+# Add tools directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'tools'))
+
+from link_index import retarget_links
+from vault_scan import VaultManifest
+from watch_links import InotifySource, LinkWatcher, PollingSource, inotify_available
+
+
+@pytest.fixture
+def vault(temp_vault):
+    (temp_vault / "Resources" / "PDFs" / "report.pdf").write_bytes(b'pdf')
+    (temp_vault / "Attachments" / "diagram.png").write_bytes(b'png')
+    (temp_vault / "Project.md").write_text("# Project")
+    (temp_vault / "dailynote" / "2025-01-01.md").write_text(
+        "[[Project|the project]]\n"
+        "![[diagram.png|300]]\n"
+        "[report](Resources/PDFs/report.pdf#page=2)\n"
+        "![[Resources/PDFs/report.pdf]]\n"
+    )
+    (temp_vault / "Other.md").write_text("No links here")
+    return temp_vault
+
+
+def watcher_for(vault):
+    return LinkWatcher(VaultManifest(vault).load().refresh())
+
+
+class TestRetargetLinks:
+    """Test rewriting link targets in place"""
+
+    def test_keeps_aliases_headings_and_escapes(self):
+        mapping = {'Old/Note': ('New/Note', 'New/Note.md'),
+                   'a b.pdf': ('Docs/a b.pdf', 'Docs/a b.pdf')}
+        content, changes = retarget_links(
+            "[[Old/Note#Intro|alias]] [x](a%20b.pdf \"t\") [y](<a b.pdf>) [z](https://a b.pdf)", mapping)
+        assert content == ("[[New/Note#Intro|alias]] [x](Docs/a%20b.pdf \"t\") "
+                           "[y](<Docs/a b.pdf>) [z](https://a b.pdf)")
+        assert len(changes) == 3
+
+
+class TestLinkWatcher:
+    """Test applying file events to the backlink map"""
+
+    def test_move_rewrites_path_links_only(self, vault):
+        watcher = watcher_for(vault)
+        note = vault / "dailynote" / "2025-01-01.md"
+        other_mtime = (vault / "Other.md").stat().st_mtime_ns
+
+        (vault / "Archive").mkdir()
+        os.rename(vault / "Resources" / "PDFs" / "report.pdf", vault / "Archive" / "report.pdf")
+        os.rename(vault / "Attachments" / "diagram.png", vault / "Resources" / "Images" / "diagram.png")
+        os.rename(vault / "Project.md", vault / "Meetings" / "Project.md")
+        fixed = watcher.handle([
+            ('moved', 'Resources/PDFs/report.pdf', 'Archive/report.pdf'),
+            ('moved', 'Attachments/diagram.png', 'Resources/Images/diagram.png'),
+            ('moved', 'Project.md', 'Meetings/Project.md'),
+        ])
+
+        assert [rel for rel, _ in fixed] == ['dailynote/2025-01-01.md']
+        assert note.read_text() == (
+            "[[Project|the project]]\n"
+            "![[diagram.png|300]]\n"
+            "[report](Archive/report.pdf#page=2)\n"
+            "![[report.pdf]]\n"
+        )
+        assert (vault / "Other.md").stat().st_mtime_ns == other_mtime
+        assert watcher.backlinks['Archive/report.pdf'] == {'dailynote/2025-01-01.md'}
+        assert 'Archive/report.pdf' in watcher.manifest.entries
+
+    def test_ambiguous_name_keeps_full_path(self, vault):
+        (vault / "Archive").mkdir()
+        (vault / "Archive" / "report.pdf").write_bytes(b'other')
+        watcher = watcher_for(vault)
+
+        os.rename(vault / "Resources" / "PDFs" / "report.pdf", vault / "Resources" / "report.pdf")
+        watcher.handle([('moved', 'Resources/PDFs/report.pdf', 'Resources/report.pdf')])
+
+        content = (vault / "dailynote" / "2025-01-01.md").read_text()
+        assert "![[Resources/report.pdf]]" in content
+
+    def test_created_file_resolves_dangling_links(self, vault):
+        (vault / "Later.md").write_text("[[Missing]]")
+        watcher = watcher_for(vault)
+        assert 'Later.md' in watcher.dangling
+
+        (vault / "Missing.md").write_text("now here")
+        watcher.handle([('created', 'Missing.md')])
+        assert watcher.backlinks['Missing.md'] == {'Later.md'}
+        assert 'Later.md' not in watcher.dangling
+
+
+class TestEventSources:
+    """Test recognising moves from the file system"""
+
+    def test_polling_matches_moves_by_inode(self, vault):
+        manifest = VaultManifest(vault).load().refresh()
+        source = PollingSource(manifest)
+
+        os.rename(vault / "Project.md", vault / "People" / "Project.md")
+        (vault / "New.md").write_text("new")
+        os.remove(vault / "Other.md")
+
+        assert sorted(source.read()) == [
+            ('created', 'New.md'),
+            ('deleted', 'Other.md'),
+            ('moved', 'Project.md', 'People/Project.md'),
+        ]
+
+    @pytest.mark.skipif(not inotify_available(), reason="inotify is Linux only")
+    def test_inotify_moves(self, vault):
+        source = InotifySource(vault)
+        try:
+            os.rename(vault / "Project.md", vault / "People" / "Project.md")
+            assert source.read(2) == [('moved', 'Project.md', 'People/Project.md')]
+
+            os.rename(vault / "Resources", vault / "Library")
+            assert source.read(2) == [('moved_dir', 'Resources', 'Library')]
+
+            (vault / "Library" / "PDFs" / "new.pdf").write_bytes(b'pdf')
+            assert source.read(2) == [('modified', 'Library/PDFs/new.pdf')]
+        finally:
+            source.close()
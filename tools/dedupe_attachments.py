@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Remove duplicate attachments and point their embeds at one copy
+
+Only attachments are considered: files in Resources/ or Attachments/
+with an image, PDF, audio or video extension. They are grouped by size
+from the scan manifest, so only files that share a size are hashed. Each group of identical files keeps one
+canonical copy, every link to another copy (from notes and canvases) is
+rewritten to it, and the
+extra copies go to Obsidian's .trash folder (or are deleted):
+
+    python tools/dedupe_attachments.py --dry-run
+    python tools/dedupe_attachments.py [--delete]
+"""
+
+import argparse
+import json
+import re
+import shutil
+from pathlib import Path
+
+from detect_renames import HASH_JOBS, HashCache, hash_files
+from link_index import LinkIndex, build_backlinks, canvas_references, link_targets, retarget_links
+from safe_write import WriteBatch
+from vault_scan import SIZE, SWITCHBOARD, VaultManifest, format_size
+
+TRASH_DIR = '.trash'
+
+# Folders attachments live in, and the file types that count as one
+ATTACHMENT_DIRS = ('Resources/', 'Attachments/')
+ATTACHMENT_EXTENSIONS = {
+    '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.bmp', '.heic',
+    '.pdf',
+    '.mp3', '.m4a', '.wav', '.ogg', '.flac',
+    '.mp4', '.mov', '.webm', '.mkv',
+}
+
+# "scan (1).pdf" and "scan copy 2.pdf" are how browsers and Finder name a
+# copy; a bare number ("Pasted image 20230905025353.png") is not a copy
+COPY_SUFFIX_RE = re.compile(r'(?: \(\d+\)| copy(?: \d+)?)(\.[^./]+)?$', re.IGNORECASE)
+
+
+def is_attachment(rel):
+    return rel.startswith(ATTACHMENT_DIRS) and Path(rel).suffix.lower() in ATTACHMENT_EXTENSIONS
+
+
+def retarget_canvas(content, duplicates):
+    """Point a canvas's file nodes at canonical copies; returns the new content or None"""
+    data = json.loads(content)
+    changed = False
+    for node in data.get('nodes') or []:
+        if isinstance(node, dict) and node.get('file') in duplicates:
+            node['file'] = duplicates[node['file']]
+            changed = True
+    # Obsidian writes canvases tab-indented
+    return json.dumps(data, ensure_ascii=False, indent='\t') if changed else None
+
+
+def find_duplicate_groups(manifest, jobs=HASH_JOBS, refs=None):
+    """Groups of identical attachments, each sorted with its canonical copy first.
+
+    ``refs`` counts the notes linking to each file. The canonical copy is
+    the one most notes link to, so the fewest need rewriting; ties go to
+    ``canonical_key``.
+    """
+    refs = refs or {}
+    by_size = {}
+    for rel, record in manifest.entries.items():
+        if is_attachment(rel) and record[SIZE] > 0:
+            by_size.setdefault(record[SIZE], []).append(rel)
+    candidates = [rel for rels in by_size.values() if len(rels) > 1 for rel in rels]
+
+    cache = HashCache(manifest.root).load()
+    hashes = hash_files(manifest, candidates, cache, jobs)
+    cache.save()
+
+    by_hash = {}
+    for rel, sha1 in hashes.items():
+        by_hash.setdefault((manifest.entries[rel][SIZE], sha1), []).append(rel)
+    return sorted(sorted(rels, key=lambda rel: (-refs.get(rel, 0), canonical_key(rel)))
+                  for rels in by_hash.values() if len(rels) > 1)
+
+
+def canonical_key(rel):
+    """Sort key preferring original names, then the copy Obsidian would resolve to"""
+    name = rel.rpartition('/')[2]
+    return (bool(COPY_SUFFIX_RE.search(name)), rel.count('/'), len(rel), rel)
+
+
+def plan_link_fixes(manifest, duplicates, index=None):
+    """Links to rewrite so nothing points at a removed copy.
+
+    ``duplicates`` maps each extra copy to its canonical path. Returns
+    {note: {link: (wikilink, mdlink)}}; links that will resolve to the
+    canonical copy anyway, such as ``![[name.png]]`` when only one copy
+    of that name is left, are not touched.
+    """
+    index = index or LinkIndex.from_manifest(manifest)
+    pointing = []
+    for note in manifest.notes():
+        for link in manifest.links(note):
+            target = index.resolve(link, note)
+            if target in duplicates:
+                pointing.append((note, link, duplicates[target]))
+
+    for rel in duplicates:
+        index.remove(rel)
+
+    fixes = {}
+    for note, link, canonical in pointing:
+        if index.resolve(link, note) != canonical:
+            fixes.setdefault(note, {})[link] = link_targets(index, canonical, note, link)
+    return fixes
+
+
+def dedupe_attachments(manifest, delete=False, dry_run=False, jobs=HASH_JOBS):
+    """Dedupe the vault's attachments.
+
+    Returns ``(extra copies, bytes reclaimed, notes and canvases updated)``.
+    """
+    index = LinkIndex.from_manifest(manifest)
+    refs = {rel: len(notes) for rel, notes in build_backlinks(manifest, index).items()}
+    canvases = canvas_references(manifest)
+    for files in canvases.values():
+        for rel in files:
+            refs[rel] = refs.get(rel, 0) + 1
+    groups = find_duplicate_groups(manifest, jobs, refs)
+    duplicates = {rel: group[0] for group in groups for rel in group[1:]}
+    fixes = plan_link_fixes(manifest, duplicates, index)
+    canvas_fixes = sorted(rel for rel, files in canvases.items() if files & duplicates.keys())
+
+    for group in groups:
+        print(f"\n📎 {group[0]}")
+        for rel in group[1:]:
+            print(f"  ✗ {rel}")
+
+    size = sum(manifest.entries[rel][SIZE] for rel in duplicates)
+    print(f"\n  {len(duplicates)} duplicate copies in {len(groups)} groups, "
+          f"{format_size(size)} reclaimable, {len(fixes)} notes and "
+          f"{len(canvas_fixes)} canvases link to them")
+    if dry_run or not duplicates:
+        return len(duplicates), 0, 0
+
+    # Links first: if the run stops half way every link still resolves
+    written = {}
+    with WriteBatch(manifest.root, label='dedupe_attachments') as batch:
+        for note, mapping in sorted(fixes.items()):
+            path = manifest.abspath(note)
+            with open(path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            new_content, changes = retarget_links(content, mapping)
+            if new_content != content:
+                written[note] = new_content.encode('utf-8')
+                batch.write(path, written[note])
+                print(f"\n✓ Fixed {note}:")
+                for change in changes:
+                    print(change)
+        for canvas in canvas_fixes:
+            path = manifest.abspath(canvas)
+            with open(path, 'r', encoding='utf-8') as f:
+                new_content = retarget_canvas(f.read(), duplicates)
+            if new_content is not None:
+                written[canvas] = new_content.encode('utf-8')
+                batch.write(path, written[canvas])
+                print(f"\n✓ Fixed {canvas}")
+    for note, data in written.items():
+        manifest.update_entry(note, data)
+
+    trash = Path(manifest.root) / TRASH_DIR
+    removed = 0
+    reclaimed = 0
+    for rel in duplicates:
+        path = Path(manifest.abspath(rel))
+        try:
+            if delete:
+                path.unlink()
+            else:
+                dest = trash / rel
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                shutil.move(str(path), str(dest))
+        except OSError as e:
+            print(f"  ✗ Error removing {rel}: {e}")
+            continue
+        removed += 1
+        reclaimed += manifest.entries[rel][SIZE]
+        manifest.remove_entry(rel)
+    manifest.save()
+    return removed, reclaimed, len(written)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Remove duplicate attachments from the vault')
+    parser.add_argument('vault', nargs='?', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('--dry-run', action='store_true', help='Only list the duplicates')
+    parser.add_argument('--delete', action='store_true',
+                        help=f'Delete extra copies instead of moving them to {TRASH_DIR}/')
+    parser.add_argument('-j', '--jobs', type=int, default=HASH_JOBS, help='Hashing threads')
+    args = parser.parse_args(argv)
+
+    print("🧹 Looking for duplicate attachments...")
+    print("=" * 50)
+    manifest = VaultManifest(args.vault).load().refresh()
+    removed, reclaimed, notes = dedupe_attachments(manifest, args.delete, args.dry_run, args.jobs)
+
+    print("\n" + "=" * 50)
+    if args.dry_run:
+        print("✅ Dry run, nothing changed")
+        return
+    print(f"✅ Complete!")
+    print(f"  Copies {'deleted' if args.delete else f'moved to {TRASH_DIR}/'}: {removed}")
+    print(f"  Space reclaimed: {format_size(reclaimed)}")
+    print(f"  Notes and canvases updated: {notes}")
+
+
+if __name__ == "__main__":
+    main()
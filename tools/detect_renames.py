@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Detect files that were moved or renamed between two vault snapshots
+
+A snapshot records the size and content hash of every file. Files that
+vanished from one path and appeared at another with the same size and
+hash are moves, written out as a move plan for fix_broken_links.py:
+
+    python tools/detect_renames.py snapshot            # before reorganizing
+    python tools/detect_renames.py diff <snapshot>     # after; saves a plan
+    python tools/fix_broken_links.py --plan .vault-tools/move-plan-<time>.json
+
+Hashes are computed in parallel and cached by (inode, size, mtime), so
+only new or modified files are read again.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+from fix_broken_links import save_move_plan
+from vault_scan import INO, MTIME_NS, SHA1, SIZE, STATE_DIR, SWITCHBOARD, VaultManifest
+
+SNAPSHOT_VERSION = 1
+HASH_CACHE_NAME = 'hash-cache.json'
+CHUNK_SIZE = 1 << 20
+HASH_JOBS = 8
+
+
+def hash_file(path):
+    """SHA-1 of a file, read in chunks so large attachments stay out of memory"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashCache:
+    """Content hashes of attachments keyed by inode, size and mtime"""
+
+    def __init__(self, root=SWITCHBOARD):
+        self.path = Path(root) / STATE_DIR / HASH_CACHE_NAME
+        self.hashes = {}
+        self._used = {}
+
+    def load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.hashes = json.load(f)
+        except (OSError, ValueError):
+            self.hashes = {}
+        return self
+
+    @staticmethod
+    def key(record):
+        return f'{record[INO]}:{record[SIZE]}:{record[MTIME_NS]}'
+
+    def get(self, record):
+        key = self.key(record)
+        sha1 = self.hashes.get(key)
+        if sha1 is not None:
+            self._used[key] = sha1
+        return sha1
+
+    def put(self, record, sha1):
+        self._used[self.key(record)] = sha1
+
+    def save(self, prune=False):
+        """Write new hashes; ``prune`` keeps only those used in this run"""
+        hashes = self._used if prune else {**self.hashes, **self._used}
+        if hashes == self.hashes:
+            return
+        self.hashes = hashes
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.hashes, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+
+def hash_files(manifest, rels, cache, jobs=HASH_JOBS):
+    """Content hashes of manifest files, from the cache or a thread pool.
+
+    Returns {rel: sha1}; files that can't be read are left out.
+    """
+    hashes = {}
+    missing = []
+    for rel in rels:
+        record = manifest.entries[rel]
+        sha1 = record[SHA1] if len(record) > SHA1 else cache.get(record)
+        if sha1 is None:
+            missing.append(rel)
+        else:
+            hashes[rel] = sha1
+
+    if missing:
+        print(f"  #️⃣  Hashing {len(missing)} new or changed files...")
+
+    def hash_one(rel):
+        try:
+            return hash_file(manifest.abspath(rel))
+        except OSError:
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        for rel, sha1 in zip(missing, pool.map(hash_one, missing)):
+            if sha1 is not None:
+                hashes[rel] = sha1
+                cache.put(manifest.entries[rel], sha1)
+    return hashes
+
+
+def take_snapshot(root=SWITCHBOARD, jobs=HASH_JOBS):
+    """Size, mtime, inode and hash of every file in the vault.
+
+    Records use the manifest's field order (SIZE, MTIME_NS, INO, SHA1).
+    Notes reuse the hashes already in the scan manifest; other files are
+    looked up in the hash cache and only the misses are read, across a
+    thread pool.
+    """
+    manifest = VaultManifest(root).load().refresh()
+    manifest.save()
+    cache = HashCache(root).load()
+    hashes = hash_files(manifest, list(manifest.entries), cache, jobs)
+    cache.save(prune=True)
+
+    files = {rel: [record[SIZE], record[MTIME_NS], record[INO], hashes.get(rel)]
+             for rel, record in manifest.entries.items()}
+    return {
+        'version': SNAPSHOT_VERSION,
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'files': files,
+    }
+
+
+def save_snapshot(snapshot, root=SWITCHBOARD, path=None):
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    path = Path(path) if path else Path(root) / STATE_DIR / f'snapshot-{stamp}.json'
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False, separators=(',', ':'))
+    return path
+
+
+def load_snapshot(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    if snapshot.get('version') != SNAPSHOT_VERSION:
+        raise ValueError(f"{path} is not a version {SNAPSHOT_VERSION} snapshot")
+    return snapshot
+
+
+def _basename(rel):
+    return rel.rpartition('/')[2]
+
+
+def detect_moves(old_files, new_files):
+    """Pair vanished and appeared files with the same size and hash.
+
+    Returns ``(moves, ambiguous)``: ``moves`` maps old to new relative
+    paths. When several identical files moved, pairs are made by file name
+    and then inode; the rest are listed in ``ambiguous`` as
+    ``(old paths, new paths)`` rather than guessed.
+    """
+    vanished = {}
+    for rel in old_files.keys() - new_files.keys():
+        record = old_files[rel]
+        if record[SHA1] is not None:
+            vanished.setdefault((record[SIZE], record[SHA1]), []).append(rel)
+    appeared = {}
+    for rel in new_files.keys() - old_files.keys():
+        key = (new_files[rel][SIZE], new_files[rel][SHA1])
+        if key in vanished:
+            appeared.setdefault(key, []).append(rel)
+
+    moves = {}
+    ambiguous = []
+    for key, targets in appeared.items():
+        sources = sorted(vanished[key])
+        targets = sorted(targets)
+        if len(sources) == 1 and len(targets) == 1:
+            moves[sources[0]] = targets[0]
+            continue
+        for pair_key in (lambda rel, files: _basename(rel),
+                         lambda rel, files: files[rel][INO]):
+            for source in list(sources):
+                wanted = pair_key(source, old_files)
+                matches = [t for t in targets if pair_key(t, new_files) == wanted]
+                if len(matches) == 1:
+                    moves[source] = matches[0]
+                    sources.remove(source)
+                    targets.remove(matches[0])
+        if sources and targets:
+            ambiguous.append((sources, targets))
+    return dict(sorted(moves.items())), ambiguous
+
+
+def move_plan(moves, old_files):
+    """Turn detected moves into a plan fix_broken_links.py --plan can use.
+
+    Links may name a file by path or, when its name is unique, by name
+    alone, so a renamed file with a unique old name is listed both ways.
+    """
+    names = {}
+    for rel in old_files:
+        names[_basename(rel)] = names.get(_basename(rel), 0) + 1
+    plan = {}
+    for old, new in moves.items():
+        plan[old] = new
+        name = _basename(old)
+        if name != _basename(new) and names[name] == 1:
+            plan.setdefault(name, new)
+    return plan
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Detect moved files between vault snapshots')
+    parser.add_argument('--vault', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('-j', '--jobs', type=int, default=HASH_JOBS, help='Hashing threads')
+    sub = parser.add_subparsers(dest='command', required=True)
+    snap = sub.add_parser('snapshot', help='Record the current state of the vault')
+    snap.add_argument('-o', '--output', help='Snapshot file (default: .vault-tools/snapshot-<time>.json)')
+    diff = sub.add_parser('diff', help='Compare a snapshot with the vault (or a second snapshot)')
+    diff.add_argument('old', help='Earlier snapshot')
+    diff.add_argument('new', nargs='?', help='Later snapshot (default: snapshot the vault now)')
+    diff.add_argument('--no-plan', action='store_true', help="Print the moves without saving a plan")
+    args = parser.parse_args(argv)
+
+    if args.command == 'snapshot':
+        print("📸 Snapshotting vault...")
+        snapshot = take_snapshot(args.vault, args.jobs)
+        path = save_snapshot(snapshot, args.vault, args.output)
+        print(f"  ✓ {len(snapshot['files'])} files recorded in {path}")
+        return
+
+    print("🔍 Detecting moved files...")
+    old = load_snapshot(args.old)
+    new = load_snapshot(args.new) if args.new else take_snapshot(args.vault, args.jobs)
+    moves, ambiguous = detect_moves(old['files'], new['files'])
+
+    for source, target in moves.items():
+        print(f"  {source} → {target}")
+    for sources, targets in ambiguous:
+        print(f"  ⚠️  Identical files, can't tell which moved where: "
+              f"{', '.join(sources)} → {', '.join(targets)}")
+    print(f"\n  Moves detected: {len(moves)}")
+
+    if moves and not args.no_plan:
+        plan_path = save_move_plan(move_plan(moves, old['files']), args.vault)
+        print(f"  ✓ Saved move plan to {plan_path}")
+        print(f"  Run: python tools/fix_broken_links.py --plan {plan_path}")
+
+
+if __name__ == "__main__":
+    main()
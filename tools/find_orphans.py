@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+List attachments that no note or canvas links to
+
+Builds a reverse-link index (file → notes linking to it) from the links
+the scan manifest recorded for every note, adds the files shown on
+.canvas boards, then reports the files in Resources/ and Attachments/
+that nothing references, largest first:
+
+    python tools/find_orphans.py [vault] [--min-age DAYS] [--json]
+"""
+
+import argparse
+import json
+import time
+
+from link_index import LinkIndex, build_backlinks, canvas_references
+from vault_scan import MTIME_NS, SIZE, SWITCHBOARD, VaultManifest, format_size
+
+ORPHAN_FOLDERS = ('Resources', 'Attachments')
+
+
+def find_orphans(manifest, folders=ORPHAN_FOLDERS, backlinks=None, now=None):
+    """Non-note files under ``folders`` that no note or canvas references.
+
+    Returns dicts with ``path``, ``size`` and ``age_days`` (since last
+    modified), largest first.
+    """
+    backlinks = build_backlinks(manifest, LinkIndex.from_manifest(manifest)) if backlinks is None else backlinks
+    referenced = set(backlinks)
+    for files in canvas_references(manifest).values():
+        referenced.update(files)
+    now = time.time() if now is None else now
+    prefixes = tuple(folder.rstrip('/') + '/' for folder in folders)
+    orphans = []
+    for rel, record in manifest.entries.items():
+        if rel.endswith('.md') or not rel.startswith(prefixes) or rel in referenced:
+            continue
+        orphans.append({
+            'path': rel,
+            'size': record[SIZE],
+            'age_days': round((now - record[MTIME_NS] / 1e9) / 86400, 1),
+        })
+    orphans.sort(key=lambda o: (-o['size'], o['path']))
+    return orphans
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='List attachments no note or canvas links to')
+    parser.add_argument('vault', nargs='?', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('--folder', action='append', dest='folders',
+                        help=f"Folder to check (repeatable, default: {', '.join(ORPHAN_FOLDERS)})")
+    parser.add_argument('--min-age', type=float, default=0, help='Only files untouched for this many days')
+    parser.add_argument('--json', action='store_true', help='Print the orphans as JSON')
+    args = parser.parse_args(argv)
+
+    manifest = VaultManifest(args.vault).load().refresh()
+    manifest.save()
+    orphans = [o for o in find_orphans(manifest, args.folders or ORPHAN_FOLDERS)
+               if o['age_days'] >= args.min_age]
+
+    if args.json:
+        print(json.dumps(orphans, ensure_ascii=False, indent=2))
+        return
+
+    print("🔍 Finding orphaned attachments...")
+    print("=" * 50)
+    for orphan in orphans:
+        print(f"  {format_size(orphan['size']):>9}  {orphan['age_days']:>7.1f}d  {orphan['path']}")
+    print("\n" + "=" * 50)
+    print(f"  Orphans: {len(orphans)}")
+    print(f"  Total size: {format_size(sum(o['size'] for o in orphans))}")
+
+
+if __name__ == "__main__":
+    main()
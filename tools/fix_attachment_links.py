@@ -7,35 +7,77 @@ import os
 import re
 from pathlib import Path
 
+from link_index import LinkIndex
+from safe_write import WriteBatch, write_atomic
+from vault_scan import VaultManifest, file_contains_any
+
 SWITCHBOARD = '/Users/<Owner>/switchboard'
 
-def fix_attachment_links(file_path):
-    """Fix links to point to Attachments folder"""
+# Embeds by bare filename, with an optional |size or #fragment suffix
+BARE_EMBED_PATTERN = r'!\[\[([^\]/|#]+)((?:[|#][^\]]*)?)\]\]'
+
+def list_attachments(vault=None):
+    """Files in Attachments/, listed once, as {case-folded name: name}"""
     try:
+        with os.scandir(Path(vault or SWITCHBOARD) / 'Attachments') as it:
+            return {entry.name.casefold(): entry.name for entry in it if entry.is_file()}
+    except FileNotFoundError:
+        return {}
+
+def outside_attachments_index(manifest):
+    """Link index of every file outside Attachments/"""
+    return LinkIndex(rel for rel in manifest.entries if not rel.startswith('Attachments/'))
+
+def is_broken_attachment(name, attachments, index, source=None):
+    """A bare embed that resolves to nothing unless Attachments/ is searched.
+
+    Matched case-insensitively, like Obsidian and the link index.
+    """
+    return '/' not in name and name.casefold() in attachments and index.resolve(name, source) is None
+
+def unresolved_attachments(names, attachments, index, source=None):
+    """Bare embed names that only exist in Attachments/"""
+    return [name for name in names if is_broken_attachment(name, attachments, index, source)]
+
+def fix_attachment_links(file_path, attachments, index, batch=None, source=None, written=None):
+    """Fix links to point to Attachments folder.
+    
+    Only embeds that resolve to no file outside Attachments/ are rewritten,
+    so links Obsidian already resolves elsewhere (e.g. Resources/) are left
+    alone. ``source`` is the note's vault-relative path; the new bytes of a
+    rewritten note are stored in ``written`` under it, if given.
+    """
+    try:
+        # Skip decoding notes without a single embed
+        if not file_contains_any(file_path, [b'![[']):
+            return None
+        
         with open(file_path, 'r', encoding='utf-8') as f:
             content = f.read()
         
         original_content = content
         changes_made = []
         
-        # Pattern to find Screen Shot references without path
-        pattern = r'!\[\[(Screen Shot [^]]+\.png)\]\]'
-        
         def replace_with_path(match):
-            filename = match.group(1)
-            # Check if file exists in Attachments
-            attachment_path = Path(SWITCHBOARD) / 'Attachments' / filename
-            if attachment_path.exists():
-                changes_made.append(f"  {filename} → Attachments/{filename}")
-                return f'![[Attachments/{filename}]]'
+            filename, suffix = match.group(1), match.group(2)
+            # Only embeds that are broken but exist in Attachments
+            if is_broken_attachment(filename, attachments, index, source):
+                name = attachments[filename.casefold()]
+                changes_made.append(f"  {filename} → Attachments/{name}")
+                return f'![[Attachments/{name}{suffix}]]'
             return match.group(0)
         
-        content = re.sub(pattern, replace_with_path, content)
+        content = re.sub(BARE_EMBED_PATTERN, replace_with_path, content)
         
         # Save if changes were made
         if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            data = content.encode('utf-8')
+            if batch is not None:
+                batch.write(file_path, data)
+            else:
+                write_atomic(file_path, data)
+            if written is not None:
+                written[source] = data
             return changes_made
         
         return None
@@ -48,36 +90,27 @@ def main():
     print("🔧 Fixing links to Attachments folder...")
     print("=" * 50)
     
-    # Files that need fixing based on grep results
+    # One listing of Attachments/ replaces a stat per match
+    attachments = list_attachments(SWITCHBOARD)
+    
+    # Find notes with broken bare embeds of attachments from the scan manifest
+    manifest = VaultManifest(SWITCHBOARD).load().refresh()
+    index = outside_attachments_index(manifest)
     files_to_fix = [
-        'dailynote/2021-07-28.md',
-        'dailynote/2021-11-30.md',
-        'dailynote/2022-08-09.md',
-        'dailynote/2022-04-01.md',
-        'dailynote/2021-07-16.md',
-        'dailynote/2021-09-21.md',
-        'dailynote/2021-10-04.md',
-        'dailynote/2022-02-02.md',
-        'dailynote/2022-07-18.md',
-        'dailynote/2021-07-21.md',
-        'dailynote/2022-08-04.md',
-        'dailynote/2021-12-22.md',
-        'dailynote/2021-12-16.md',
-        'dailynote/2021-12-06.md',
-        'dailynote/2022-08-01.md',
-        'dailynote/2022-06-28.md',
-        'Kio Ito.md',
-        'litnotes/@itoPracticeChange2018.md',
-        'Meetings/2021/2021-08-04-1400 DA Exec Member Meeting 3.md',
+        rel for rel in manifest.notes()
+        if unresolved_attachments(manifest.links(rel, kinds=('embeds',)),
+                                  attachments, index, rel)
     ]
+    print(f"📝 {len(files_to_fix)} notes embed attachments without a path")
     
     files_fixed = 0
     total_fixes = 0
+    written = {}
     
-    for file_rel in files_to_fix:
-        file_path = os.path.join(SWITCHBOARD, file_rel)
-        if os.path.exists(file_path):
-            changes = fix_attachment_links(file_path)
+    with WriteBatch(SWITCHBOARD, label='fix_attachment_links') as batch:
+        for file_rel in files_to_fix:
+            file_path = manifest.abspath(file_rel)
+            changes = fix_attachment_links(file_path, attachments, index, batch, file_rel, written)
             if changes:
                 print(f"\n✓ Fixed {file_rel}:")
                 for change in changes:
@@ -85,10 +118,15 @@ def main():
                 files_fixed += 1
                 total_fixes += len(changes)
     
+    # Record the rewritten notes once the batch has committed them
+    for file_rel, data in written.items():
+        manifest.update_entry(file_rel, data)
+    manifest.save()
+    
     print("\n" + "=" * 50)
     print(f"✅ Complete!")
     print(f"  Files updated: {files_fixed}")
     print(f"  Links fixed: {total_fixes}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
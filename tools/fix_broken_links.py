@@ -3,9 +3,18 @@
 Fix broken links after moving files to organized folders
 """
 
+import argparse
+import json
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote, unquote
+
+from safe_write import WriteBatch, write_atomic
+from vault_scan import (LINK_TARGET_PATTERN, STATE_DIR, VaultManifest, file_contains_any,
+                        normalize_link, parse_links)
 
 SWITCHBOARD = '/Users/<Owner>/switchboard'
 
@@ -61,35 +70,121 @@ MOVED_FILES = {
     'Pasted image 20230905025353.png': 'Resources/Images/Pasted image 20230905025353.png',
 }
 
-def fix_links_in_file(file_path):
-    """Fix broken links in a single markdown file"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
+# Notes without any of these bytes have no link to rewrite or report
+LINK_MARKERS = (b'[[', b'](')
+
+# Past this many moved files, scanning for each name costs more than it saves
+MAX_NAME_MARKERS = 64
+
+# Every ![[target]] embed and ](target) markdown link target in one pass.
+# Targets are looked up in the mapping afterwards, so a note is scanned
+# once no matter how many moved files there are, and only exact targets
+# are rewritten (test.pdf.backup is not test.pdf). Markdown targets may
+# hold balanced parentheses, as in copies named "scan (1).pdf".
+LINK_TARGET_RE = re.compile(r'!\[\[([^\]]+)\]\]|\]\(' + LINK_TARGET_PATTERN + r'\)')
+
+def build_link_rewriter(moved_files):
+    """Build a function that rewrites links to moved files in one pass.
+
+    The returned ``rewrite(content)`` gives ``(new_content, changes)`` where
+    ``changes`` lists each distinct rewritten link once.
+    """
+    mapping = dict(moved_files)
+    
+    def rewrite(content):
+        changes = {}
         
-        original_content = content
-        changes_made = []
+        def replace(match):
+            embed, target = match.group(1), match.group(2)
+            old_name = embed if embed is not None else target
+            new_path = mapping.get(old_name)
+            encoded = False
+            if new_path is None and embed is None and '%' in target:
+                # [scan](scan%20file.pdf) links the same file, %-encoded
+                old_name = unquote(target)
+                new_path = mapping.get(old_name)
+                encoded = True
+            if new_path is None:
+                return match.group(0)
+            changes.setdefault(old_name, f"  {old_name} → {new_path}")
+            if embed is not None:
+                return f'![[{new_path}]]'
+            return f']({quote(new_path) if encoded else new_path})'
         
-        # Fix each moved file reference
-        for old_name, new_path in MOVED_FILES.items():
-            # Pattern 1: Wikilinks ![[filename]]
-            old_pattern = f'![[{old_name}]]'
-            new_pattern = f'![[{new_path}]]'
-            if old_pattern in content:
-                content = content.replace(old_pattern, new_pattern)
-                changes_made.append(f"  {old_name} → {new_path}")
-            
-            # Pattern 2: Markdown links ![](filename)
-            old_pattern2 = f']({old_name})'
-            new_pattern2 = f']({new_path})'
-            if old_pattern2 in content:
-                content = content.replace(old_pattern2, new_pattern2)
-                changes_made.append(f"  {old_name} → {new_path}")
+        new_content = LINK_TARGET_RE.sub(replace, content)
+        return new_content, list(changes.values())
+    
+    # Byte markers a note needs before it is worth decoding: a link, and
+    # when the mapping is small, one of the moved file names, raw or
+    # %-encoded as in [scan](scan%20file.pdf)
+    rewrite.markers = [LINK_MARKERS]
+    if len(mapping) <= MAX_NAME_MARKERS:
+        rewrite.markers.append(name_markers(mapping))
+    return rewrite
+
+def name_markers(names):
+    """Byte forms a link to any of ``names`` can take in a note"""
+    markers = {}
+    for name in names:
+        for form in (name, quote(name), name.replace(' ', '%20')):
+            markers.setdefault(form.encode('utf-8'), None)
+    return list(markers)
+
+_rewriter_cache = (None, None)
+
+def get_link_rewriter(moved_files=None):
+    """Rewriter for ``moved_files`` (default MOVED_FILES), built once per mapping"""
+    global _rewriter_cache
+    moved_files = MOVED_FILES if moved_files is None else moved_files
+    if _rewriter_cache[0] is not moved_files:
+        _rewriter_cache = (moved_files, build_link_rewriter(moved_files))
+    return _rewriter_cache[1]
+
+def find_remaining_references(content, moved_files=None):
+    """Old names of moved files that links in ``content`` still point at.
+    
+    Checks every wikilink, embed and markdown link, with aliases, headings
+    and %-escapes stripped, so forms the rewriter leaves alone such as
+    ``[[old.pdf]]`` or ``![[old.png|300]]`` are reported.
+    """
+    moved_files = MOVED_FILES if moved_files is None else moved_files
+    links = parse_links(content)
+    remaining = []
+    for kind in ('embeds', 'wikilinks', 'mdlinks'):
+        for target in links[kind]:
+            name = normalize_link(target)
+            if name in moved_files:
+                remaining.append(name)
+    return list(dict.fromkeys(remaining))
+
+def rewrite_note(file_path, rewriter=None, moved_files=None):
+    """Compute the fixed content of one note without writing it.
+    
+    Returns ``(new_content, changes, remaining)``; ``new_content`` is None
+    when the note needs no changes and ``remaining`` lists moved files the
+    resulting content still links to by their old name.
+    """
+    moved_files = MOVED_FILES if moved_files is None else moved_files
+    rewrite = rewriter or get_link_rewriter(moved_files)
+    if not file_contains_any(file_path, *getattr(rewrite, 'markers', [LINK_MARKERS])):
+        return None, [], []
+    
+    with open(file_path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    
+    new_content, changes = rewrite(content)
+    if new_content == content:
+        return None, [], find_remaining_references(content, moved_files)
+    return new_content, changes, find_remaining_references(new_content, moved_files)
+
+def fix_links_in_file(file_path, rewriter=None):
+    """Fix broken links in a single markdown file"""
+    try:
+        new_content, changes_made, _ = rewrite_note(file_path, rewriter)
         
         # Save if changes were made
-        if content != original_content:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+        if new_content is not None:
+            write_atomic(file_path, new_content)
             return changes_made
         
         return None
@@ -98,56 +193,134 @@ def fix_links_in_file(file_path):
         print(f"  ✗ Error processing {file_path}: {e}")
         return None
 
-def main():
-    print("🔧 Fixing broken links after file reorganization...")
-    print("=" * 50)
+# Mapping and rewriter of a pool worker, set once per process by _init_worker
+_worker_moved_files = None
+_worker_rewriter = None
+
+def _init_worker(moved_files):
+    global _worker_moved_files, _worker_rewriter
+    _worker_moved_files = moved_files
+    _worker_rewriter = build_link_rewriter(moved_files)
+
+def _rewrite_worker(file_path, rewriter=None, moved_files=None):
+    try:
+        new_content, changes, remaining = rewrite_note(
+            file_path, rewriter or _worker_rewriter, moved_files or _worker_moved_files)
+        return file_path, new_content, changes, remaining, None
+    except Exception as e:
+        return file_path, None, [], [], str(e)
+
+def rewrite_notes(paths, moved_files=None, jobs=1):
+    """Rewrite notes, serially or across a process pool.
+    
+    Yields ``(path, new_content, changes, remaining, error)`` records in the
+    order of ``paths`` whatever the number of jobs, so the caller's writes
+    and summary output are the same as a serial run. Each note is read once
+    and nothing is written here.
+    """
+    moved_files = MOVED_FILES if moved_files is None else moved_files
+    if jobs <= 1 or len(paths) < 2:
+        rewriter = get_link_rewriter(moved_files)
+        for path in paths:
+            yield _rewrite_worker(path, rewriter, moved_files)
+        return
+    
+    jobs = min(jobs, len(paths))
+    chunksize = max(1, len(paths) // (jobs * 8))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(dict(moved_files),)) as pool:
+        yield from pool.map(_rewrite_worker, paths, chunksize=chunksize)
+
+def save_move_plan(plan, root=SWITCHBOARD):
+    """Save {old: new} as .vault-tools/move-plan-<time>.json; returns the path"""
+    now = datetime.now()
+    plan_path = Path(root) / STATE_DIR / f"move-plan-{now.strftime('%Y%m%d-%H%M%S')}.json"
+    plan_path.parent.mkdir(parents=True, exist_ok=True)
+    plan_path.write_text(json.dumps({'created': now.isoformat(timespec='seconds'),
+                                     'moves': plan}, ensure_ascii=False, indent=2),
+                         encoding='utf-8')
+    return plan_path
+
+def load_move_plan(plan_path):
+    """Load a move plan saved by organize_switchboard or detect_renames as {old: new}"""
+    with open(plan_path, 'r', encoding='utf-8') as f:
+        plan = json.load(f)
+    return dict(plan['moves'])
+
+def repair_links(manifest, moved_files=None, jobs=1):
+    """Rewrite links to moved files across an already-scanned vault.
+    
+    Returns ``(files_fixed, total_fixes, remaining_broken)``.
+    """
+    moved_files = MOVED_FILES if moved_files is None else moved_files
     
-    # Get all markdown files
-    md_files = []
-    for root, dirs, files in os.walk(SWITCHBOARD):
-        # Skip the Attachments folder since those weren't moved
-        if 'Attachments' in root:
-            continue
-        for file in files:
-            if file.endswith('.md'):
-                md_files.append(os.path.join(root, file))
+    # Skip the Attachments folder since those weren't moved
+    md_files = [rel for rel in manifest.notes()
+                if 'Attachments' not in rel.rpartition('/')[0]]
+    
+    # Only notes whose recorded links point at a moved file need opening
+    linking = set(manifest.files_linking_to(moved_files))
+    candidates = [rel for rel in md_files if rel in linking]
     
     print(f"📝 Scanning {len(md_files)} markdown files...")
+    print(f"   {len(manifest.changed)} changed since last scan, "
+          f"{len(candidates)} reference moved files")
     
     files_fixed = 0
     total_fixes = 0
+    remaining_broken = []
+    
+    # One read per note: the verification below uses the content the
+    # rewrite produced instead of reading every note a second time
+    paths = [manifest.abspath(rel_path) for rel_path in candidates]
+    records = rewrite_notes(paths, moved_files, jobs)
+    written = {}
+    with WriteBatch(manifest.root, label='fix_broken_links') as batch:
+        for rel_path, (md_file, new_content, changes, remaining, error) in zip(candidates, records):
+            if error:
+                print(f"  ✗ Error processing {md_file}: {error}")
+                continue
+            for old_name in remaining:
+                remaining_broken.append(f"  {rel_path} still references {old_name}")
+            if new_content is not None:
+                written[rel_path] = new_content.encode('utf-8')
+                batch.write(md_file, written[rel_path])
+                print(f"\n✓ Fixed {rel_path}:")
+                for change in changes:
+                    print(change)
+                files_fixed += 1
+                total_fixes += len(changes)
     
-    for md_file in md_files:
-        changes = fix_links_in_file(md_file)
-        if changes:
-            rel_path = os.path.relpath(md_file, SWITCHBOARD)
-            print(f"\n✓ Fixed {rel_path}:")
-            for change in changes:
-                print(change)
-            files_fixed += 1
-            total_fixes += len(changes)
+    for rel_path, data in written.items():
+        manifest.update_entry(rel_path, data)
+    manifest.save()
+    return files_fixed, total_fixes, remaining_broken
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fix links to files moved by the reorganization')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes for the rewrite pass (0 = one per CPU)')
+    parser.add_argument('--plan', help='Move plan JSON saved by organize_switchboard or detect_renames (default: MOVED_FILES)')
+    args = parser.parse_args(argv)
+    jobs = args.jobs or os.cpu_count() or 1
+    moved_files = load_move_plan(args.plan) if args.plan else MOVED_FILES
+    
+    print("🔧 Fixing broken links after file reorganization...")
+    print("=" * 50)
+    
+    # Refresh the scan manifest; only notes that changed since the last
+    # scan are re-read here
+    manifest = VaultManifest(SWITCHBOARD).load().refresh()
+    
+    files_fixed, total_fixes, remaining_broken = repair_links(manifest, moved_files, jobs)
     
     print("\n" + "=" * 50)
     print(f"✅ Complete!")
     print(f"  Files updated: {files_fixed}")
     print(f"  Links fixed: {total_fixes}")
     
-    # Also check for any remaining broken references
+    # Also report any remaining broken references
     print("\n🔍 Checking for any remaining broken references...")
-    remaining_broken = []
-    
-    for md_file in md_files:
-        try:
-            with open(md_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Check for references to moved files that might have been missed
-            for old_name in MOVED_FILES.keys():
-                if old_name in content and f'Resources/' not in content:
-                    rel_path = os.path.relpath(md_file, SWITCHBOARD)
-                    remaining_broken.append(f"  {rel_path} still references {old_name}")
-        except:
-            pass
     
     if remaining_broken:
         print("⚠️  Some references might still be broken:")
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+"""
+Obsidian-compatible link resolution for the switchboard vault
+
+Builds an in-memory index from one directory walk and answers "does this
+link resolve, and to which file" with dictionary lookups instead of
+per-link stat calls. Also holds the link-rewriting and canvas
+helpers shared by the other vault tools.
+"""
+
+import json
+import os
+import posixpath
+import re
+import sys
+from urllib.parse import quote
+
+from vault_scan import SKIP_DIRS, SWITCHBOARD, VaultManifest, normalize_link
+
+# Wikilinks and embeds: prefix, target, then any |alias or #heading
+WIKILINK_TARGET_RE = re.compile(r'(!?\[\[)([^\]|#]*)((?:[|#][^\]]*)?\]\])')
+# Markdown links: target, then any #fragment and "title"
+MDLINK_TARGET_RE = re.compile(r'(\]\()(<[^>]*>|[^)#]+?)((?:#[^)\s]*)?(?:\s+"[^"]*")?\))')
+
+
+def _sort_key(path):
+    # Obsidian prefers the shallowest match when a basename is ambiguous
+    return (path.count('/'), len(path), path)
+
+
+class LinkIndex:
+    """Resolution index over the files of a vault.
+
+    Keys are case-folded. Every file is indexed by its full relative path
+    and its basename; markdown notes also by both without ``.md``, since
+    ``[[Note]]`` resolves to ``Note.md`` while attachments need their
+    extension.
+    """
+
+    def __init__(self, paths):
+        self.paths = set()
+        self._by_path = {}
+        self._by_name = {}
+        for rel in paths:
+            self.add(rel)
+
+    @classmethod
+    def build(cls, root=SWITCHBOARD):
+        """Index a vault with a single walk (no per-file stat)"""
+        paths = []
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [d for d in dirnames if d not in SKIP_DIRS]
+            rel_dir = os.path.relpath(dirpath, root).replace(os.sep, '/')
+            prefix = '' if rel_dir == '.' else rel_dir + '/'
+            paths.extend(prefix + name for name in filenames)
+        return cls(paths)
+
+    @classmethod
+    def from_manifest(cls, manifest):
+        """Index the files already recorded in a scan manifest"""
+        return cls(manifest.entries)
+
+    def add(self, rel):
+        self.paths.add(rel)
+        folded = rel.casefold()
+        name = folded.rpartition('/')[2]
+        keys = [name]
+        self._by_path.setdefault(folded, rel)
+        if folded.endswith('.md'):
+            self._by_path.setdefault(folded[:-3], rel)
+            keys.append(name[:-3])
+        for key in keys:
+            candidates = self._by_name.setdefault(key, [])
+            if rel not in candidates:
+                candidates.append(rel)
+                candidates.sort(key=_sort_key)
+
+    def remove(self, rel):
+        if rel not in self.paths:
+            return
+        self.paths.discard(rel)
+        folded = rel.casefold()
+        name = folded.rpartition('/')[2]
+        keys = [name]
+        paths = [folded]
+        if folded.endswith('.md'):
+            keys.append(name[:-3])
+            paths.append(folded[:-3])
+        for key in paths:
+            if self._by_path.get(key) == rel:
+                del self._by_path[key]
+                # Another file may differ only in case
+                for other in self._by_name.get(key.rpartition('/')[2], []):
+                    if other != rel and other.casefold() in (key, key + '.md'):
+                        self._by_path[key] = other
+                        break
+        for key in keys:
+            candidates = self._by_name.get(key)
+            if candidates and rel in candidates:
+                candidates.remove(rel)
+                if not candidates:
+                    del self._by_name[key]
+
+    def resolve(self, link, source=None):
+        """Vault-relative path a link points at, or None if it is broken.
+
+        ``link`` may be a raw wikilink or markdown link target; ``source`` is
+        the relative path of the note containing it, used for ``./`` and
+        ``../`` links and to prefer same-folder matches.
+        """
+        target = normalize_link(link)
+        if not target:
+            return source
+        if '://' in target:
+            return None
+
+        key = target.casefold()
+        if key.startswith('/'):
+            key = key.lstrip('/')
+        elif key.startswith('./') or key.startswith('../'):
+            base = posixpath.dirname(source.casefold()) if source else ''
+            key = posixpath.normpath(posixpath.join(base, key))
+            if key.startswith('../'):
+                return None
+
+        rel = self._by_path.get(key)
+        if rel is not None:
+            return rel
+
+        dirname, _, name = key.rpartition('/')
+        candidates = self._by_name.get(name)
+        if not candidates:
+            return None
+        if dirname:
+            # Partial paths match as a suffix: Images/x.png → Resources/Images/x.png
+            suffix = '/' + key
+            for rel in candidates:
+                folded = rel.casefold()
+                if folded.endswith(suffix) or folded.endswith(suffix + '.md'):
+                    return rel
+            return None
+        if source and len(candidates) > 1:
+            source_dir = posixpath.dirname(source)
+            for rel in candidates:
+                if posixpath.dirname(rel) == source_dir:
+                    return rel
+        return candidates[0]
+
+    def exists(self, link, source=None):
+        return self.resolve(link, source) is not None
+
+
+def retarget_links(content, mapping):
+    """Point links at moved files in one pass.
+
+    ``mapping`` maps normalized link targets to ``(wikilink, mdlink)``
+    replacement targets. Aliases, headings and titles are kept. Returns
+    ``(new_content, changes)``.
+    """
+    changes = {}
+
+    def replace_wikilink(match):
+        new = mapping.get(normalize_link(match.group(2)))
+        if new is None:
+            return match.group(0)
+        changes.setdefault(match.group(2), f"  {match.group(2)} → {new[0]}")
+        return match.group(1) + new[0] + match.group(3)
+
+    def replace_mdlink(match):
+        target = match.group(2)
+        if '://' in target:
+            return match.group(0)
+        new = mapping.get(normalize_link(target))
+        if new is None:
+            return match.group(0)
+        path = new[1]
+        if target.startswith('<'):
+            path = f'<{path}>'
+        elif '%' in target:
+            path = quote(path, safe='/')
+        changes.setdefault(target, f"  {target} → {path}")
+        return match.group(1) + path + match.group(3)
+
+    content = WIKILINK_TARGET_RE.sub(replace_wikilink, content)
+    content = MDLINK_TARGET_RE.sub(replace_mdlink, content)
+    return content, list(changes.values())
+
+
+def link_targets(index, target, note, link):
+    """Replacement (wikilink, mdlink) targets for a link now pointing at ``target``"""
+    wiki = target
+    if target.endswith('.md') and not link.casefold().endswith('.md'):
+        wiki = target[:-3]
+    name = wiki.rpartition('/')[2]
+    if index.resolve(name, note) == target:
+        wiki = name  # Shortest form that still resolves, like Obsidian
+    return wiki, target
+
+
+def build_backlinks(manifest, index=None):
+    """Reverse-link index: resolved path → set of notes linking to it.
+
+    One pass over the links the manifest recorded for every note, so no
+    note is opened.
+    """
+    index = index or LinkIndex.from_manifest(manifest)
+    backlinks = {}
+    for rel in manifest.notes():
+        for target in manifest.links(rel):
+            resolved = index.resolve(target, rel)
+            if resolved is not None and resolved != rel:
+                backlinks.setdefault(resolved, set()).add(rel)
+    return backlinks
+
+
+def canvas_references(manifest):
+    """Files each .canvas in the vault shows, as {canvas: set of paths}"""
+    refs = {}
+    for rel in manifest.entries:
+        if not rel.endswith('.canvas'):
+            continue
+        try:
+            with open(manifest.abspath(rel), 'r', encoding='utf-8') as f:
+                nodes = json.load(f).get('nodes') or []
+        except (OSError, ValueError, AttributeError):
+            continue
+        files = {node['file'] for node in nodes
+                 if isinstance(node, dict) and isinstance(node.get('file'), str)}
+        if files:
+            refs[rel] = files
+    return refs
+
+
+def find_broken_links(manifest, index=None):
+    """List ``(note, link)`` pairs whose target resolves to no file"""
+    index = index or LinkIndex.from_manifest(manifest)
+    broken = []
+    for rel in manifest.notes():
+        for target in manifest.links(rel):
+            if index.resolve(target, rel) is None:
+                broken.append((rel, target))
+    return broken
+
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else SWITCHBOARD
+    print("🔍 Checking for broken links...")
+    print("=" * 50)
+
+    manifest = VaultManifest(root).load().refresh()
+    manifest.save()
+    broken = find_broken_links(manifest)
+
+    for rel, target in broken[:50]:  # Show first 50
+        print(f"  {rel} → {target}")
+    if len(broken) > 50:
+        print(f"  ... and {len(broken) - 50} more")
+
+    print("\n" + "=" * 50)
+    print(f"  Notes checked: {len(manifest.notes())}")
+    print(f"  Broken links: {len(broken)}")
+    sys.exit(1 if broken else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Normalize the tags: field of every note in the vault
+
+Scalar and comma-separated tags become lists (``tags: a, b`` →
+``tags: [a, b]``) and tag names are rewritten by an optional rule set,
+config/tag-rules.json, mapping a regex for the whole tag to its canonical
+name (an empty name drops the tag):
+
+    {"org[-_ ]?p": "org_p", "lit[-_ ]?note": "litnote", "todo": ""}
+
+Only the frontmatter is touched; the note body is never rewritten.
+"""
+
+import argparse
+import json
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from safe_write import WriteBatch
+from vault_scan import SWITCHBOARD, VaultManifest
+
+TAG_RULES_PATH = Path(__file__).resolve().parent.parent / 'config' / 'tag-rules.json'
+
+# The tags key of a frontmatter block, inline value and any "- item" lines
+TAGS_FIELD_RE = re.compile(
+    r'^tags:[ \t]*(?P<inline>[^\r\n]*?)[ \t]*(?P<items>(?:\r?\n[ \t]*-[ \t]+[^\r\n]*)*)$',
+    re.MULTILINE)
+_FRONTMATTER_SPAN_RE = re.compile(r'\A---\r?\n(.*?\r?\n)?---[ \t]*(?:\r?\n|\Z)', re.DOTALL)
+_BLOCK_ITEM_RE = re.compile(r'^([ \t]*-[ \t]+)(.*)$')
+_SPLIT_RE = re.compile(r'\s*,\s*')
+
+
+def load_tag_rules(path=None):
+    """Load the rename rules, or no rules when the file doesn't exist"""
+    path = Path(path) if path else TAG_RULES_PATH
+    if not path.exists():
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _clean_tag(tag):
+    tag = tag.strip()
+    if len(tag) >= 2 and tag[0] == tag[-1] and tag[0] in '"\'':
+        tag = tag[1:-1].strip()
+    return tag.lstrip('#')
+
+
+def build_tag_normalizer(rules=None):
+    """Compile the rules into one matcher.
+
+    Returns ``normalize(tags) -> list`` that cleans, renames and
+    de-duplicates a list of tags, keeping their order.
+    """
+    rules = rules or {}
+    targets = list(rules.values())
+    matcher = None
+    if rules:
+        matcher = re.compile('|'.join(f'(?P<r{i}>{pattern})' for i, pattern in enumerate(rules)),
+                             re.IGNORECASE)
+
+    def normalize(tags):
+        result = []
+        for tag in tags:
+            tag = _clean_tag(str(tag))
+            if matcher is not None:
+                match = matcher.fullmatch(tag)
+                if match:
+                    tag = targets[int(match.lastgroup[1:])]
+            if tag and tag not in result:
+                result.append(tag)
+        return result
+
+    return normalize
+
+
+def split_tags(value):
+    """Tags of an inline tags: value, scalar, comma-separated or [list].
+
+    Like Obsidian, a string value is split on commas only, so
+    ``tags: "project alpha"`` is one tag.
+    """
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        return [t for t in (v.strip() for v in value[1:-1].split(',')) if t]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        value = value[1:-1]
+    return [t for t in _SPLIT_RE.split(value.strip()) if t]
+
+
+def needs_normalizing(tags, normalize):
+    """Whether parsed frontmatter tags would change, without opening the note"""
+    if tags is None:
+        return False
+    if not isinstance(tags, list):
+        return bool(str(tags).strip())
+    return normalize(tags) != tags
+
+
+def normalize_frontmatter_tags(content, normalize):
+    """Rewrite the tags: field inside the frontmatter span.
+
+    Returns ``(new_content, old_tags, new_tags)``, with new_content None
+    when nothing changes.
+    """
+    span = _FRONTMATTER_SPAN_RE.match(content)
+    if not span:
+        return None, [], []
+    field = TAGS_FIELD_RE.search(content, 0, span.end())
+    if not field:
+        return None, [], []
+
+    inline, items = field.group('inline'), field.group('items')
+    if items and not inline:
+        lines = items.splitlines()[1:]
+        old = [_BLOCK_ITEM_RE.match(line).group(2) for line in lines]
+        new = normalize(old)
+        if new == old:
+            return None, old, new
+        indent = _BLOCK_ITEM_RE.match(lines[0]).group(1)
+        newline = '\r\n' if '\r\n' in items else '\n'
+        replacement = 'tags:' + ''.join(newline + indent + tag for tag in new)
+    elif inline:
+        old = split_tags(inline)
+        new = normalize(old)
+        if inline.startswith('[') and new == old:
+            return None, old, new
+        replacement = f"tags: [{', '.join(new)}]" + items
+    else:
+        return None, [], []
+
+    return content[:field.start()] + replacement + content[field.end():], old, new
+
+
+_worker_normalizer = None
+
+def _init_worker(rules):
+    global _worker_normalizer
+    _worker_normalizer = build_tag_normalizer(rules)
+
+def _normalize_worker(file_path, normalize=None):
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        new_content, old, new = normalize_frontmatter_tags(content, normalize or _worker_normalizer)
+        return file_path, new_content, old, new, None
+    except Exception as e:
+        return file_path, None, [], [], str(e)
+
+def normalize_notes(paths, rules=None, jobs=1):
+    """Normalize the tags of notes, serially or across a process pool.
+
+    Yields ``(path, new_content, old_tags, new_tags, error)`` in the order
+    of ``paths``. The rules are compiled once per process and nothing is
+    written here.
+    """
+    if jobs <= 1 or len(paths) < 2:
+        normalize = build_tag_normalizer(rules)
+        for path in paths:
+            yield _normalize_worker(path, normalize)
+        return
+
+    chunksize = max(1, len(paths) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker,
+                             initargs=(rules,)) as pool:
+        yield from pool.map(_normalize_worker, paths, chunksize=chunksize)
+
+
+def normalize_vault_tags(manifest, rules=None, jobs=1):
+    """Normalize tags across all the vault's notes, writing one batch.
+
+    The manifest's frontmatter picks the notes that need it, so notes
+    whose tags are already normalized are never opened. Returns the
+    number of notes updated.
+    """
+    normalize = build_tag_normalizer(rules)
+    candidates = [rel for rel in manifest.notes()
+                  if needs_normalizing((manifest.frontmatter(rel) or {}).get('tags'), normalize)]
+    paths = [manifest.abspath(rel) for rel in candidates]
+
+    count = 0
+    written = {}
+    with WriteBatch(manifest.root, label='normalize_tags') as batch:
+        for rel, (path, new_content, old, new, error) in zip(
+                candidates, normalize_notes(paths, rules, jobs)):
+            if error:
+                print(f"  ✗ Error with {rel}: {error}")
+                continue
+            if new_content is None:
+                continue
+            written[rel] = new_content.encode('utf-8')
+            batch.write(path, written[rel])
+            print(f"  ✓ {rel}: {', '.join(old)} → [{', '.join(new)}]")
+            count += 1
+
+    for rel, data in written.items():
+        manifest.update_entry(rel, data)
+    manifest.save()
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Normalize the tags: field of every note')
+    parser.add_argument('vault', nargs='?', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('--rules', help=f'Tag rules JSON (default: {TAG_RULES_PATH})')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes for reading notes (0 = one per CPU)')
+    args = parser.parse_args(argv)
+
+    print("📝 Normalizing tags...")
+    manifest = VaultManifest(args.vault).load().refresh()
+    count = normalize_vault_tags(manifest, load_tag_rules(args.rules),
+                                 jobs=args.jobs or os.cpu_count() or 1)
+    print(f"  Updated {count} files")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,39 +3,33 @@
 Organize and clean up the switchboard directory
 """
 
+import argparse
+import json
 import os
 import re
 import shutil
+from datetime import datetime
 from pathlib import Path
 
+import fix_broken_links
+from normalize_tags import load_tag_rules, normalize_vault_tags
+from safe_write import write_atomic
+from vault_scan import SIZE, STATE_DIR, VaultManifest
+
 SWITCHBOARD = '/Users/<Owner>/switchboard'
 
-def standardize_tags():
+def load_manifest():
+    """Refresh the shared scan manifest for the vault"""
+    manifest = VaultManifest(SWITCHBOARD).load().refresh()
+    manifest.save()
+    return manifest
+
+def standardize_tags(manifest=None, rules=None, jobs=1):
     """Fix tag format in all markdown files"""
     print("\n📝 Standardizing tags format...")
-    count = 0
-    
-    for file in Path(SWITCHBOARD).glob('*.md'):
-        if file.is_file():
-            try:
-                content = file.read_text(encoding='utf-8')
-                original = content
-                
-                # Replace tags: people with tags: [people]
-                content = re.sub(r'^tags: people$', 'tags: [people]', content, flags=re.MULTILINE)
-                
-                # Replace tags: org_p, stub with tags: [org_p, stub]
-                content = re.sub(r'^tags: (org_p|stub|litnote)$', r'tags: [\1]', content, flags=re.MULTILINE)
-                content = re.sub(r'^tags: (org_p, stub)$', r'tags: [\1]', content, flags=re.MULTILINE)
-                
-                if content != original:
-                    file.write_text(content, encoding='utf-8')
-                    print(f"  ✓ {file.name}")
-                    count += 1
-                    
-            except Exception as e:
-                print(f"  ✗ Error with {file.name}: {e}")
-    
+    manifest = manifest or load_manifest()
+    rules = load_tag_rules() if rules is None else rules
+    count = normalize_vault_tags(manifest, rules, jobs)
     print(f"  Updated {count} files")
     return count
 
@@ -67,62 +61,90 @@ def create_directories():
         if not any(dir_path.iterdir()):  # Only print if newly created/empty
             print(f"  ✓ Created {d}/")
 
-def organize_files():
-    """Move files to appropriate directories"""
-    print("\n🚀 Organizing files...")
-    
-    moves = {
-        'scripts': 0,
-        'pdfs': 0,
-        'images': 0,
-        'meetings': 0
-    }
+# Root files are matched against these rules in order and the first match
+# wins. The destination folder template is filled from the regex's named
+# groups, so adding a rule never adds another listing of the root.
+CLASSIFICATION_RULES = [
+    (r'\.(py|js)$', 'Scripts', 'scripts'),
+    (r'\.pdf$', 'Resources/PDFs', 'pdfs'),
+    (r'\.(png|jpg|jpeg)$', 'Resources/Images', 'images'),
+    (r'^(?P<year>\d{4})-(?P<month>\d{2})-(?P<day>\d{2}).*\.md$', 'Meetings/{year}', 'meetings'),
+]
+
+def compile_rules(rules=CLASSIFICATION_RULES):
+    """Compile the classification table once"""
+    return [(re.compile(pattern), template, category) for pattern, template, category in rules]
+
+def classify(name, rules):
+    """Destination folder and category for a root file name, or None"""
+    for regex, template, category in rules:
+        match = regex.search(name)
+        if match:
+            return template.format(**match.groupdict()), category
+    return None
+
+def plan_moves(vault=None, rules=CLASSIFICATION_RULES):
+    """Classify the vault root in one listing.
     
-    # Move Python/JS files to Scripts/
-    for pattern in ['*.py', '*.js']:
-        for file in Path(SWITCHBOARD).glob(pattern):
-            if file.is_file() and file.parent == Path(SWITCHBOARD):
-                dest = Path(SWITCHBOARD) / 'Scripts' / file.name
-                if not dest.exists():
-                    shutil.move(str(file), str(dest))
-                    print(f"  → Moved {file.name} to Scripts/")
-                    moves['scripts'] += 1
+    Returns a list of (name, destination path, category), relative to the
+    vault, for every root file that matches a rule and whose destination
+    is still free.
+    """
+    vault = Path(vault or SWITCHBOARD)
+    compiled = compile_rules(rules)
+    planned = []
+    with os.scandir(vault) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            target = classify(entry.name, compiled)
+            if target is None:
+                continue
+            folder, category = target
+            dest = f'{folder}/{entry.name}'
+            if not (vault / dest).exists():
+                planned.append((entry.name, dest, category))
+    planned.sort()
+    return planned
+
+def organize_files():
+    """Move files to appropriate directories.
     
-    # Move PDFs to Resources/PDFs/
-    for pdf in Path(SWITCHBOARD).glob('*.pdf'):
-        if pdf.is_file() and pdf.parent == Path(SWITCHBOARD):
-            dest = Path(SWITCHBOARD) / 'Resources' / 'PDFs' / pdf.name
-            if not dest.exists():
-                shutil.move(str(pdf), str(dest))
-                print(f"  → Moved {pdf.name} to Resources/PDFs/")
-                moves['pdfs'] += 1
+    Returns the move plan as {old path: new path}, relative to the vault.
+    """
+    print("\n🚀 Organizing files...")
     
-    # Move screenshots and images to Resources/Images/
-    for pattern in ['Screenshot*.png', 'Screen Shot*.png', '*.png', '*.jpg', '*.jpeg']:
-        for img in Path(SWITCHBOARD).glob(pattern):
-            if img.is_file() and img.parent == Path(SWITCHBOARD):
-                dest = Path(SWITCHBOARD) / 'Resources' / 'Images' / img.name
-                if not dest.exists():
-                    shutil.move(str(img), str(dest))
-                    print(f"  → Moved {img.name} to Resources/Images/")
-                    moves['images'] += 1
+    moves = {category: 0 for _, _, category in CLASSIFICATION_RULES}
+    plan = {}
+    created = set()
     
-    # Move meeting notes based on date patterns
-    meeting_pattern = re.compile(r'^(\d{4})-(\d{2})-(\d{2})')
-    for file in Path(SWITCHBOARD).glob('*.md'):
-        if file.is_file() and file.parent == Path(SWITCHBOARD):
-            match = meeting_pattern.match(file.name)
-            if match:
-                year = match.group(1)
-                dest_dir = Path(SWITCHBOARD) / 'Meetings' / year
-                dest_dir.mkdir(parents=True, exist_ok=True)
-                dest = dest_dir / file.name
-                if not dest.exists():
-                    shutil.move(str(file), str(dest))
-                    print(f"  → Moved {file.name} to Meetings/{year}/")
-                    moves['meetings'] += 1
+    for name, dest, category in plan_moves(SWITCHBOARD):
+        dest_path = Path(SWITCHBOARD) / dest
+        if dest_path.parent not in created:
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            created.add(dest_path.parent)
+        shutil.move(str(Path(SWITCHBOARD) / name), str(dest_path))
+        plan[name] = dest
+        print(f"  → Moved {name} to {dest.rpartition('/')[0]}/")
+        moves[category] += 1
     
     print(f"\n  Summary: {moves['scripts']} scripts, {moves['pdfs']} PDFs, {moves['images']} images, {moves['meetings']} meetings moved")
+    return plan
+
+def save_move_plan(plan):
+    """Save a move plan where fix_broken_links.py --plan can load it"""
+    plan_path = fix_broken_links.save_move_plan(plan, SWITCHBOARD)
+    print(f"  ✓ Saved move plan to {plan_path.relative_to(SWITCHBOARD).as_posix()}")
+    return plan_path
+
+def repair_moved_links(manifest, plan):
+    """Rewrite links to the files in a move plan over the scanned vault"""
+    print("\n🔗 Repairing links to moved files...")
+    manifest.apply_moves(plan)
+    files_fixed, total_fixes, remaining = fix_broken_links.repair_links(manifest, plan)
+    print(f"  Updated {files_fixed} files, fixed {total_fixes} links")
+    for item in remaining[:10]:  # Show first 10
+        print(item)
 
 def create_pdf_reading_template():
     """Create template for PDF metadata"""
@@ -161,6 +183,7 @@ reminder_id:
     template_path.parent.mkdir(parents=True, exist_ok=True)
     template_path.write_text(template)
     print(f"  ✓ Created PDF metadata template")
+    return template_path
 
 def create_reading_queue():
     """Create reading queue dashboard"""
@@ -205,52 +228,124 @@ LIMIT 10
     queue_path = Path(SWITCHBOARD) / 'Reading-Queue.md'
     queue_path.write_text(dashboard)
     print(f"  ✓ Created Reading Queue dashboard")
+    return queue_path
 
-def generate_report():
-    """Generate organization report"""
-    print("\n📊 Analyzing current state...")
+# Report counters by file extension, gathered over the whole vault
+REPORT_EXTENSIONS = {
+    'pdfs': ('.pdf',),
+    'images': ('.png', '.jpg'),
+    'scripts': ('.py', '.js'),
+}
+REPORT_HISTORY_NAME = 'report-history.jsonl'
+REPORT_HISTORY_LIMIT = 1000  # Reports kept; older ones are dropped
+
+def is_person_page(frontmatter):
+    """Decide from a note's parsed frontmatter whether it is a person page"""
+    tags = (frontmatter or {}).get('tags') or []
+    if isinstance(tags, str):
+        tags = [t.strip() for t in tags.split(',')]
+    return 'people' in tags or 'person' in tags
+
+def collect_report(manifest):
+    """Gather every report count from the scanned manifest, without another traversal"""
+    report = {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'root_files': 0,
+        'markdown_files': 0,
+        'person_pages': 0,
+        'total_files': 0,
+        'total_bytes': 0,
+    }
+    report.update({key: 0 for key in REPORT_EXTENSIONS})
+    by_ext = {ext: key for key, exts in REPORT_EXTENSIONS.items() for ext in exts}
+    
+    for rel, record in manifest.entries.items():
+        report['total_files'] += 1
+        report['total_bytes'] += record[SIZE]
+        key = by_ext.get(os.path.splitext(rel)[1])
+        if key:
+            report[key] += 1
+        if '/' not in rel:
+            report['root_files'] += 1
+            if rel.endswith('.md'):
+                report['markdown_files'] += 1
+                if is_person_page(manifest.frontmatter(rel)):
+                    report['person_pages'] += 1
+    return report
+
+def record_report(report, vault=None, limit=REPORT_HISTORY_LIMIT):
+    """Append a report to .vault-tools/report-history.jsonl, keeping the last ``limit``"""
+    history = Path(vault or SWITCHBOARD) / STATE_DIR / REPORT_HISTORY_NAME
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(report) + '\n')
     
-    # Count files by type
-    all_files = list(Path(SWITCHBOARD).glob('*'))
-    md_files = [f for f in all_files if f.suffix == '.md' and f.is_file()]
+    with open(history, 'r', encoding='utf-8') as f:
+        lines = f.readlines()
+    if len(lines) > limit:
+        write_atomic(history, ''.join(lines[-limit:]))
+
+def generate_report(manifest=None, json_output=False):
+    """Generate organization report"""
+    report = collect_report(manifest or load_manifest())
     
-    # Check for person pages (rough heuristic)
-    person_pages = []
-    for f in md_files:
-        try:
-            content = f.read_text(encoding='utf-8')
-            if 'tags:' in content and 'people' in content:
-                person_pages.append(f.name)
-        except:
-            pass
+    if json_output:
+        print(json.dumps(report, indent=2))
+        return report
     
+    print("\n📊 Analyzing current state...")
     print(f"""
-  Files in root: {len([f for f in all_files if f.is_file() and f.parent == Path(SWITCHBOARD)])}
-  Markdown files: {len(md_files)}
-  Likely person pages: {len(person_pages)}
-  PDFs: {len(list(Path(SWITCHBOARD).glob('**/*.pdf')))}
-  Images: {len(list(Path(SWITCHBOARD).glob('**/*.png'))) + len(list(Path(SWITCHBOARD).glob('**/*.jpg')))}
-  Scripts: {len(list(Path(SWITCHBOARD).glob('**/*.py'))) + len(list(Path(SWITCHBOARD).glob('**/*.js')))}
+  Files in root: {report['root_files']}
+  Markdown files: {report['markdown_files']}
+  Likely person pages: {report['person_pages']}
+  PDFs: {report['pdfs']}
+  Images: {report['images']}
+  Scripts: {report['scripts']}
   """)
+    return report
 
-if __name__ == "__main__":
+def main():
+    parser = argparse.ArgumentParser(description='Organize and clean up the switchboard vault')
+    parser.add_argument('--report', action='store_true', help='Only print the state report')
+    parser.add_argument('--json', action='store_true', help='Print the report as JSON')
+    parser.add_argument('--tag-rules', help='Tag rules JSON for standardizing tags')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='Worker processes for standardizing tags (0 = one per CPU)')
+    args = parser.parse_args()
+    
+    if args.report or args.json:
+        generate_report(json_output=args.json)
+        return
+    
     print("=" * 50)
     print("SWITCHBOARD ORGANIZATION SCRIPT")
     print("=" * 50)
     
-    # Get initial state
-    generate_report()
+    # Get initial state; the one scan also drives the later steps and report
+    manifest = load_manifest()
+    generate_report(manifest)
     
     # Run cleanup
-    standardize_tags()
+    tags_updated = standardize_tags(manifest, load_tag_rules(args.tag_rules), args.jobs or os.cpu_count() or 1)
     create_directories()
-    organize_files()
-    create_pdf_reading_template()
-    create_reading_queue()
+    plan = organize_files()
+    if plan:
+        save_move_plan(plan)
+        repair_moved_links(manifest, plan)
+    for path in (create_pdf_reading_template(), create_reading_queue()):
+        manifest.scan_file(path.relative_to(SWITCHBOARD).as_posix())
+    manifest.save()
+    
+    # Track vault growth over time, one report per run that changed it
+    if plan or tags_updated:
+        record_report(collect_report(manifest))
     
     print("\n✅ Organization complete!")
     print("\nNext steps:")
     print("  1. Review Reading-Queue.md for PDF management")
     print("  2. Check organized folders in switchboard/")
     print("  3. Consider moving person pages to People/ folder")
-    print("  4. Create metadata files for important PDFs")
\ No newline at end of file
+    print("  4. Create metadata files for important PDFs")
+
+if __name__ == "__main__":
+    main()
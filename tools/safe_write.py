@@ -0,0 +1,264 @@
+#!/usr/bin/env python3
+"""
+Crash-safe batched writes for the vault maintenance tools
+
+Rewritten files are staged as temp files, committed in batches with
+os.replace, and recorded in a journal together with hardlinked backups of
+the originals. An interrupted run can then be rolled forward or rolled
+back as a whole:
+
+    python tools/safe_write.py             # finish an interrupted run
+    python tools/safe_write.py --rollback  # restore the files it touched
+"""
+
+import argparse
+import json
+import os
+import shutil
+from datetime import datetime
+from pathlib import Path
+
+from vault_scan import STATE_DIR, SWITCHBOARD
+
+JOURNAL_NAME = 'write-journal.json'
+STAGING_NAME = 'staging'
+BATCH_SIZE = 200
+
+
+def _fsync_path(path, data_only=False):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        # fdatasync skips metadata a staged temp file doesn't need
+        if data_only and hasattr(os, 'fdatasync'):
+            os.fdatasync(fd)
+        else:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _fsync_dirs(dirs):
+    for d in sorted(set(dirs)):
+        try:
+            _fsync_path(d)
+        except OSError:
+            pass  # Not every platform can fsync a directory
+
+
+def write_atomic(path, data, encoding='utf-8'):
+    """Replace a single file atomically via a temp file in the same folder"""
+    path = Path(path)
+    if isinstance(data, str):
+        data = data.encode(encoding)
+    tmp = path.with_name(f'.{path.name}.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    if path.exists():
+        shutil.copymode(path, tmp)
+    os.replace(tmp, path)
+
+
+class WriteBatch:
+    """Journaled, batched file writes for one tool run.
+
+    Use as a context manager; ``write()`` stages a file and every
+    ``batch_size`` files are committed together. Backups of the originals
+    are kept until the run finishes so the whole run can be rolled back.
+    On an exception, staged but uncommitted files are discarded and the
+    journal is left for ``resume()`` or ``rollback()``.
+    """
+
+    def __init__(self, root=SWITCHBOARD, batch_size=BATCH_SIZE, label=None):
+        self.root = Path(root)
+        self.batch_size = batch_size
+        self.label = label
+        self.state_dir = self.root / STATE_DIR
+        self.journal_path = self.state_dir / JOURNAL_NAME
+        self.staging = self.state_dir / STAGING_NAME
+        self.committed = []
+        self._staged = []
+        self._journal = None
+        self._counter = 0
+
+    def __enter__(self):
+        if self.journal_path.exists():
+            print("⚠️  Finishing an interrupted write run "
+                  "(run tools/safe_write.py --rollback first to undo it instead)")
+            resume(self.root)
+        elif self.staging.exists():
+            shutil.rmtree(self.staging)  # Leftovers of a run that never journaled
+        self.staging.mkdir(parents=True, exist_ok=True)
+        self._journal = {
+            'version': 1,
+            'tool': self.label,
+            'started': datetime.now().isoformat(timespec='seconds'),
+            'batches': [],
+        }
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def write(self, path, data, encoding='utf-8'):
+        """Stage new content for a file inside the vault"""
+        if isinstance(data, str):
+            data = data.encode(encoding)
+        target = Path(path)
+        rel = target.relative_to(self.root).as_posix()
+        self._counter += 1
+        tmp = self.staging / f'{self._counter:06d}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        if target.exists():
+            shutil.copymode(target, tmp)
+        self._staged.append({'target': rel, 'tmp': tmp.name, 'backup': None})
+        if len(self._staged) >= self.batch_size:
+            self.commit()
+
+    def commit(self):
+        """Commit the staged files.
+
+        Every temp file of the batch is already written; they are flushed
+        together, then the staging folder is synced once, the journal
+        saved, the renames done and each parent folder synced once.
+        """
+        if not self._staged:
+            return
+        batch = {'state': 'staged', 'files': self._staged}
+        self._staged = []
+
+        for item in batch['files']:
+            _fsync_path(self.staging / item['tmp'], data_only=True)
+
+        for item in batch['files']:
+            target = self.root / item['target']
+            if target.exists():
+                backup = self.staging / (item['tmp'][:-4] + '.bak')
+                try:
+                    os.link(target, backup)
+                except OSError:
+                    shutil.copy2(target, backup)
+                item['backup'] = backup.name
+        _fsync_dirs([self.staging])
+
+        self._journal['batches'].append(batch)
+        self._save_journal()
+
+        for item in batch['files']:
+            os.replace(self.staging / item['tmp'], self.root / item['target'])
+        _fsync_dirs([self.root / Path(item['target']).parent for item in batch['files']])
+
+        batch['state'] = 'committed'
+        self._save_journal()
+        self.committed.extend(item['target'] for item in batch['files'])
+
+    def close(self):
+        """Commit what is left and drop the journal and backups"""
+        self.commit()
+        _finish(self.root)
+
+    def discard(self):
+        """Drop staged files that were never committed"""
+        for item in self._staged:
+            (self.staging / item['tmp']).unlink(missing_ok=True)
+        self._staged = []
+        if not self._journal['batches']:
+            _finish(self.root)
+
+    def _save_journal(self):
+        tmp = self.journal_path.with_name(JOURNAL_NAME + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._journal, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.journal_path)
+        _fsync_dirs([self.state_dir])
+
+
+def _load_journal(root):
+    journal_path = Path(root) / STATE_DIR / JOURNAL_NAME
+    if not journal_path.exists():
+        return None
+    return json.loads(journal_path.read_text(encoding='utf-8'))
+
+
+def _finish(root):
+    staging = Path(root) / STATE_DIR / STAGING_NAME
+    (Path(root) / STATE_DIR / JOURNAL_NAME).unlink(missing_ok=True)
+    if staging.exists():
+        shutil.rmtree(staging)
+
+
+def resume(root=SWITCHBOARD):
+    """Complete the renames of an interrupted run and drop its backups.
+
+    Returns the number of files that were still waiting to be committed.
+    """
+    journal = _load_journal(root)
+    if journal is None:
+        return 0
+    root = Path(root)
+    staging = root / STATE_DIR / STAGING_NAME
+    finished = 0
+    for batch in journal['batches']:
+        for item in batch['files']:
+            tmp = staging / item['tmp']
+            if tmp.exists():
+                os.replace(tmp, root / item['target'])
+                finished += 1
+    _finish(root)
+    return finished
+
+
+def rollback(root=SWITCHBOARD):
+    """Restore every file an interrupted run had rewritten.
+
+    Returns the number of files restored.
+    """
+    journal = _load_journal(root)
+    if journal is None:
+        return 0
+    root = Path(root)
+    staging = root / STATE_DIR / STAGING_NAME
+    restored = 0
+    for batch in reversed(journal['batches']):
+        for item in batch['files']:
+            target = root / item['target']
+            tmp = staging / item['tmp']
+            if tmp.exists():
+                continue  # Never committed, the original is untouched
+            if item['backup']:
+                os.replace(staging / item['backup'], target)
+            else:
+                target.unlink(missing_ok=True)
+            restored += 1
+    _finish(root)
+    return restored
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Recover an interrupted vault write run')
+    parser.add_argument('vault', nargs='?', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('--rollback', action='store_true', help='Undo the run instead of finishing it')
+    args = parser.parse_args()
+
+    journal = _load_journal(args.vault)
+    if journal is None:
+        print("✓ No interrupted write run found")
+        return
+
+    print(f"🧾 Interrupted run of {journal.get('tool') or 'unknown tool'} "
+          f"started {journal.get('started')}")
+    if args.rollback:
+        print(f"  ↩ Restored {rollback(args.vault)} files")
+    else:
+        print(f"  ✓ Committed {resume(args.vault)} pending files")
+
+
+if __name__ == "__main__":
+    main()
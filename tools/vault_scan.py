@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+"""
+Persistent scan manifest for the switchboard vault
+
+Records size, mtime and content hash of every file plus the links and
+frontmatter of every markdown note, so the maintenance tools only open
+files that changed since the previous scan.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote
+
+SWITCHBOARD = '/Users/<Owner>/switchboard'
+
+# Tool state lives inside the vault so it follows the vault around
+STATE_DIR = '.vault-tools'
+MANIFEST_NAME = 'scan-manifest.json'
+MANIFEST_VERSION = 2
+
+# Directories that are never part of the note graph
+SKIP_DIRS = {'.git', '.obsidian', '.trash', STATE_DIR}
+
+# Same link patterns as tests/unit/test_link_management.py, except that
+# markdown link targets may hold balanced parentheses ("scan (1).pdf")
+WIKILINK_PATTERN = r'!?\[\[([^\]]+)\]\]'
+LINK_TARGET_PATTERN = r'((?:[^()\n]|\([^()\n]*\))+)'
+MARKDOWN_LINK_PATTERN = r'!?\[([^\]]*)\]\(' + LINK_TARGET_PATTERN + r'\)'
+
+_WIKILINK_RE = re.compile(r'(!?)\[\[([^\]]+)\]\]')
+_MARKDOWN_LINK_RE = re.compile(MARKDOWN_LINK_PATTERN)
+_FRONTMATTER_RE = re.compile(r'\A---\r?\n(.*?)\r?\n---', re.DOTALL)
+_FM_KEY_RE = re.compile(r'^([A-Za-z0-9_\-]+):\s*(.*)$')
+_FM_ITEM_RE = re.compile(r'^\s*-\s+(.+)$')
+
+
+def normalize_link(target):
+    """Reduce a raw link target to the file it points at.
+
+    Drops Obsidian aliases (``|``), headings (``#``) and block refs, and for
+    markdown links the optional ``<...>`` wrapper, title and %-escapes.
+    """
+    target = target.strip()
+    if target.startswith('<') and '>' in target:
+        target = target[1:target.index('>')]
+    elif ' "' in target:
+        target = target.split(' "', 1)[0]
+    target = target.split('|', 1)[0].split('#', 1)[0]
+    if '%' in target:
+        target = unquote(target)
+    return target.strip()
+
+
+def _unique(items):
+    return list(dict.fromkeys(items))
+
+
+def parse_links(content):
+    """Extract link targets from note content.
+
+    Returns a dict with ``embeds`` (``![[...]]``), ``wikilinks`` (``[[...]]``)
+    and ``mdlinks`` (``[..](...)``, external URLs excluded), raw and de-duplicated.
+    """
+    embeds, wikilinks = [], []
+    for bang, target in _WIKILINK_RE.findall(content):
+        (embeds if bang else wikilinks).append(target)
+    mdlinks = [target for _, target in _MARKDOWN_LINK_RE.findall(content)
+               if '://' not in target and not target.startswith('mailto:')]
+    return {
+        'embeds': _unique(embeds),
+        'wikilinks': _unique(wikilinks),
+        'mdlinks': _unique(mdlinks),
+    }
+
+
+def _fm_value(value):
+    value = value.strip()
+    if value.startswith('[') and value.endswith(']'):
+        return [_fm_value(v) for v in value[1:-1].split(',') if v.strip()]
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '"\'':
+        return value[1:-1]
+    return value
+
+
+def parse_frontmatter(content):
+    """Parse the top-level keys of a YAML frontmatter block.
+
+    Only handles what the vault uses: scalars, inline ``[a, b]`` lists and
+    ``- item`` block lists. Nested mappings are kept as raw indented text.
+    Returns None when the note has no frontmatter.
+    """
+    match = _FRONTMATTER_RE.match(content)
+    if not match:
+        return None
+
+    fm = {}
+    key = None
+    for line in match.group(1).splitlines():
+        if not line.strip():
+            continue
+        item = _FM_ITEM_RE.match(line)
+        if item and key is not None:
+            if not isinstance(fm.get(key), list):
+                fm[key] = []
+            fm[key].append(_fm_value(item.group(1)))
+            continue
+        if line[0] in ' \t':
+            if key is not None and not isinstance(fm.get(key), list):
+                fm[key] = (fm.get(key) or '') + line.strip() + '\n'
+            continue
+        m = _FM_KEY_RE.match(line)
+        if m:
+            key = m.group(1)
+            fm[key] = _fm_value(m.group(2)) if m.group(2).strip() else None
+    return fm
+
+
+def file_contains_any(file_path, *marker_groups):
+    """Check the raw bytes of a file for markers without decoding it.
+
+    Each argument is a group of byte strings; the file matches when every
+    group has at least one marker in it. The file is memory-mapped, so a
+    note that cannot match costs a byte scan instead of a read, a UTF-8
+    decode and regex work. Unreadable files count as a match so the caller
+    surfaces the error.
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                return all(any(mm.find(marker) != -1 for marker in markers)
+                           for markers in marker_groups)
+    except (OSError, ValueError):
+        return True
+
+
+def read_frontmatter(file_path, max_lines=200):
+    """Read only the frontmatter block of a note, not the whole file"""
+    lines = []
+    with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+        first = f.readline()
+        if first.rstrip('\r\n') != '---':
+            return None
+        lines.append(first)
+        for _ in range(max_lines):
+            line = f.readline()
+            if not line:
+                return None
+            lines.append(line)
+            if line.rstrip('\r\n') == '---':
+                return parse_frontmatter(''.join(lines))
+    return None
+
+
+# Fields of a manifest record. Every file has the first three; markdown
+# notes also carry the hash, normalized link targets and raw frontmatter.
+SIZE, MTIME_NS, INO, SHA1, EMBEDS, WIKILINKS, MDLINKS, FRONTMATTER = range(8)
+LINK_KINDS = {'embeds': EMBEDS, 'wikilinks': WIKILINKS, 'mdlinks': MDLINKS}
+
+
+class VaultManifest:
+    """Persistent per-file scan results for a vault.
+
+    ``entries`` maps vault-relative POSIX paths to compact records (lists
+    indexed by the field constants above); records are kept flat so a 60k
+    note manifest loads in a fraction of a second. ``refresh()`` re-reads
+    only files whose size or mtime changed since the last scan.
+    """
+
+    def __init__(self, root=SWITCHBOARD, path=None):
+        self.root = str(root)
+        self.path = Path(path) if path else Path(self.root) / STATE_DIR / MANIFEST_NAME
+        self.entries = {}
+        self.changed = []
+        self.removed = []
+        self._dirty = False
+        self._frontmatter = {}
+
+    def load(self):
+        """Load the previous scan, ignoring missing or outdated manifests"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('entries', {})
+        except (OSError, ValueError):
+            self.entries = {}
+        return self
+
+    def save(self):
+        """Write the manifest atomically if anything changed"""
+        if not self._dirty:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'entries': self.entries},
+                      f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        self._dirty = False
+
+    def abspath(self, rel):
+        return os.path.join(self.root, rel)
+
+    def walk(self):
+        """Yield (relpath, stat) for every file in the vault"""
+        stack = [('', self.root)]
+        while stack:
+            rel_dir, path = stack.pop()
+            try:
+                it = os.scandir(path)
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if entry.name not in SKIP_DIRS:
+                                stack.append((rel_dir + entry.name + '/', entry.path))
+                            continue
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    yield rel_dir + entry.name, st
+
+    def refresh(self):
+        """Bring the manifest up to date with the files on disk"""
+        self.changed = []
+        seen = set()
+        for rel, st in self.walk():
+            seen.add(rel)
+            record = self.entries.get(rel)
+            if (record is not None and record[SIZE] == st.st_size
+                    and record[MTIME_NS] == st.st_mtime_ns):
+                if record[INO] != st.st_ino:
+                    record[INO] = st.st_ino
+                    self._dirty = True
+                continue
+            if self.scan_file(rel, st):
+                self.changed.append(rel)
+
+        self.removed = [rel for rel in self.entries if rel not in seen]
+        for rel in self.removed:
+            del self.entries[rel]
+        if self.removed:
+            self._dirty = True
+        return self
+
+    def scan_file(self, rel, st=None):
+        """Re-read one file into the manifest; False if it can't be read"""
+        try:
+            if st is None:
+                st = os.stat(self.abspath(rel))
+            if rel.endswith('.md'):
+                with open(self.abspath(rel), 'rb') as f:
+                    data = f.read()
+                self.update_entry(rel, data, st)
+                return True
+        except OSError:
+            return False
+        self.entries[rel] = [st.st_size, st.st_mtime_ns, st.st_ino]
+        self._dirty = True
+        return True
+
+    def remove_entry(self, rel):
+        """Forget a file that was deleted"""
+        if self.entries.pop(rel, None) is not None:
+            self._frontmatter.pop(rel, None)
+            self._dirty = True
+
+    def update_entry(self, rel, data, st=None):
+        """Record a note whose bytes the caller already has in memory"""
+        if st is None:
+            st = os.stat(self.abspath(rel))
+        content = data.decode('utf-8', errors='replace')
+        links = parse_links(content)
+        match = _FRONTMATTER_RE.match(content)
+        self.entries[rel] = [
+            st.st_size, st.st_mtime_ns, st.st_ino,
+            hashlib.sha1(data).hexdigest(),
+            _unique(normalize_link(t) for t in links['embeds']),
+            _unique(normalize_link(t) for t in links['wikilinks']),
+            _unique(normalize_link(t) for t in links['mdlinks']),
+            match.group(0) if match else None,
+        ]
+        self._frontmatter.pop(rel, None)
+        self._dirty = True
+
+    def apply_moves(self, moves):
+        """Follow files the caller moved, without rescanning the vault.
+
+        ``moves`` maps old to new relative paths. A rename keeps size and
+        mtime, so the existing records stay valid under the new path.
+        """
+        for old, new in moves.items():
+            record = self.entries.pop(old, None)
+            if record is not None:
+                self.entries[new] = record
+                self._frontmatter.pop(old, None)
+                self._dirty = True
+
+    def notes(self):
+        """Relative paths of all markdown notes, sorted"""
+        return sorted(rel for rel in self.entries if rel.endswith('.md'))
+
+    def links(self, rel, kinds=('embeds', 'wikilinks', 'mdlinks')):
+        """Normalized link targets of a note"""
+        record = self.entries.get(rel)
+        if record is None or len(record) <= SHA1:
+            return []
+        return [t for kind in kinds for t in record[LINK_KINDS[kind]]]
+
+    def frontmatter(self, rel):
+        """Parsed frontmatter of a note, or None"""
+        if rel not in self._frontmatter:
+            record = self.entries.get(rel)
+            raw = record[FRONTMATTER] if record and len(record) > FRONTMATTER else None
+            self._frontmatter[rel] = parse_frontmatter(raw) if raw else None
+        return self._frontmatter[rel]
+
+    def files_linking_to(self, names, kinds=('embeds', 'wikilinks', 'mdlinks')):
+        """Notes with at least one link whose target is in ``names``"""
+        names = set(names)
+        fields = [LINK_KINDS[kind] for kind in kinds]
+        matches = []
+        for rel, record in self.entries.items():
+            if len(record) <= SHA1:
+                continue
+            for i in fields:
+                if record[i] and not names.isdisjoint(record[i]):
+                    matches.append(rel)
+                    break
+        return sorted(matches)
+
+
+def format_size(size):
+    """Human-readable byte count: 512 B, 1.5 KB, 2.0 MB"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def scan_vault(root=SWITCHBOARD, manifest_path=None):
+    """Load, refresh and save the manifest for a vault"""
+    manifest = VaultManifest(root, manifest_path).load().refresh()
+    manifest.save()
+    return manifest
+
+
+def main():
+    root = sys.argv[1] if len(sys.argv) > 1 else SWITCHBOARD
+    print(f"🔍 Scanning {root}...")
+    manifest = scan_vault(root)
+    print(f"  Files tracked: {len(manifest.entries)}")
+    print(f"  Markdown notes: {len(manifest.notes())}")
+    print(f"  Changed since last scan: {len(manifest.changed)}")
+    print(f"  Removed since last scan: {len(manifest.removed)}")
+    print(f"  Manifest: {manifest.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,411 @@
+#!/usr/bin/env python3
+"""
+Watch the switchboard vault and repair links as files move
+
+A long-running alternative to running fix_broken_links.py by hand: file
+moves and renames are picked up as they happen (inotify on Linux, polling
+elsewhere) and only the notes that link to the moved file are rewritten,
+found through an in-memory backlink map.
+
+    python tools/watch_links.py [vault] [--poll] [--interval 2]
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+
+from link_index import LinkIndex, link_targets, retarget_links
+from safe_write import WriteBatch
+from vault_scan import INO, MTIME_NS, SIZE, SKIP_DIRS, SWITCHBOARD, VaultManifest
+
+
+class LinkWatcher:
+    """Keeps the manifest, link index and backlink map in step with events.
+
+    Events are tuples: ``('moved', old, new)``, ``('created', rel)``,
+    ``('modified', rel)``, ``('deleted', rel)``, ``('moved_dir', old, new)``,
+    ``('deleted_dir', rel)`` and ``('rescan',)``. ``handle()`` applies a
+    group of them and writes the notes whose links need to follow a move.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self._fixes = {}
+        self.rebuild()
+
+    def rebuild(self):
+        self.index = LinkIndex.from_manifest(self.manifest)
+        self.forward = {}    # note → {link: resolved path or None}
+        self.backlinks = {}  # path → notes with a link resolving to it
+        self.dangling = set()
+        for rel in self.manifest.notes():
+            self._index_note(rel)
+
+    def _resolve(self, note, link):
+        target = self.index.resolve(link, note)
+        self.forward[note][link] = target
+        if target is None:
+            self.dangling.add(note)
+        else:
+            self.backlinks.setdefault(target, set()).add(note)
+        return target
+
+    def _index_note(self, rel):
+        self._drop_note(rel)
+        self.forward[rel] = {}
+        for link in self.manifest.links(rel):
+            if link and '://' not in link:
+                self._resolve(rel, link)
+
+    def _drop_note(self, rel):
+        for target in set(self.forward.pop(rel, {}).values()):
+            notes = self.backlinks.get(target)
+            if notes:
+                notes.discard(rel)
+        self.dangling.discard(rel)
+
+    def handle(self, events):
+        """Apply events and repair links. Returns ``[(note, changes)]``."""
+        self._fixes = {}
+        for event in events:
+            getattr(self, 'on_' + event[0])(*event[1:])
+        fixed = self._write_fixes(self._fixes)
+        self.manifest.save()
+        return fixed
+
+    def on_moved(self, old, new):
+        if old not in self.index.paths:
+            # e.g. an editor's temp file renamed over a note
+            self.on_modified(new)
+            return
+        was_note = old in self.forward
+        if was_note:
+            self._drop_note(old)
+        notes = self.backlinks.pop(old, set())
+        self.index.remove(old)
+        self.index.add(new)
+        self.manifest.apply_moves({old: new})
+        if old in self._fixes:
+            self._fixes[new] = self._fixes.pop(old)
+        if was_note:
+            self._index_note(new)
+
+        for note in notes:
+            if note == old or note not in self.forward:
+                continue
+            for link, target in list(self.forward[note].items()):
+                if target != old:
+                    continue
+                if self.index.resolve(link, note) != new:
+                    self._fixes.setdefault(note, {})[link] = link_targets(self.index, new, note, link)
+                self.forward[note][link] = new
+                self.backlinks.setdefault(new, set()).add(note)
+
+    def on_moved_dir(self, old, new):
+        prefix = old + '/'
+        for rel in sorted(p for p in self.index.paths if p.startswith(prefix)):
+            self.on_moved(rel, new + '/' + rel[len(prefix):])
+
+    def on_created(self, rel):
+        if not self.manifest.scan_file(rel):
+            return
+        self.index.add(rel)
+        if rel.endswith('.md'):
+            self._index_note(rel)
+        # Broken links with this file's name may resolve now
+        name = rel.rpartition('/')[2].casefold()
+        keys = {name, name[:-3]} if name.endswith('.md') else {name}
+        for note in list(self.dangling):
+            links = self.forward[note]
+            for link, target in list(links.items()):
+                if target is None and link.casefold().rpartition('/')[2] in keys:
+                    self._resolve(note, link)
+            if None not in links.values():
+                self.dangling.discard(note)
+
+    def on_modified(self, rel):
+        if rel not in self.index.paths:
+            self.on_created(rel)
+        elif self.manifest.scan_file(rel) and rel.endswith('.md'):
+            self._index_note(rel)
+
+    def on_deleted(self, rel):
+        if rel not in self.index.paths:
+            return
+        self.index.remove(rel)
+        self.manifest.remove_entry(rel)
+        self._drop_note(rel)
+        self._fixes.pop(rel, None)
+        for note in self.backlinks.pop(rel, set()):
+            for link, target in list(self.forward.get(note, {}).items()):
+                if target == rel:
+                    self._resolve(note, link)
+
+    def on_deleted_dir(self, rel):
+        prefix = rel + '/'
+        for path in sorted(p for p in self.index.paths if p.startswith(prefix)):
+            self.on_deleted(path)
+
+    def on_rescan(self):
+        self.manifest.refresh()
+        self.rebuild()
+
+    def _write_fixes(self, fixes):
+        fixed = []
+        written = {}
+        with WriteBatch(self.manifest.root, label='watch_links') as batch:
+            for note, mapping in sorted(fixes.items()):
+                path = self.manifest.abspath(note)
+                try:
+                    with open(path, 'r', encoding='utf-8') as f:
+                        content = f.read()
+                except OSError as e:
+                    print(f"  ✗ Error reading {note}: {e}")
+                    continue
+                new_content, changes = retarget_links(content, mapping)
+                if new_content != content:
+                    written[note] = new_content.encode('utf-8')
+                    batch.write(path, written[note])
+                    fixed.append((note, changes))
+        for note, data in written.items():
+            self.manifest.update_entry(note, data)
+            self._index_note(note)
+        return fixed
+
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct('iIII')
+
+# Pause before reading so both halves of a rename arrive together
+SETTLE_SECONDS = 0.05
+
+_libc = None
+
+def _load_libc():
+    global _libc
+    if _libc is None and sys.platform.startswith('linux'):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        if hasattr(libc, 'inotify_init1'):
+            _libc = libc
+    return _libc
+
+def inotify_available():
+    return _load_libc() is not None
+
+
+class InotifySource:
+    """Vault events from inotify, one watch per directory"""
+
+    def __init__(self, root):
+        libc = _load_libc()
+        if libc is None:
+            raise OSError("inotify is not available on this platform")
+        self.root = str(root)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.dirs = {}  # watch descriptor → relative directory ('' for the root)
+        self._add_tree('')
+
+    def close(self):
+        os.close(self.fd)
+
+    def _add_watch(self, rel_dir):
+        path = os.path.join(self.root, rel_dir)
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0:
+            self.dirs[wd] = rel_dir
+
+    def _add_tree(self, rel_dir):
+        """Watch a directory and everything under it; returns the files found"""
+        files = []
+        stack = [rel_dir]
+        while stack:
+            current = stack.pop()
+            self._add_watch(current)
+            try:
+                with os.scandir(os.path.join(self.root, current)) as it:
+                    for entry in it:
+                        rel = current + '/' + entry.name if current else entry.name
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in SKIP_DIRS:
+                                stack.append(rel)
+                        else:
+                            files.append(rel)
+            except OSError:
+                continue
+        return files
+
+    def _rename_dirs(self, old, new):
+        prefix = old + '/'
+        for wd, rel_dir in self.dirs.items():
+            if rel_dir == old:
+                self.dirs[wd] = new
+            elif rel_dir.startswith(prefix):
+                self.dirs[wd] = new + '/' + rel_dir[len(prefix):]
+
+    def read(self, timeout=None):
+        """Wait up to ``timeout`` seconds and return the events that arrived"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        time.sleep(SETTLE_SECONDS)
+        data = b''
+        while True:
+            try:
+                chunk = os.read(self.fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            data += chunk
+
+        events = []
+        moved_from = {}
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0').decode('utf-8', errors='surrogateescape')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                return [('rescan',)]
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            rel_dir = self.dirs.get(wd)
+            if rel_dir is None or not name:
+                continue
+            rel = rel_dir + '/' + name if rel_dir else name
+            is_dir = bool(mask & IN_ISDIR)
+            if is_dir and name in SKIP_DIRS:
+                continue
+
+            if mask & IN_MOVED_FROM:
+                moved_from[cookie] = (rel, is_dir)
+            elif mask & IN_MOVED_TO:
+                if cookie in moved_from:
+                    old, _ = moved_from.pop(cookie)
+                    if is_dir:
+                        self._rename_dirs(old, rel)
+                        events.append(('moved_dir', old, rel))
+                    else:
+                        events.append(('moved', old, rel))
+                elif is_dir:
+                    events.extend(('created', f) for f in self._add_tree(rel))
+                else:
+                    events.append(('created', rel))
+            elif mask & IN_CREATE:
+                if is_dir:
+                    events.extend(('created', f) for f in self._add_tree(rel))
+            elif mask & IN_CLOSE_WRITE:
+                events.append(('modified', rel))
+            elif mask & IN_DELETE and not is_dir:
+                events.append(('deleted', rel))
+
+        # Moved out of the vault (or into a skipped folder like .trash)
+        for rel, is_dir in moved_from.values():
+            if is_dir:
+                for wd in [wd for wd, d in self.dirs.items() if d == rel or d.startswith(rel + '/')]:
+                    self._libc.inotify_rm_watch(self.fd, wd)
+                    del self.dirs[wd]
+                events.append(('deleted_dir', rel))
+            else:
+                events.append(('deleted', rel))
+        return events
+
+
+class PollingSource:
+    """Vault events from comparing directory snapshots.
+
+    A file that vanished and a file that appeared with the same inode is a
+    move, so renames are recognised without inotify.
+    """
+
+    def __init__(self, manifest):
+        self.manifest = manifest
+        self.snapshot = {rel: (rec[INO], rec[SIZE], rec[MTIME_NS])
+                         for rel, rec in manifest.entries.items()}
+
+    def close(self):
+        pass
+
+    def read(self, timeout=None):
+        if timeout:
+            time.sleep(timeout)
+        current = {rel: (st.st_ino, st.st_size, st.st_mtime_ns)
+                   for rel, st in self.manifest.walk()}
+        previous, self.snapshot = self.snapshot, current
+
+        vanished = {previous[rel][0]: rel for rel in previous if rel not in current}
+        events = []
+        for rel, state in current.items():
+            old = previous.get(rel)
+            if old is None:
+                source = vanished.pop(state[0], None)
+                if source is not None:
+                    events.append(('moved', source, rel))
+                else:
+                    events.append(('created', rel))
+            elif old != state:
+                events.append(('modified', rel))
+        events.extend(('deleted', rel) for rel in vanished.values())
+        return events
+
+
+def watch(root=SWITCHBOARD, poll=False, interval=2.0):
+    manifest = VaultManifest(root).load().refresh()
+    manifest.save()
+    watcher = LinkWatcher(manifest)
+    if poll or not inotify_available():
+        source = PollingSource(manifest)
+        print(f"👀 Watching {root} (polling every {interval}s)")
+    else:
+        source = InotifySource(root)
+        print(f"👀 Watching {root} ({len(source.dirs)} folders via inotify)")
+
+    try:
+        while True:
+            events = source.read(interval)
+            if not events:
+                continue
+            for note, changes in watcher.handle(events):
+                print(f"\n✓ Fixed {note}:")
+                for change in changes:
+                    print(change)
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    finally:
+        source.close()
+        manifest.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Repair links as files move in the vault')
+    parser.add_argument('vault', nargs='?', default=SWITCHBOARD, help='Vault root')
+    parser.add_argument('--poll', action='store_true', help='Poll instead of using inotify')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between polls')
+    args = parser.parse_args(argv)
+    watch(args.vault, poll=args.poll, interval=args.interval)
+
+
+if __name__ == "__main__":
+    main()